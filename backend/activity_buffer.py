@@ -0,0 +1,180 @@
+"""
+Write-behind buffer for server activity events
+Events are queued in memory and flushed to MongoDB in batches
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from datetime import datetime
+from typing import Optional
+
+from activity_rollups import apply_rollups
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest")
+
+
+def _written_events(batch: list, details: dict, inserted: int) -> Optional[list]:
+    """Events a failed unordered insert_many still stored, or None if the error doesn't say"""
+    write_errors = details.get('writeErrors')
+    if write_errors is None:
+        return None
+    failed = {error['index'] for error in write_errors}
+    if len(batch) - len(failed) != inserted:
+        return None
+    return [event for index, event in enumerate(batch) if index not in failed]
+
+
+class ActivityBuffer:
+    """Bounded in-process queue that batches activity inserts"""
+
+    def __init__(self, collection, batch_size: int = 500, flush_interval: float = 2.0,
+                 max_queue: int = 10000, overflow_policy: str = "drop_oldest",
+                 rollup_collection=None):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+        if batch_size < 1 or max_queue < batch_size:
+            raise ValueError("max_queue must be at least batch_size and batch_size at least 1")
+
+        self.collection = collection
+        self.rollup_collection = rollup_collection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.overflow_policy = overflow_policy
+
+        self._queue = deque()
+        self._flush_lock = asyncio.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+        # Counters
+        self.queued = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.rollup_failures = 0
+        self.flush_count = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    @classmethod
+    def from_env(cls, collection, rollup_collection=None):
+        """Build a buffer configured from ACTIVITY_* environment variables"""
+        return cls(
+            collection,
+            rollup_collection=rollup_collection,
+            batch_size=int(os.environ.get('ACTIVITY_BATCH_SIZE', '500')),
+            flush_interval=float(os.environ.get('ACTIVITY_FLUSH_INTERVAL', '2.0')),
+            max_queue=int(os.environ.get('ACTIVITY_QUEUE_MAX', '10000')),
+            overflow_policy=os.environ.get('ACTIVITY_OVERFLOW_POLICY', 'drop_oldest'),
+        )
+
+    def record(self, guild_id: int, activity_data: dict) -> bool:
+        """Queue an activity event without awaiting any I/O"""
+        if len(self._queue) >= self.max_queue:
+            self.dropped += 1
+            if self.overflow_policy == "drop_newest":
+                return False
+            self._queue.popleft()
+
+        self._queue.append({
+            "guild_id": guild_id,
+            "timestamp": datetime.utcnow(),
+            **activity_data
+        })
+        self.queued += 1
+
+        if len(self._queue) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+        return True
+
+    def start(self):
+        """Start the background flush task on the running loop"""
+        if self._task is None or self._task.done():
+            self._closing = False
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self) -> int:
+        """Write all queued events, one insert_many per batch"""
+        written = 0
+        async with self._flush_lock:
+            while self._queue:
+                batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+                started = time.perf_counter()
+                try:
+                    result = await self.collection.insert_many(batch, ordered=False)
+                    inserted = len(result.inserted_ids)
+                    written_events = batch
+                except Exception as e:
+                    # With ordered=False the server still writes every valid document
+                    details = getattr(e, 'details', None) or {}
+                    inserted = details.get('nInserted', 0)
+                    self.failed += len(batch) - inserted
+                    logger.error(f"Failed to flush {len(batch) - inserted} activity event(s): {e}")
+                    written_events = _written_events(batch, details, inserted)
+                    if written_events is None:
+                        # Can't tell which events were stored; count the rollup as failed rather than guess
+                        written_events = []
+                        if inserted and self.rollup_collection is not None:
+                            self.rollup_failures += 1
+                            logger.error(f"Skipped activity rollups for {inserted} unidentified event(s)")
+                if self.rollup_collection is not None and written_events:
+                    try:
+                        await apply_rollups(self.rollup_collection, written_events)
+                    except Exception as e:
+                        self.rollup_failures += 1
+                        logger.error(f"Failed to update activity rollups: {e}")
+                elapsed_ms = (time.perf_counter() - started) * 1000
+
+                self.flushed += inserted
+                written += inserted
+                self.flush_count += 1
+                self.last_flush_ms = elapsed_ms
+                self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+                self._total_flush_ms += elapsed_ms
+        return written
+
+    async def close(self):
+        """Stop the flush task and write whatever is still queued"""
+        self._closing = True
+        if self._task is not None:
+            self._wakeup.set()
+            try:
+                await self._task
+            except Exception as e:
+                logger.error(f"Activity flush task failed: {e}")
+            self._task = None
+        await self.flush()
+        logger.info(f"Activity buffer closed: {self.stats()}")
+
+    def stats(self) -> dict:
+        """Return buffer counters and flush latency"""
+        return {
+            "queued": self.queued,
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "rollup_failures": self.rollup_failures,
+            "pending": len(self._queue),
+            "flush_count": self.flush_count,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "avg_flush_ms": round(self._total_flush_ms / self.flush_count, 2) if self.flush_count else 0.0,
+            "max_flush_ms": round(self.max_flush_ms, 2),
+        }
@@ -0,0 +1,179 @@
+"""
+Retention and compaction for server activity
+Raw events expire through a TTL index; before they do, each completed day is
+folded into the activity_daily rollups so historical totals survive.
+
+Tiers:
+    server_activity  raw events, kept ACTIVITY_RETENTION_DAYS
+    activity_daily   per-user daily counters, kept ROLLUP_RETENTION_DAYS (0 = forever)
+"""
+
+import asyncio
+import logging
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+from pymongo import ASCENDING
+
+from activity_rollups import ROLLUP_COLLECTION, backfill_rollups, day_start
+
+logger = logging.getLogger(__name__)
+
+# The longest raw-event lookback in the codebase (member_stats) is 30 days
+MIN_RAW_RETENTION_DAYS = 31
+
+RAW_TTL_INDEX = "timestamp_ttl"
+ROLLUP_TTL_INDEX = "day_ttl"
+
+# retention_state document recording how far the one-off history compaction got
+HISTORY_STATE_ID = "history"
+
+
+@dataclass
+class RetentionPolicy:
+    raw_days: int = 35
+    # The rollups are the only copy of a day once its raw events expire
+    rollup_days: int = 0
+    compact_interval_seconds: int = 3600
+    # Wait this long after midnight before treating a day as complete
+    grace_seconds: int = 900
+
+    @classmethod
+    def from_env(cls):
+        """Build a policy from ACTIVITY_RETENTION_DAYS and friends"""
+        raw_days = int(os.environ.get('ACTIVITY_RETENTION_DAYS', '35'))
+        if raw_days < MIN_RAW_RETENTION_DAYS:
+            logger.warning(f"ACTIVITY_RETENTION_DAYS={raw_days} is shorter than the 30 day reports need; using {MIN_RAW_RETENTION_DAYS}")
+            raw_days = MIN_RAW_RETENTION_DAYS
+        return cls(
+            raw_days=raw_days,
+            rollup_days=int(os.environ.get('ROLLUP_RETENTION_DAYS', '0')),
+            compact_interval_seconds=int(os.environ.get('ACTIVITY_COMPACT_INTERVAL', '3600')),
+        )
+
+    def last_complete_day(self, now: datetime) -> datetime:
+        return day_start(now - timedelta(seconds=self.grace_seconds)) - timedelta(days=1)
+
+
+async def _ensure_ttl_index(collection, field: str, name: str, seconds: Optional[int]):
+    """Create, retune or drop a single-field TTL index"""
+    existing = await collection.index_information()
+    if not seconds:
+        if name in existing:
+            await collection.drop_index(name)
+        return
+    if name in existing:
+        if existing[name].get("expireAfterSeconds") != seconds:
+            await collection.database.command(
+                "collMod", collection.name,
+                index={"name": name, "expireAfterSeconds": seconds}
+            )
+            logger.info(f"Updated TTL on {collection.name}.{field} to {seconds}s")
+        return
+    await collection.create_index([(field, ASCENDING)], name=name, expireAfterSeconds=seconds)
+    logger.info(f"Created TTL index on {collection.name}.{field} ({seconds}s)")
+
+
+async def compact_history(db, policy: RetentionPolicy, since: Optional[datetime] = None,
+                          now: Optional[datetime] = None) -> datetime:
+    """Fold every completed day since `since` (default: all raw events) into the rollups in one pass"""
+    now = now or datetime.utcnow()
+    through = policy.last_complete_day(now)
+    written = await backfill_rollups(db.server_activity, db[ROLLUP_COLLECTION], since=since,
+                                     until=through + timedelta(days=1))
+    await db.retention_state.update_one(
+        {"_id": HISTORY_STATE_ID},
+        {"$set": {"through": through, "rows": written, "compacted_at": now}},
+        upsert=True
+    )
+    logger.info(f"Compacted raw activity through {through.strftime('%Y-%m-%d')} ({written} rollup row(s))")
+    return through
+
+
+async def ensure_retention_indexes(db, policy: RetentionPolicy, now: Optional[datetime] = None):
+    """Apply the policy's TTLs, compacting anything a new or shorter raw TTL would delete first"""
+    now = now or datetime.utcnow()
+    raw_seconds = policy.raw_days * 86400
+    existing = await db.server_activity.index_information()
+    current_seconds = existing.get(RAW_TTL_INDEX, {}).get("expireAfterSeconds")
+    if current_seconds is None:
+        # First deploy: every raw event ever recorded is about to become expirable
+        await compact_history(db, policy, now=now)
+    elif raw_seconds < current_seconds:
+        # The oldest day is already partially expired; only whole days can be recounted
+        oldest_whole_day = day_start(now - timedelta(seconds=current_seconds)) + timedelta(days=1)
+        await compact_history(db, policy, since=oldest_whole_day, now=now)
+
+    await _ensure_ttl_index(db.server_activity, "timestamp", RAW_TTL_INDEX, raw_seconds)
+    await _ensure_ttl_index(db[ROLLUP_COLLECTION], "day", ROLLUP_TTL_INDEX,
+                            policy.rollup_days * 86400 if policy.rollup_days else None)
+
+
+async def compact_day(db, day: datetime) -> int:
+    """Recount one completed day of raw events into the rollups"""
+    written = await backfill_rollups(db.server_activity, db[ROLLUP_COLLECTION], since=day,
+                                     until=day + timedelta(days=1))
+    # Record empty days too so they are not recomputed on every run
+    await db.retention_state.update_one(
+        {"_id": day.strftime("%Y-%m-%d")},
+        {"$set": {"day": day, "rows": written, "compacted_at": datetime.utcnow()}},
+        upsert=True
+    )
+    return written
+
+
+async def compact_pending_days(db, policy: RetentionPolicy, now: Optional[datetime] = None) -> int:
+    """Compact every completed day still inside the raw retention window"""
+    now = now or datetime.utcnow()
+    last_complete = policy.last_complete_day(now)
+    # The oldest day whose raw events have not started expiring yet
+    first = day_start(now) - timedelta(days=policy.raw_days - 1)
+    history = await db.retention_state.find_one({"_id": HISTORY_STATE_ID})
+    if history is not None:
+        first = max(first, history["through"] + timedelta(days=1))
+
+    done = {
+        state["day"] for state in
+        await db.retention_state.find({"day": {"$gte": first}}, {"day": 1}).to_list(length=None)
+    }
+
+    compacted = 0
+    day = first
+    while day <= last_complete:
+        if day not in done:
+            rows = await compact_day(db, day)
+            logger.info(f"Compacted activity for {day.strftime('%Y-%m-%d')} ({rows} rollup row(s))")
+            compacted += 1
+        day += timedelta(days=1)
+    return compacted
+
+
+async def retention_loop(db, policy: RetentionPolicy):
+    """Periodically compact completed days; runs until cancelled"""
+    while True:
+        try:
+            await compact_pending_days(db, policy)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Activity compaction failed: {e}")
+        await asyncio.sleep(policy.compact_interval_seconds)
+
+
+async def _main():
+    from database import client, db
+
+    policy = RetentionPolicy.from_env()
+    try:
+        await ensure_retention_indexes(db, policy)
+        compacted = await compact_pending_days(db, policy)
+        logger.info(f"Compacted {compacted} day(s)")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main())
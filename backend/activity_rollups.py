@@ -0,0 +1,209 @@
+"""
+Per-guild, per-day, per-user message counters
+Kept up to date with $inc upserts so reports never scan raw server_activity
+"""
+
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_COLLECTION = "activity_daily"
+
+
+def day_start(moment: datetime) -> datetime:
+    """Truncate a timestamp to midnight UTC"""
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def window_start(days: int, now: Optional[datetime] = None) -> datetime:
+    """First day of a window of `days` calendar days, today included"""
+    return day_start(now or datetime.utcnow()) - timedelta(days=days - 1)
+
+
+def build_rollup_updates(events: Iterable[dict]):
+    """Fold raw activity events into one $inc upsert per (guild, day, user)"""
+    counts = {}
+    for event in events:
+        if event.get("type") != "message":
+            continue
+        key = (event["guild_id"], day_start(event["timestamp"]), event["user_id"])
+        counts[key] = counts.get(key, 0) + 1
+
+    return [
+        UpdateOne(
+            {"guild_id": guild_id, "day": day, "user_id": user_id},
+            {"$inc": {"messages": count}},
+            upsert=True
+        )
+        for (guild_id, day, user_id), count in counts.items()
+    ]
+
+
+async def apply_rollups(collection, events: Iterable[dict]) -> int:
+    """Apply a batch of activity events to the rollup collection"""
+    updates = build_rollup_updates(events)
+    if updates:
+        await collection.bulk_write(updates, ordered=False)
+    return len(updates)
+
+
+def _match(guild_id: Optional[int], start_day: datetime) -> dict:
+    match = {"day": {"$gte": start_day}}
+    if guild_id:
+        match["guild_id"] = guild_id
+    return match
+
+
+async def top_users(collection, guild_id: Optional[int], start_day: datetime, limit: int = 10):
+    """Users with the most messages since start_day"""
+    pipeline = [
+        {"$match": _match(guild_id, start_day)},
+        {"$group": {"_id": "$user_id", "message_count": {"$sum": "$messages"}}},
+        {"$sort": {"message_count": DESCENDING}},
+        {"$limit": limit}
+    ]
+    rows = await collection.aggregate(pipeline).to_list(length=limit)
+    return [{"user_id": row["_id"], "message_count": row["message_count"]} for row in rows]
+
+
+async def message_count(collection, guild_id: Optional[int], start_day: datetime) -> int:
+    """Total messages since start_day"""
+    pipeline = [
+        {"$match": _match(guild_id, start_day)},
+        {"$group": {"_id": None, "total": {"$sum": "$messages"}}}
+    ]
+    rows = await collection.aggregate(pipeline).to_list(length=1)
+    return rows[0]["total"] if rows else 0
+
+
+async def daily_totals(collection, guild_id: Optional[int], start_day: datetime) -> dict:
+    """Messages and active users per day since start_day"""
+    pipeline = [
+        {"$match": _match(guild_id, start_day)},
+        # One rollup document per (guild, day, user), so counting documents counts active users
+        {"$group": {"_id": "$day", "messages": {"$sum": "$messages"}, "active_users": {"$sum": 1}}},
+        {"$sort": {"_id": ASCENDING}}
+    ]
+    rows = await collection.aggregate(pipeline).to_list(length=None)
+    return {
+        row["_id"].strftime("%Y-%m-%d"): {"messages": row["messages"], "active_users": row["active_users"]}
+        for row in rows
+    }
+
+
+async def activity_summary(collection, guild_id: Optional[int], days: int, top: int = 10) -> dict:
+    """Totals, active users, top users and daily breakdown for a window"""
+    pipeline = [
+        {"$match": _match(guild_id, window_start(days))},
+        {"$facet": {
+            "daily": [
+                {"$group": {"_id": "$day", "messages": {"$sum": "$messages"}}},
+                {"$sort": {"_id": ASCENDING}}
+            ],
+            "top_users": [
+                {"$group": {"_id": "$user_id", "message_count": {"$sum": "$messages"}}},
+                {"$sort": {"message_count": DESCENDING}},
+                {"$limit": top}
+            ],
+            "active_users": [
+                {"$group": {"_id": "$user_id"}},
+                {"$count": "count"}
+            ]
+        }}
+    ]
+    rows = await collection.aggregate(pipeline).to_list(length=1)
+    facets = rows[0] if rows else {"daily": [], "top_users": [], "active_users": []}
+
+    daily_breakdown = {row["_id"].strftime("%Y-%m-%d"): row["messages"] for row in facets["daily"]}
+    return {
+        "total_messages": sum(daily_breakdown.values()),
+        "active_users": facets["active_users"][0]["count"] if facets["active_users"] else 0,
+        "top_users": [
+            {"user_id": row["_id"], "message_count": row["message_count"]}
+            for row in facets["top_users"]
+        ],
+        "daily_breakdown": daily_breakdown
+    }
+
+
+async def backfill_rollups(raw_collection, rollup_collection, guild_id: Optional[int] = None,
+                           since: Optional[datetime] = None, batch_size: int = 1000,
+                           until: Optional[datetime] = None) -> int:
+    """Rebuild rollup counters from raw server_activity events
+
+    Counts are written with $set, so running the backfill twice is safe.
+    `until` is exclusive and should be a midnight so no day is counted partially.
+    """
+    match = {"type": "message"}
+    if guild_id:
+        match["guild_id"] = guild_id
+    if since or until:
+        match["timestamp"] = {}
+        if since:
+            match["timestamp"]["$gte"] = day_start(since)
+        if until:
+            match["timestamp"]["$lt"] = until
+
+    pipeline = [
+        {"$match": match},
+        {"$group": {
+            "_id": {
+                "guild_id": "$guild_id",
+                "user_id": "$user_id",
+                "day": {"$dateFromParts": {
+                    "year": {"$year": "$timestamp"},
+                    "month": {"$month": "$timestamp"},
+                    "day": {"$dayOfMonth": "$timestamp"}
+                }}
+            },
+            "messages": {"$sum": 1}
+        }}
+    ]
+
+    written = 0
+    batch = []
+    async for row in raw_collection.aggregate(pipeline, allowDiskUse=True):
+        key = row["_id"]
+        batch.append(UpdateOne(
+            {"guild_id": key["guild_id"], "day": key["day"], "user_id": key["user_id"]},
+            {"$set": {"messages": row["messages"]}},
+            upsert=True
+        ))
+        if len(batch) >= batch_size:
+            await rollup_collection.bulk_write(batch, ordered=False)
+            written += len(batch)
+            batch = []
+    if batch:
+        await rollup_collection.bulk_write(batch, ordered=False)
+        written += len(batch)
+
+    logger.info(f"Backfilled {written} activity rollup row(s)")
+    return written
+
+
+async def _backfill_main(args):
+    from database import client, db
+    from db_indexes import ensure_indexes
+
+    try:
+        await ensure_indexes(db)
+        since = window_start(args.days) if args.days else None
+        # Today is still being counted by the activity buffer's $inc upserts
+        await backfill_rollups(db.server_activity, db[ROLLUP_COLLECTION], args.guild_id, since,
+                               until=day_start(datetime.utcnow()))
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Build activity rollups from raw server_activity")
+    parser.add_argument("--guild-id", type=int, default=None, help="Only backfill this guild")
+    parser.add_argument("--days", type=int, default=None, help="Only backfill the last N days")
+    asyncio.run(_backfill_main(parser.parse_args()))
@@ -0,0 +1,226 @@
+"""
+API metrics
+ASGI middleware recording request counts and latency per route template, a
+process sampler and a MongoDB ping that run on a schedule in the background,
+so /api/health and /metrics only read cached values.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, Optional
+
+from db_metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+# Requests that matched no route share one label so random paths can't blow up cardinality
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class RequestMetrics:
+    """Request counters and latency histograms keyed by method and route template"""
+
+    def __init__(self):
+        self.latency: Dict[tuple, Histogram] = {}
+        self.responses: Dict[tuple, int] = {}
+        self.in_flight = 0
+
+    def observe(self, method: str, route: str, status: int, elapsed_ms: float):
+        key = (method, route)
+        histogram = self.latency.get(key)
+        if histogram is None:
+            histogram = self.latency[key] = Histogram()
+        histogram.observe(elapsed_ms)
+        response_key = (method, route, status)
+        self.responses[response_key] = self.responses.get(response_key, 0) + 1
+
+    def collect(self, exposition):
+        for (method, route, status), count in sorted(self.responses.items()):
+            exposition.counter("http_requests_total", "HTTP requests by route template and status",
+                               count, {"method": method, "route": route, "status": status})
+        for (method, route), histogram in sorted(self.latency.items()):
+            exposition.histogram("http_request_duration_seconds", "HTTP request latency by route template",
+                                 histogram, {"method": method, "route": route})
+        exposition.gauge("http_requests_in_flight", "HTTP requests being handled", self.in_flight)
+
+
+class RequestMetricsMiddleware:
+    """Pure ASGI middleware (no per-request task or body buffering) feeding RequestMetrics"""
+
+    def __init__(self, app, metrics: RequestMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.metrics.in_flight += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.metrics.in_flight -= 1
+            # FastAPI's router records the matched route in the scope
+            route = getattr(scope.get("route"), "path", None) or UNMATCHED_ROUTE
+            self.metrics.observe(scope["method"], route, status, (time.perf_counter() - started) * 1000)
+
+
+class ProcessSampler:
+    """Process and system resource gauges refreshed every `interval` seconds"""
+
+    def __init__(self, interval: float = 15.0):
+        self.interval = interval
+        self.sample: dict = {}
+        self.sampled_at: Optional[float] = None
+        self.start_time: Optional[float] = None
+        self._process = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _read(self) -> dict:
+        import psutil
+
+        if self._process is None:
+            self._process = psutil.Process()
+            # Primes cpu_percent; the first reading is always 0
+            self._process.cpu_percent(None)
+        process = self._process
+        with process.oneshot():
+            sample = {
+                "memory_mb": round(process.memory_info().rss / 1024 / 1024, 2),
+                "cpu_percent": process.cpu_percent(None),
+                "threads": process.num_threads(),
+            }
+            try:
+                sample["open_fds"] = process.num_fds()
+            except (AttributeError, psutil.Error):
+                pass
+        sample["system_memory_percent"] = psutil.virtual_memory().percent
+        return sample
+
+    def process_start_time(self) -> float:
+        """Unix time the OS started this process"""
+        if self.start_time is None:
+            import psutil
+            self.start_time = psutil.Process().create_time()
+        return self.start_time
+
+    def uptime_seconds(self) -> float:
+        return round(time.time() - self.process_start_time(), 1)
+
+    async def refresh(self):
+        try:
+            self.sample = await asyncio.to_thread(self._read)
+            self.sampled_at = time.time()
+        except Exception as e:
+            logger.warning(f"Could not sample process resources: {e}")
+
+    async def _loop(self):
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        self.process_start_time()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def snapshot(self) -> dict:
+        return {
+            **self.sample,
+            "age_seconds": round(time.time() - self.sampled_at, 1) if self.sampled_at else None,
+        }
+
+    def collect(self, exposition):
+        exposition.gauge("process_start_time_seconds", "Start time of the process since the Unix epoch",
+                         round(self.process_start_time(), 3))
+        exposition.gauge("process_uptime_seconds", "Seconds since the process started", self.uptime_seconds())
+        if "memory_mb" in self.sample:
+            exposition.gauge("process_resident_memory_bytes", "Resident memory size",
+                             int(self.sample["memory_mb"] * 1024 * 1024))
+            exposition.gauge("process_cpu_percent", "Process CPU use over the last sample interval",
+                             self.sample["cpu_percent"])
+            exposition.gauge("process_threads", "Process threads", self.sample["threads"])
+            if "open_fds" in self.sample:
+                exposition.gauge("process_open_fds", "Open file descriptors", self.sample["open_fds"])
+            exposition.gauge("system_memory_percent", "System memory in use", self.sample["system_memory_percent"])
+
+
+class DatabaseProbe:
+    """Pings MongoDB every `interval` seconds and keeps the last result"""
+
+    def __init__(self, db, interval: float = 15.0, timeout: float = 5.0):
+        self.db = db
+        self.interval = interval
+        self.timeout = timeout
+        self.status = "unknown"
+        self.latency_ms: Optional[float] = None
+        self.checked_at: Optional[float] = None
+        self.consecutive_failures = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_env(cls, db):
+        """Build a probe from DB_PING_INTERVAL and DB_PING_TIMEOUT"""
+        return cls(db, interval=float(os.environ.get('DB_PING_INTERVAL', '15')),
+                   timeout=float(os.environ.get('DB_PING_TIMEOUT', '5')))
+
+    async def check(self):
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self.db.command("ping"), timeout=self.timeout)
+            self.status = "connected"
+            self.consecutive_failures = 0
+        except Exception as e:
+            self.status = f"error: {e!r}"
+            self.consecutive_failures += 1
+        self.latency_ms = round((time.perf_counter() - started) * 1000, 2)
+        self.checked_at = time.time()
+
+    async def _loop(self):
+        while True:
+            await self.check()
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    @property
+    def up(self) -> bool:
+        return self.status == "connected"
+
+    def snapshot(self) -> dict:
+        return {
+            "status": self.status,
+            "latency_ms": self.latency_ms,
+            "consecutive_failures": self.consecutive_failures,
+            "age_seconds": round(time.time() - self.checked_at, 1) if self.checked_at else None,
+        }
+
+    def collect(self, exposition):
+        exposition.gauge("mongodb_up", "Whether the last background ping succeeded", 1 if self.up else 0)
+        if self.latency_ms is not None:
+            exposition.gauge("mongodb_ping_seconds", "Duration of the last background ping",
+                             round(self.latency_ms / 1000, 6))
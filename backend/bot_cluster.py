@@ -0,0 +1,309 @@
+"""
+Multi-process sharded bot cluster
+The coordinator (`python bot_cluster.py`) splits the shard IDs into contiguous
+ranges and runs one discord_bot.py worker per range, each an AutoShardedBot
+owning only its shards. Workers print a CLUSTER_STATS line with per-shard
+latency and event rates every few seconds; the coordinator merges them into
+a status file for /api/bot/status and restarts workers that exit or go quiet.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import os
+import signal
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from bot_supervisor import READY, RUNNING, BotSupervisor
+
+logger = logging.getLogger(__name__)
+
+STATS_PREFIX = "CLUSTER_STATS "
+
+# Logged by the coordinator once every worker has connected
+CLUSTER_READY_MARKER = "Cluster is ready"
+
+DEFAULT_STATUS_FILE = Path(__file__).parent / "cluster_status.json"
+
+
+def shard_ranges(shard_count: int, clusters: int) -> List[List[int]]:
+    """Split 0..shard_count-1 into `clusters` contiguous, near-equal ranges"""
+    clusters = max(1, min(clusters, shard_count))
+    size, extra = divmod(shard_count, clusters)
+    ranges, start = [], 0
+    for index in range(clusters):
+        end = start + size + (1 if index < extra else 0)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
+
+
+def parse_shard_ids(spec: str) -> Optional[List[int]]:
+    """Parse BOT_SHARD_IDS ("0,1,2"); None when unset"""
+    ids = [int(part) for part in spec.split(",") if part.strip()]
+    return ids or None
+
+
+class ShardStats:
+    """Event and message counters a worker reports to the coordinator"""
+
+    def __init__(self, shard_ids: Iterable[int]):
+        self.shard_ids = list(shard_ids)
+        self.messages: Dict[int, int] = {shard_id: 0 for shard_id in self.shard_ids}
+        self.events = 0
+        self._last_report = time.monotonic()
+
+    def gateway_event(self):
+        self.events += 1
+
+    def message(self, shard_id: int):
+        self.messages[shard_id] = self.messages.get(shard_id, 0) + 1
+
+    def report(self, cluster_id: int, ready: bool, latencies: Iterable[Tuple[int, float]],
+               guild_shard_ids: Iterable[int], now: Optional[float] = None) -> dict:
+        """Rates since the last report; resets the counters"""
+        now = time.monotonic() if now is None else now
+        elapsed = max(now - self._last_report, 1e-6)
+        guilds: Dict[int, int] = {}
+        for shard_id in guild_shard_ids:
+            guilds[shard_id] = guilds.get(shard_id, 0) + 1
+        latency = dict(latencies)
+        report = {
+            "cluster_id": cluster_id,
+            "ready": ready,
+            "events_per_second": round(self.events / elapsed, 2),
+            "shards": [
+                {
+                    "shard_id": shard_id,
+                    "latency_ms": round(latency[shard_id] * 1000, 2)
+                    if math.isfinite(latency.get(shard_id, math.inf)) else None,
+                    "guilds": guilds.get(shard_id, 0),
+                    "messages_per_second": round(self.messages.get(shard_id, 0) / elapsed, 2),
+                }
+                for shard_id in self.shard_ids
+            ],
+        }
+        self.events = 0
+        self.messages = {shard_id: 0 for shard_id in self.shard_ids}
+        self._last_report = now
+        return report
+
+
+def format_stats(report: dict) -> str:
+    return STATS_PREFIX + json.dumps(report, separators=(",", ":"))
+
+
+def parse_stats(line: str) -> Optional[dict]:
+    """The report in a CLUSTER_STATS line, or None for any other line"""
+    if not line.startswith(STATS_PREFIX):
+        return None
+    try:
+        return json.loads(line[len(STATS_PREFIX):])
+    except ValueError:
+        return None
+
+
+async def recommended_shard_count(token: str, timeout: float = 10.0) -> int:
+    """Shard count Discord recommends for this bot (GET /gateway/bot)"""
+    import aiohttp
+
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+        async with session.get("https://discord.com/api/v10/gateway/bot",
+                               headers={"Authorization": f"Bot {token}"}) as response:
+            response.raise_for_status()
+            return int((await response.json())["shards"])
+
+
+def read_cluster_status(path: Path = DEFAULT_STATUS_FILE) -> Optional[dict]:
+    """The coordinator's last status file, or None if there isn't one"""
+    try:
+        with open(path, encoding="utf-8") as handle:
+            status = json.load(handle)
+    except (OSError, ValueError):
+        return None
+    status["age_seconds"] = round(time.time() - status.get("written_at", 0), 1)
+    return status
+
+
+class ClusterCoordinator:
+    """Runs and watches one worker process per shard range"""
+
+    def __init__(self, shard_count: int, clusters: int, cwd: Path,
+                 worker_command: Optional[List[str]] = None, status_file: Optional[Path] = None,
+                 stats_interval: float = 10.0, stale_after: Optional[float] = None,
+                 log_dir: Optional[Path] = None, **supervisor_kwargs):
+        self.shard_count = shard_count
+        self.ranges = shard_ranges(shard_count, clusters)
+        self.cwd = cwd
+        self.worker_command = worker_command or [sys.executable, "-u", "discord_bot.py"]
+        self.status_file = status_file
+        self.stats_interval = stats_interval
+        # A running worker that stops reporting is treated as hung and restarted
+        self.stale_after = stale_after if stale_after is not None else stats_interval * 6
+        self.log_dir = log_dir
+        self.supervisor_kwargs = supervisor_kwargs
+        self.workers: List[BotSupervisor] = []
+        self.reports: Dict[int, dict] = {}
+        self.reported_at: Dict[int, float] = {}
+        self.hung_restarts = 0
+        # When each worker was last seen not yet running; staleness counts from there
+        self._running_since: Dict[int, float] = {}
+        self._ready_logged = False
+
+    @classmethod
+    async def from_env(cls, cwd: Path):
+        """Build a coordinator from BOT_CLUSTERS, BOT_SHARD_COUNT and BOT_CLUSTER_* settings"""
+        clusters = int(os.environ.get('BOT_CLUSTERS', '2'))
+        shard_count = int(os.environ.get('BOT_SHARD_COUNT', '0'))
+        if shard_count <= 0:
+            try:
+                shard_count = await recommended_shard_count(os.environ['DISCORD_BOT_TOKEN'])
+                logger.info(f"Discord recommends {shard_count} shard(s)")
+            except Exception as e:
+                shard_count = clusters
+                logger.warning(f"Could not get the recommended shard count ({e!r}); using {shard_count}")
+        return cls(
+            shard_count, clusters, cwd,
+            status_file=Path(os.environ.get('BOT_CLUSTER_STATUS_FILE', str(DEFAULT_STATUS_FILE))),
+            stats_interval=float(os.environ.get('BOT_CLUSTER_STATS_INTERVAL', '10')),
+            log_dir=cwd,
+            stop_timeout=float(os.environ.get('BOT_CLUSTER_STOP_TIMEOUT', '10')),
+        )
+
+    def _on_line(self, cluster_id: int):
+        def handle(line: str) -> bool:
+            report = parse_stats(line)
+            if report is None:
+                return False
+            self.reports[cluster_id] = report
+            self.reported_at[cluster_id] = time.monotonic()
+            return True
+        return handle
+
+    def _worker(self, cluster_id: int, shard_ids: List[int]) -> BotSupervisor:
+        log_file = self.log_dir / f"bot.cluster{cluster_id}.log" if self.log_dir else None
+        return BotSupervisor(
+            self.worker_command, self.cwd,
+            env={
+                "BOT_CLUSTER_ID": str(cluster_id),
+                "BOT_SHARD_IDS": ",".join(map(str, shard_ids)),
+                "BOT_SHARD_COUNT": str(self.shard_count),
+                "BOT_CLUSTER_STATS_INTERVAL": str(self.stats_interval),
+            },
+            on_line=self._on_line(cluster_id),
+            log_file=log_file,
+            **self.supervisor_kwargs
+        )
+
+    async def start(self):
+        logger.info(f"Starting {len(self.ranges)} worker(s) for {self.shard_count} shard(s): {self.ranges}")
+        self.workers = [self._worker(cluster_id, shard_ids) for cluster_id, shard_ids in enumerate(self.ranges)]
+        await asyncio.gather(*(worker.start() for worker in self.workers))
+
+    async def stop(self):
+        await asyncio.gather(*(worker.stop() for worker in self.workers))
+
+    def check_workers(self):
+        """Kill running workers that stopped reporting; their supervisor restarts them"""
+        now = time.monotonic()
+        for cluster_id, worker in enumerate(self.workers):
+            if worker.state != RUNNING or worker.process is None:
+                self._running_since[cluster_id] = now
+                continue
+            last = max(self.reported_at.get(cluster_id, 0.0), self._running_since.get(cluster_id, now))
+            if now - last > self.stale_after:
+                logger.warning(f"Worker {cluster_id} sent no stats for {now - last:.0f}s; restarting it")
+                self.hung_restarts += 1
+                self.reports.pop(cluster_id, None)
+                worker.process.kill()
+
+        if not self._ready_logged and self.workers and all(w.state in (READY, RUNNING) for w in self.workers):
+            self._ready_logged = True
+            logger.info(f"{CLUSTER_READY_MARKER}: {len(self.workers)} worker(s) connected")
+
+    def status(self) -> dict:
+        now = time.monotonic()
+        clusters = []
+        for cluster_id, worker in enumerate(self.workers):
+            report = self.reports.get(cluster_id)
+            supervisor = worker.status()
+            clusters.append({
+                "cluster_id": cluster_id,
+                "shard_ids": self.ranges[cluster_id],
+                "status": supervisor["status"],
+                "pid": supervisor["pid"],
+                "restarts": supervisor["restarts"],
+                "last_exit_code": supervisor["last_exit_code"],
+                "last_report_age": round(now - self.reported_at[cluster_id], 1)
+                if cluster_id in self.reported_at else None,
+                "events_per_second": report["events_per_second"] if report else None,
+                "shards": report["shards"] if report else [],
+            })
+        shards = [shard for cluster in clusters for shard in cluster["shards"]]
+        latencies = [shard["latency_ms"] for shard in shards if shard["latency_ms"] is not None]
+        return {
+            "shard_count": self.shard_count,
+            "cluster_count": len(self.workers),
+            "ready_clusters": sum(1 for worker in self.workers if worker.state in (READY, RUNNING)),
+            "guilds": sum(shard["guilds"] for shard in shards),
+            "events_per_second": round(sum(c["events_per_second"] or 0 for c in clusters), 2),
+            "messages_per_second": round(sum(shard["messages_per_second"] for shard in shards), 2),
+            "max_latency_ms": max(latencies) if latencies else None,
+            "hung_restarts": self.hung_restarts,
+            "clusters": clusters,
+            "written_at": time.time(),
+            "updated_at": datetime.utcnow().isoformat(),
+        }
+
+    def write_status(self):
+        if self.status_file is None:
+            return
+        temporary = Path(f"{self.status_file}.tmp")
+        try:
+            temporary.write_text(json.dumps(self.status()), encoding="utf-8")
+            os.replace(temporary, self.status_file)
+        except OSError as e:
+            logger.warning(f"Could not write cluster status: {e}")
+
+    async def run(self, stop_event: asyncio.Event):
+        """Start the workers, then watch them until stop_event is set"""
+        await self.start()
+        try:
+            while not stop_event.is_set():
+                self.check_workers()
+                self.write_status()
+                try:
+                    await asyncio.wait_for(stop_event.wait(), timeout=min(self.stats_interval, 1.0))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            logger.info("🛑 Stopping cluster workers...")
+            await self.stop()
+            self.write_status()
+
+
+async def _main():
+    from dotenv import load_dotenv
+
+    cwd = Path(__file__).parent
+    load_dotenv(cwd / '.env')
+    coordinator = await ClusterCoordinator.from_env(cwd)
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop_event.set)
+    await coordinator.run(stop_event)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[logging.StreamHandler(sys.stdout)]
+    )
+    asyncio.run(_main())
@@ -0,0 +1,280 @@
+"""
+Bot instrumentation
+Times every slash command and event handler and splits each call into Discord
+API, MongoDB and local compute time: a ContextVar carries the call's timing
+into the Discord HTTP clients and (through Motor's executor, which copies the
+context) into a pymongo command listener. A drift probe measures event-loop
+lag. Counting individual slow callbacks means wrapping asyncio's private
+Handle._run for every callback in the process, so it is opt-in
+(slow_callback_ms > 0); otherwise run with PYTHONASYNCIODEBUG=1 and asyncio
+logs callbacks slower than loop.slow_callback_duration itself. Both measures
+see the whole event loop, including the API's callbacks when the bot runs
+in-process, so their metric names say event_loop rather than discord_bot.
+Everything is exported in Prometheus format.
+"""
+
+import asyncio
+import functools
+import logging
+import time
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, Optional
+
+from pymongo import monitoring
+
+from db_metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+# Gateway event handlers that fire for every event and would only add overhead
+UNTIMED_EVENTS = frozenset({"on_socket_event_type", "on_socket_raw_receive", "on_socket_raw_send"})
+
+
+class CallTiming:
+    """Time a single command or event spent awaiting Discord and MongoDB"""
+
+    __slots__ = ("api_ms", "db_ms")
+
+    def __init__(self):
+        self.api_ms = 0.0
+        self.db_ms = 0.0
+
+
+current_call: ContextVar[Optional[CallTiming]] = ContextVar("current_call", default=None)
+
+
+class MongoCallListener(monitoring.CommandListener):
+    """Adds each MongoDB command's duration to the calling command's timing"""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        timing = current_call.get()
+        if timing is not None:
+            timing.db_ms += event.duration_micros / 1000
+
+    def failed(self, event):
+        self.succeeded(event)
+
+
+def _timed_request(request):
+    @functools.wraps(request)
+    async def wrapper(*args, **kwargs):
+        timing = current_call.get()
+        if timing is None:
+            return await request(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return await request(*args, **kwargs)
+        finally:
+            timing.api_ms += (time.perf_counter() - started) * 1000
+    wrapper.__bot_metrics__ = True
+    return wrapper
+
+
+def instrument_discord_http():
+    """Time REST calls (bot.http) and interaction responses/followups (webhook adapter)"""
+    from discord.http import HTTPClient
+    from discord.webhook.async_ import AsyncWebhookAdapter
+
+    for cls in (HTTPClient, AsyncWebhookAdapter):
+        if not getattr(cls.request, "__bot_metrics__", False):
+            cls.request = _timed_request(cls.request)
+
+
+class CallStats:
+    """Latency histograms for one command or event"""
+
+    __slots__ = ("total", "api", "db", "compute", "errors")
+
+    def __init__(self):
+        self.total = Histogram()
+        self.api = Histogram()
+        self.db = Histogram()
+        self.compute = Histogram()
+        self.errors = 0
+
+    def observe(self, total_ms: float, timing: CallTiming, failed: bool):
+        self.total.observe(total_ms)
+        self.api.observe(timing.api_ms)
+        self.db.observe(timing.db_ms)
+        # Concurrent awaits can overlap, so the split may exceed the wall time
+        self.compute.observe(max(0.0, total_ms - timing.api_ms - timing.db_ms))
+        if failed:
+            self.errors += 1
+
+
+class BotMetrics:
+    """Per-command and per-event latency plus event-loop health"""
+
+    def __init__(self, slow_callback_ms: float = 0.0, const_labels: Optional[Dict[str, str]] = None):
+        self.slow_callback_ms = slow_callback_ms
+        self.const_labels = const_labels or {}
+        self.commands: Dict[str, CallStats] = {}
+        self.events: Dict[str, CallStats] = {}
+        self.loop_lag = Histogram()
+        self.last_lag_ms = 0.0
+        self.slow_callbacks = 0
+        self.slowest_callback_ms = 0.0
+        self._probe: Optional[asyncio.Task] = None
+
+    def _stats(self, table: Dict[str, CallStats], name: str) -> CallStats:
+        stats = table.get(name)
+        if stats is None:
+            stats = table[name] = CallStats()
+        return stats
+
+    def wrap(self, kind: str, name: str, func):
+        """Coroutine function timing `func` as a command or event called `name`"""
+        table = self.commands if kind == "command" else self.events
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            timing = CallTiming()
+            token = current_call.set(timing)
+            started = time.perf_counter()
+            failed = False
+            try:
+                return await func(*args, **kwargs)
+            except BaseException:
+                failed = True
+                raise
+            finally:
+                current_call.reset(token)
+                self._stats(table, name).observe((time.perf_counter() - started) * 1000, timing, failed)
+        wrapper.__bot_metrics__ = True
+        return wrapper
+
+    def instrument(self, bot):
+        """Wrap every app command callback and every event handler registered on `bot`"""
+        instrument_discord_http()
+        commands = 0
+        for command in bot.tree.walk_commands():
+            callback = getattr(command, "_callback", None)
+            if callback is not None and not getattr(callback, "__bot_metrics__", False):
+                command._callback = self.wrap("command", command.qualified_name, callback)
+                commands += 1
+        events = 0
+        for attribute, handler in list(vars(bot).items()):
+            if (attribute.startswith("on_") and attribute not in UNTIMED_EVENTS
+                    and asyncio.iscoroutinefunction(handler) and not getattr(handler, "__bot_metrics__", False)):
+                setattr(bot, attribute, self.wrap("event", attribute[3:], handler))
+                events += 1
+        logger.info(f"📈 Instrumented {commands} command(s) and {events} event handler(s)")
+
+    # Event loop health
+
+    async def lag_probe(self, interval: float = 0.5):
+        """Sleep `interval` repeatedly; oversleeping is time the loop was busy"""
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(interval)
+            self.last_lag_ms = max(0.0, (loop.time() - started - interval) * 1000)
+            self.loop_lag.observe(self.last_lag_ms)
+
+    def slow_callback(self, elapsed_ms: float, handle):
+        self.slow_callbacks += 1
+        self.slowest_callback_ms = max(self.slowest_callback_ms, elapsed_ms)
+        logger.warning(f"🐢 Event loop blocked for {elapsed_ms:.0f}ms by {handle!r}"[:500])
+
+    def start(self, probe_interval: float = 0.5):
+        """Start the lag probe and slow-callback watch on the running loop"""
+        if self._probe is None or self._probe.done():
+            self._probe = asyncio.create_task(self.lag_probe(probe_interval))
+        if self.slow_callback_ms > 0:
+            watch_slow_callbacks(self)
+
+    def stop(self):
+        if self._probe is not None:
+            self._probe.cancel()
+            self._probe = None
+        if _slow_callback_watcher["metrics"] is self:
+            _slow_callback_watcher["metrics"] = None
+
+    # Export
+
+    def snapshot(self) -> dict:
+        return {
+            "loop_lag_ms": round(self.last_lag_ms, 2),
+            "loop_lag_p99_ms": self.loop_lag.percentile(0.99),
+            "slow_callbacks": self.slow_callbacks,
+            "slowest_callback_ms": round(self.slowest_callback_ms, 2),
+            "commands": {name: stats.total.summary()["p95_ms"] for name, stats in sorted(self.commands.items())},
+        }
+
+    def collect(self, exposition):
+        """Add these metrics to a prometheus.Exposition"""
+        for kind, table in (("command", self.commands), ("event", self.events)):
+            for name, stats in sorted(table.items()):
+                for part in ("total", "api", "db", "compute"):
+                    exposition.histogram(
+                        f"discord_bot_{kind}_duration_seconds",
+                        f"Discord bot {kind} latency, split into total, Discord API, database and compute time",
+                        getattr(stats, part), {kind: name, "part": part}
+                    )
+                exposition.counter(f"discord_bot_{kind}_errors_total", f"Discord bot {kind}s that raised",
+                                   stats.errors, {kind: name})
+        # Process-wide: everything sharing the bot's event loop
+        exposition.histogram("event_loop_lag_seconds", "Event loop drift measured by a sleep probe",
+                             self.loop_lag)
+        exposition.gauge("event_loop_lag_last_seconds", "Most recent event loop drift",
+                         round(self.last_lag_ms / 1000, 6))
+        if self.slow_callback_ms > 0:
+            exposition.counter("event_loop_slow_callbacks_total",
+                               f"Callbacks on the event loop (any code in the process) that ran longer than {self.slow_callback_ms:g}ms",
+                               self.slow_callbacks)
+
+    def render(self) -> str:
+        from prometheus import Exposition
+
+        exposition = Exposition(self.const_labels)
+        self.collect(exposition)
+        return exposition.render()
+
+    def write_textfile(self, path: Path):
+        """Dump the metrics for a /metrics endpoint in another process"""
+        temporary = Path(f"{path}.tmp")
+        try:
+            temporary.write_text(self.render(), encoding="utf-8")
+            temporary.replace(path)
+        except OSError as e:
+            logger.warning(f"Could not write bot metrics: {e}")
+
+
+# asyncio runs every callback and task step through Handle._run; time them once per process
+_slow_callback_watcher: Dict[str, Optional[BotMetrics]] = {"metrics": None}
+
+
+def watch_slow_callbacks(metrics: BotMetrics):
+    _slow_callback_watcher["metrics"] = metrics
+    if getattr(asyncio.events.Handle._run, "__bot_metrics__", False):
+        return
+    original = asyncio.events.Handle._run
+
+    def _run(handle):
+        started = time.perf_counter()
+        original(handle)
+        watcher = _slow_callback_watcher["metrics"]
+        if watcher is not None:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if elapsed_ms >= watcher.slow_callback_ms:
+                watcher.slow_callback(elapsed_ms, handle)
+
+    _run.__bot_metrics__ = True
+    asyncio.events.Handle._run = _run
+
+
+def read_textfiles(directory: Path, max_age: float = 300.0) -> list:
+    """Recent bot_metrics*.prom dumps written by bot processes in `directory`"""
+    texts = []
+    now = time.time()
+    for path in sorted(directory.glob("bot_metrics*.prom")):
+        try:
+            if now - path.stat().st_mtime <= max_age:
+                texts.append(path.read_text(encoding="utf-8"))
+        except OSError:
+            continue
+    return texts
@@ -0,0 +1,380 @@
+"""
+Asyncio-native supervisors for the Discord bot
+BotSupervisor runs it as a child process, draining output continuously;
+BotTaskSupervisor runs it as a task on the current event loop. Both stop it
+without blocking the loop and restart it with exponential backoff after crashes.
+
+States: stopped -> starting -> ready -> running -> (crashed -> starting ...) / stopping -> stopped
+"""
+
+import asyncio
+import logging
+import os
+import sys
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Logged by discord_bot.on_ready once the gateway is connected and commands are synced
+READY_MARKER = "Bot is ready"
+
+STOPPED = "stopped"
+STARTING = "starting"
+READY = "ready"
+RUNNING = "running"
+CRASHED = "crashed"
+STOPPING = "stopping"
+
+
+class BotSupervisor:
+    """Runs one child process and keeps it alive"""
+
+    def __init__(self, command: List[str], cwd: Path, output_lines: int = 1000,
+                 stop_timeout: float = 5.0, backoff_initial: float = 1.0, backoff_max: float = 60.0,
+                 stable_after: float = 30.0, max_restarts: Optional[int] = None,
+                 ready_marker: str = READY_MARKER, log_file: Optional[Path] = None,
+                 log_max_bytes: int = 10 * 1024 * 1024, env: Optional[Dict[str, str]] = None,
+                 on_line: Optional[Callable[[str], bool]] = None):
+        self.command = command
+        self.cwd = cwd
+        # Extra environment for the child, on top of ours
+        self.env = env
+        # Sees every output line first; returning True keeps it out of output and the log
+        self.on_line = on_line
+        self.stop_timeout = stop_timeout
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.stable_after = stable_after
+        self.max_restarts = max_restarts
+        self.ready_marker = ready_marker
+        self.log_file = log_file
+        self.log_max_bytes = log_max_bytes
+        self._log_handle = None
+
+        self.output = deque(maxlen=output_lines)
+        self.state = STOPPED
+        self.history = deque(maxlen=20)
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.started_at: Optional[str] = None
+        self.last_exit_code: Optional[int] = None
+        self.restarts = 0
+        self.next_restart_at: Optional[float] = None
+
+        self._consecutive_crashes = 0
+        self._lock = asyncio.Lock()
+        self._ready = asyncio.Event()
+        self._monitor_task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    @classmethod
+    def for_discord_bot(cls, cwd: Path, **kwargs):
+        """Supervisor for `python -u discord_bot.py` (unbuffered so lines arrive promptly)"""
+        return cls([sys.executable, "-u", "discord_bot.py"], cwd, **kwargs)
+
+    def _set_state(self, state: str):
+        if state != self.state:
+            self.state = state
+            self.history.append({"state": state, "at": datetime.utcnow().isoformat()})
+            logger.info(f"Bot process state: {state}")
+            if state == READY:
+                self._ready.set()
+            elif state != RUNNING:
+                self._ready.clear()
+
+    async def start(self) -> bool:
+        """Spawn the child and its monitor; returns False if already supervised"""
+        async with self._lock:
+            if self._monitor_task is not None and not self._monitor_task.done():
+                return False
+            self._stopping = False
+            self._consecutive_crashes = 0
+            await self._spawn()
+            self._monitor_task = asyncio.create_task(self._monitor())
+            return True
+
+    async def _spawn(self):
+        self._set_state(STARTING)
+        self.process = await asyncio.create_subprocess_exec(
+            *self.command,
+            cwd=str(self.cwd),
+            env={**os.environ, **self.env} if self.env else None,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT
+        )
+        self.started_at = datetime.utcnow().isoformat()
+        self.next_restart_at = None
+
+    def _write_log(self, line: str):
+        """Append a line to log_file, rotating to log_file.1 when it grows too large"""
+        if self.log_file is None:
+            return
+        try:
+            if self._log_handle is None:
+                self._log_handle = open(self.log_file, "a", encoding="utf-8")
+            self._log_handle.write(line + "\n")
+            self._log_handle.flush()
+            if self._log_handle.tell() >= self.log_max_bytes:
+                self._log_handle.close()
+                self._log_handle = None
+                Path(self.log_file).replace(Path(f"{self.log_file}.1"))
+        except OSError as e:
+            logger.warning(f"Could not write bot log: {e}")
+
+    async def _drain(self, process: asyncio.subprocess.Process):
+        """Read child output line by line so its pipe never fills up"""
+        while True:
+            try:
+                raw = await process.stdout.readline()
+            except ValueError:
+                # Line longer than the stream limit; keep the pipe moving with raw chunks
+                raw = await process.stdout.read(64 * 1024)
+            if not raw:
+                break
+            line = raw.decode("utf-8", errors="replace").rstrip("\n")
+            if self.on_line is not None and self.on_line(line):
+                continue
+            self.output.append(line)
+            self._write_log(line)
+            if self.state == STARTING and self.ready_marker in line:
+                self._set_state(READY)
+
+    async def _promote_when_stable(self):
+        """Promote to running once the child has stayed ready for stable_after seconds"""
+        await self._ready.wait()
+        await asyncio.sleep(self.stable_after)
+        if self.state == READY:
+            self._set_state(RUNNING)
+            self._consecutive_crashes = 0
+
+    async def _monitor(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            process = self.process
+            drain = asyncio.create_task(self._drain(process))
+            stable = asyncio.create_task(self._promote_when_stable())
+            self.last_exit_code = await process.wait()
+            await drain
+            stable.cancel()
+
+            if self._stopping:
+                break
+
+            self._set_state(CRASHED)
+            logger.error(f"Bot process exited with code {self.last_exit_code}")
+            if self.max_restarts is not None and self.restarts >= self.max_restarts:
+                logger.error(f"Bot crashed {self.restarts} time(s); giving up")
+                break
+
+            delay = min(self.backoff_initial * (2 ** self._consecutive_crashes), self.backoff_max)
+            self._consecutive_crashes += 1
+            self.next_restart_at = loop.time() + delay
+            logger.info(f"Restarting bot in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            if self._stopping:
+                break
+            self.restarts += 1
+            try:
+                await self._spawn()
+            except Exception as e:
+                logger.error(f"Failed to respawn bot: {e}")
+                break
+
+        self.process = None
+
+    async def stop(self) -> bool:
+        """Terminate gracefully, kill after stop_timeout; never blocks the loop"""
+        async with self._lock:
+            if self._monitor_task is None:
+                return False
+            self._stopping = True
+            process = self.process
+            if process is not None and process.returncode is None:
+                self._set_state(STOPPING)
+                process.terminate()
+                try:
+                    await asyncio.wait_for(process.wait(), timeout=self.stop_timeout)
+                except asyncio.TimeoutError:
+                    logger.warning("Bot did not exit after SIGTERM; killing it")
+                    process.kill()
+                    await process.wait()
+
+            monitor, self._monitor_task = self._monitor_task, None
+            if not monitor.done():
+                monitor.cancel()
+            try:
+                await monitor
+            except asyncio.CancelledError:
+                pass
+            # A respawn may have been in flight when the monitor was cancelled
+            if self.process is not None and self.process.returncode is None:
+                self.process.kill()
+                await self.process.wait()
+            self.process = None
+            self.started_at = None
+            if self._log_handle is not None:
+                self._log_handle.close()
+                self._log_handle = None
+            self._set_state(STOPPED)
+            return True
+
+    def recent_output(self, lines: int = 50) -> List[str]:
+        return list(self.output)[-lines:]
+
+    def status(self) -> dict:
+        next_restart_in = None
+        if self.state == CRASHED and self.next_restart_at is not None:
+            next_restart_in = max(0.0, round(self.next_restart_at - asyncio.get_running_loop().time(), 1))
+        return {
+            "status": self.state,
+            "pid": self.process.pid if self.process and self.process.returncode is None else None,
+            "started_at": self.started_at,
+            "restarts": self.restarts,
+            "last_exit_code": self.last_exit_code,
+            "next_restart_in": next_restart_in,
+            "transitions": list(self.history)
+        }
+
+
+class _OutputHandler(logging.Handler):
+    """Feeds log records into a supervisor's output ring and log file"""
+
+    def __init__(self, supervisor: "BotTaskSupervisor"):
+        super().__init__()
+        self.supervisor = supervisor
+        self._emitting = False
+        self.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+
+    def emit(self, record):
+        # _write_log logs its own failures; don't feed those back into the file
+        if self._emitting:
+            return
+        self._emitting = True
+        try:
+            line = self.format(record)
+            self.supervisor.output.append(line)
+            self.supervisor._write_log(line)
+        except Exception:
+            pass
+        finally:
+            self._emitting = False
+
+
+class BotTaskSupervisor(BotSupervisor):
+    """Runs the bot coroutine as a task on the running loop and keeps it alive
+
+    `run` starts the bot and returns (or raises) when it stops; `shutdown`
+    asks it to stop gracefully; `ready_check` reports when it is connected.
+    Records from the bot's own `loggers` are captured in place of child
+    output; the API's logs on the same loop stay out of them.
+    """
+
+    def __init__(self, run: Callable[[], Awaitable], shutdown: Callable[[], Awaitable],
+                 ready_check: Callable[[], bool], loggers: Iterable[str] = ("discord", "discord_bot"), **kwargs):
+        super().__init__([], Path("."), **kwargs)
+        self.run = run
+        self.shutdown = shutdown
+        self.ready_check = ready_check
+        self.loggers = tuple(loggers)
+        self.last_error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self._handler = _OutputHandler(self)
+
+    async def start(self) -> bool:
+        async with self._lock:
+            if self._monitor_task is not None and not self._monitor_task.done():
+                return False
+            self._stopping = False
+            self._consecutive_crashes = 0
+            for name in self.loggers:
+                logging.getLogger(name).addHandler(self._handler)
+            self._monitor_task = asyncio.create_task(self._monitor())
+            return True
+
+    async def _watch_ready(self):
+        while self.state == STARTING:
+            if self.ready_check():
+                self._set_state(READY)
+                await self._promote_when_stable()
+                return
+            await asyncio.sleep(0.25)
+
+    async def _monitor(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            self._set_state(STARTING)
+            self.started_at = datetime.utcnow().isoformat()
+            self.next_restart_at = None
+            self._task = asyncio.create_task(self.run())
+            watcher = asyncio.create_task(self._watch_ready())
+            try:
+                await self._task
+                self.last_error = None
+                self.last_exit_code = 0
+            except asyncio.CancelledError:
+                if not self._task.done():
+                    raise
+                self.last_exit_code = None
+            except Exception as e:
+                self.last_error = repr(e)
+                self.last_exit_code = 1
+            finally:
+                watcher.cancel()
+
+            if self._stopping:
+                break
+
+            self._set_state(CRASHED)
+            logger.error(f"Bot task stopped unexpectedly: {self.last_error or 'exited'}")
+            if self.max_restarts is not None and self.restarts >= self.max_restarts:
+                logger.error(f"Bot crashed {self.restarts} time(s); giving up")
+                break
+
+            delay = min(self.backoff_initial * (2 ** self._consecutive_crashes), self.backoff_max)
+            self._consecutive_crashes += 1
+            self.next_restart_at = loop.time() + delay
+            logger.info(f"Restarting bot in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            if self._stopping:
+                break
+            self.restarts += 1
+
+    async def stop(self) -> bool:
+        async with self._lock:
+            if self._monitor_task is None:
+                return False
+            self._stopping = True
+            task = self._task
+            if task is not None and not task.done():
+                self._set_state(STOPPING)
+                try:
+                    await asyncio.wait_for(self.shutdown(), timeout=self.stop_timeout)
+                    await asyncio.wait_for(asyncio.shield(task), timeout=self.stop_timeout)
+                except (asyncio.TimeoutError, Exception) as e:
+                    logger.warning(f"Bot did not shut down cleanly ({e!r}); cancelling it")
+                    task.cancel()
+                    await asyncio.gather(task, return_exceptions=True)
+
+            monitor, self._monitor_task = self._monitor_task, None
+            if not monitor.done():
+                monitor.cancel()
+            await asyncio.gather(monitor, return_exceptions=True)
+            self._task = None
+            self.started_at = None
+            for name in self.loggers:
+                logging.getLogger(name).removeHandler(self._handler)
+            if self._log_handle is not None:
+                self._log_handle.close()
+                self._log_handle = None
+            self._set_state(STOPPED)
+            return True
+
+    def status(self) -> dict:
+        status = super().status()
+        running = self._task is not None and not self._task.done()
+        status["pid"] = os.getpid() if running else None
+        status["runtime"] = "in-process"
+        status["last_error"] = self.last_error
+        return status
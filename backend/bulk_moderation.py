@@ -0,0 +1,139 @@
+"""
+Bulk moderation runner
+Applies one action to many members through a bounded worker pool that backs
+off on rate limits, collecting audit records for a single insert_many.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def build_action_record(action_type: str, target_user_id: int, moderator_id: int, guild_id: int,
+                        reason: str, duration: Optional[int] = None) -> dict:
+    """moderation_logs document for one action"""
+    return {
+        "id": str(uuid.uuid4()),
+        "action_type": action_type,
+        "target_user_id": target_user_id,
+        "moderator_id": moderator_id,
+        "guild_id": guild_id,
+        "reason": reason,
+        "duration": duration,
+        "timestamp": datetime.utcnow()
+    }
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Seconds to wait when `error` is a rate limit, else None
+
+    discord.py already sleeps on 429s; this covers the cases it gives up on
+    (discord.RateLimited, or an HTTPException after its own retries).
+    """
+    value = getattr(error, "retry_after", None)
+    if isinstance(value, (int, float)):
+        return float(value)
+    if getattr(error, "status", None) != 429:
+        return None
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    for header in ("Retry-After", "X-RateLimit-Reset-After"):
+        try:
+            return float(headers[header])
+        except (KeyError, TypeError, ValueError):
+            continue
+    return 1.0
+
+
+class BulkResult:
+    """Outcome of a bulk run"""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.succeeded: List[int] = []
+        self.failed: Dict[int, str] = {}
+        self.rate_limited = 0
+
+    @property
+    def done(self) -> int:
+        return len(self.succeeded) + len(self.failed)
+
+
+class BulkRunner:
+    """Runs `action(target)` for every target with at most `concurrency` in flight"""
+
+    def __init__(self, action: Callable[[object], Awaitable[None]], concurrency: int = 5,
+                 max_retries: int = 3, progress_interval: float = 2.0,
+                 on_progress: Optional[Callable[[BulkResult], Awaitable[None]]] = None):
+        self.action = action
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self.progress_interval = progress_interval
+        self.on_progress = on_progress
+        # Shared pause so one rate limit holds back every worker, not just the one that hit it
+        self._resume_at = 0.0
+        self._last_progress = 0.0
+
+    async def _wait_for_rate_limit(self):
+        delay = self._resume_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def _run_one(self, target, result: BulkResult):
+        attempt = 0
+        while True:
+            await self._wait_for_rate_limit()
+            try:
+                await self.action(target)
+                result.succeeded.append(target.id)
+                return
+            except Exception as e:
+                delay = retry_after(e)
+                if delay is None or attempt >= self.max_retries:
+                    result.failed[target.id] = str(e) or type(e).__name__
+                    return
+                attempt += 1
+                result.rate_limited += 1
+                self._resume_at = max(self._resume_at, time.monotonic() + delay)
+                logger.warning(f"Bulk moderation rate limited; pausing {delay:.1f}s")
+
+    async def _report(self, result: BulkResult, force: bool = False):
+        if self.on_progress is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_progress < self.progress_interval:
+            return
+        self._last_progress = now
+        try:
+            await self.on_progress(result)
+        except Exception as e:
+            logger.warning(f"Bulk moderation progress update failed: {e}")
+
+    async def _worker(self, queue: asyncio.Queue, result: BulkResult):
+        while True:
+            try:
+                target = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            await self._run_one(target, result)
+            await self._report(result)
+
+    async def run(self, targets: Iterable) -> BulkResult:
+        queue = asyncio.Queue()
+        for target in targets:
+            queue.put_nowait(target)
+        result = BulkResult(queue.qsize())
+
+        workers = [asyncio.create_task(self._worker(queue, result))
+                   for _ in range(min(self.concurrency, result.total))]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+        await self._report(result, force=True)
+        return result
@@ -0,0 +1,102 @@
+"""
+Slash-command sync cache
+Fingerprints the serialized command tree per scope (global or one guild) and
+only calls tree.sync for scopes whose fingerprint changed since the last
+successful sync. Needed syncs run concurrently with a bound.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+COMMAND_SYNC_COLLECTION = "command_sync_state"
+
+
+def fingerprint(payload: list) -> str:
+    """Stable hash of serialized command definitions"""
+    encoded = json.dumps(
+        sorted(payload, key=lambda command: (command.get("type", 1), command["name"])),
+        sort_keys=True, ensure_ascii=False, default=str
+    )
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class CommandSyncer:
+    """Syncs an app_commands.CommandTree only where its definitions changed"""
+
+    def __init__(self, tree, collection, concurrency: int = 4, force: bool = False):
+        self.tree = tree
+        self.collection = collection
+        self.concurrency = max(1, concurrency)
+        self.force = force
+        self.last_run: dict = {}
+
+    @classmethod
+    def from_env(cls, tree, collection):
+        """Build a syncer configured from COMMAND_SYNC_* environment variables"""
+        return cls(
+            tree, collection,
+            concurrency=int(os.environ.get('COMMAND_SYNC_CONCURRENCY', '4')),
+            force=os.environ.get('COMMAND_SYNC_FORCE', 'false').lower() == 'true',
+        )
+
+    def _scope_id(self, guild) -> str:
+        application_id = self.tree.client.application_id
+        return f"{application_id}:global" if guild is None else f"{application_id}:guild:{guild.id}"
+
+    def _fingerprint(self, guild) -> str:
+        return fingerprint([command.to_dict() for command in self.tree.get_commands(guild=guild)])
+
+    async def _sync_scope(self, guild, digest: str, semaphore: asyncio.Semaphore) -> Optional[int]:
+        name = "global" if guild is None else guild.name
+        async with semaphore:
+            try:
+                synced = await self.tree.sync(guild=guild)
+            except Exception as e:
+                logger.error(f'Failed to sync commands for {name}: {e}')
+                return None
+        await self.collection.update_one(
+            {"_id": self._scope_id(guild)},
+            {"$set": {"hash": digest, "synced_at": datetime.utcnow(), "commands": len(synced)}},
+            upsert=True
+        )
+        logger.info(f'Synced {len(synced)} command(s) for {name}')
+        return len(synced)
+
+    async def sync(self, guilds: Iterable = (), include_global: bool = True) -> dict:
+        """Sync the global scope and each guild whose command fingerprint changed"""
+        started = time.perf_counter()
+        scopes = [None, *guilds] if include_global else list(guilds)
+        digests = {self._scope_id(guild): self._fingerprint(guild) for guild in scopes}
+
+        stored = {}
+        if not self.force:
+            try:
+                docs = await self.collection.find({"_id": {"$in": list(digests)}}, {"hash": 1}).to_list(length=None)
+                stored = {doc["_id"]: doc.get("hash") for doc in docs}
+            except Exception as e:
+                logger.error(f"Could not read command sync state; syncing everything: {e}")
+
+        pending = [guild for guild in scopes if stored.get(self._scope_id(guild)) != digests[self._scope_id(guild)]]
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results = await asyncio.gather(
+            *(self._sync_scope(guild, digests[self._scope_id(guild)], semaphore) for guild in pending)
+        )
+
+        failed = sum(1 for result in results if result is None)
+        self.last_run = {
+            "scopes": len(scopes),
+            "synced": len(pending) - failed,
+            "skipped": len(scopes) - len(pending),
+            "failed": failed,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+        }
+        logger.info(f"Command sync: {self.last_run}")
+        return self.last_run
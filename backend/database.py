@@ -0,0 +1,56 @@
+"""
+Shared MongoDB client
+One Motor client (and so one connection pool) per process, used by both the
+API and the Discord bot. Pool size, timeouts and wire compression come from
+MONGO_* environment variables, and a MongoMetrics listener records command
+latencies and pool checkout waits for /api/health and /metrics.
+"""
+
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from bot_metrics import MongoCallListener
+from db_metrics import MongoMetrics
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+
+def client_options() -> dict:
+    """Motor client keyword arguments from MONGO_* environment variables"""
+    options = {
+        "maxPoolSize": int(os.environ.get('MONGO_MAX_POOL_SIZE', '50')),
+        "minPoolSize": int(os.environ.get('MONGO_MIN_POOL_SIZE', '2')),
+        "maxIdleTimeMS": int(os.environ.get('MONGO_MAX_IDLE_TIME_MS', '300000')),
+        "serverSelectionTimeoutMS": int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000')),
+        "connectTimeoutMS": int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', '10000')),
+        "retryWrites": os.environ.get('MONGO_RETRY_WRITES', 'true').lower() == 'true',
+    }
+    wait_queue_timeout = os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS')
+    if wait_queue_timeout:
+        # Fail fast instead of queueing forever when the pool is exhausted
+        options["waitQueueTimeoutMS"] = int(wait_queue_timeout)
+    # e.g. "zstd,snappy,zlib"; pymongo drops (with a warning) any without its library installed
+    compressors = os.environ.get('MONGO_COMPRESSORS', '')
+    if compressors:
+        options["compressors"] = compressors
+        if 'zlib' in compressors:
+            options["zlibCompressionLevel"] = int(os.environ.get('MONGO_ZLIB_LEVEL', '6'))
+    return options
+
+
+def create_client(metrics: MongoMetrics = None) -> AsyncIOMotorClient:
+    options = client_options()
+    if metrics is not None:
+        # MongoCallListener attributes each command's time to the bot command awaiting it
+        options["event_listeners"] = [metrics, MongoCallListener()]
+    return AsyncIOMotorClient(os.environ['MONGO_URL'], **options)
+
+
+metrics = MongoMetrics(slow_ms=float(os.environ.get('MONGO_SLOW_MS', '100')))
+client = create_client(metrics)
+db = client[os.environ['DB_NAME']]
+
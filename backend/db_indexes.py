@@ -0,0 +1,171 @@
+"""
+Index bootstrap and index diagnostics
+Creates the compound indexes the hot queries rely on and reports index usage
+"""
+
+import logging
+from datetime import datetime
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+from activity_rollups import ROLLUP_COLLECTION
+from member_events import MEMBER_EVENTS_COLLECTION
+from violation_counters import VIOLATION_COUNTERS_COLLECTION
+from violation_scores import VIOLATION_SCORES_COLLECTION
+
+logger = logging.getLogger(__name__)
+
+# Indexes per collection; equality fields first, then the timestamp range/sort
+INDEX_SPECS = {
+    "moderation_logs": [
+        # member_violations
+        IndexModel([("guild_id", ASCENDING), ("target_user_id", ASCENDING), ("timestamp", DESCENDING)],
+                   name="guild_target_time"),
+        # per-type report filters
+        IndexModel([("guild_id", ASCENDING), ("action_type", ASCENDING), ("timestamp", DESCENDING)],
+                   name="guild_type_time"),
+        # moderation-logs keyset pages and daily/violations reports
+        IndexModel([("guild_id", ASCENDING), ("timestamp", DESCENDING), ("id", DESCENDING)],
+                   name="guild_time_id"),
+        # unfiltered moderation-logs keyset pages
+        IndexModel([("timestamp", DESCENDING), ("id", DESCENDING)],
+                   name="time_id"),
+    ],
+    "status_checks": [
+        IndexModel([("timestamp", DESCENDING), ("id", DESCENDING)],
+                   name="time_id"),
+    ],
+    "server_activity": [
+        # member_stats message counts
+        IndexModel([("guild_id", ASCENDING), ("user_id", ASCENDING), ("type", ASCENDING), ("timestamp", DESCENDING)],
+                   name="guild_user_type_time"),
+        # single-guild rollup backfill (activity_rollups --guild-id)
+        IndexModel([("guild_id", ASCENDING), ("type", ASCENDING), ("timestamp", DESCENDING)],
+                   name="activity_guild_type_time"),
+        # all-guild rollup backfill and retention compaction, which match on type and time only
+        IndexModel([("type", ASCENDING), ("timestamp", DESCENDING)],
+                   name="activity_type_time"),
+    ],
+    ROLLUP_COLLECTION: [
+        # unique key for the $inc upserts and window aggregations
+        IndexModel([("guild_id", ASCENDING), ("day", ASCENDING), ("user_id", ASCENDING)],
+                   name="guild_day_user", unique=True),
+        IndexModel([("guild_id", ASCENDING), ("user_id", ASCENDING), ("day", ASCENDING)],
+                   name="guild_user_day"),
+    ],
+    MEMBER_EVENTS_COLLECTION: [
+        # growth report windows
+        IndexModel([("guild_id", ASCENDING), ("timestamp", DESCENDING)],
+                   name="guild_time"),
+    ],
+    VIOLATION_COUNTERS_COLLECTION: [
+        # one counter per member; get_user_violations and the $inc upserts
+        IndexModel([("guild_id", ASCENDING), ("user_id", ASCENDING)],
+                   name="guild_user", unique=True),
+    ],
+    VIOLATION_SCORES_COLLECTION: [
+        IndexModel([("guild_id", ASCENDING), ("user_id", ASCENDING)],
+                   name="guild_user", unique=True),
+        # risk top-N: highest rank_key first
+        IndexModel([("guild_id", ASCENDING), ("rank_key", DESCENDING)],
+                   name="guild_rank"),
+    ],
+}
+
+# Index names replaced by a spec above; dropped so the new name can be created on the same keys
+SUPERSEDED_INDEXES = {
+    "server_activity": ["guild_type_time"],
+}
+
+# Representative hot queries: (label, collection, filter, sort)
+QUERY_SHAPES = [
+    ("get_user_violations", VIOLATION_COUNTERS_COLLECTION,
+     {"guild_id": 0, "user_id": 0}, None),
+    ("member_violations", "moderation_logs",
+     {"target_user_id": 0, "guild_id": 0}, [("timestamp", DESCENDING)]),
+    ("moderation_logs page", "moderation_logs",
+     {"guild_id": 0}, [("timestamp", DESCENDING), ("id", DESCENDING)]),
+    ("status page", "status_checks",
+     {}, [("timestamp", DESCENDING), ("id", DESCENDING)]),
+    ("daily report", "moderation_logs",
+     {"guild_id": 0, "timestamp": {"$gte": datetime(1970, 1, 1)}}, None),
+    ("member_stats", "server_activity",
+     {"guild_id": 0, "user_id": 0, "type": "message", "timestamp": {"$gte": datetime(1970, 1, 1)}}, None),
+    ("rollup backfill", "server_activity",
+     {"type": "message", "timestamp": {"$gte": datetime(1970, 1, 1)}}, None),
+    ("activity rollup window", ROLLUP_COLLECTION,
+     {"guild_id": 0, "day": {"$gte": datetime(1970, 1, 1)}}, None),
+    ("risk top-N", VIOLATION_SCORES_COLLECTION,
+     {"guild_id": 0}, [("rank_key", DESCENDING)]),
+    ("growth report", MEMBER_EVENTS_COLLECTION,
+     {"guild_id": 0, "timestamp": {"$gte": datetime(1970, 1, 1)}}, None),
+]
+
+
+async def ensure_indexes(db) -> dict:
+    """Create every index in INDEX_SPECS; existing indexes are left alone"""
+    created = {}
+    for collection_name, models in INDEX_SPECS.items():
+        try:
+            existing = await db[collection_name].index_information()
+            for name in SUPERSEDED_INDEXES.get(collection_name, []):
+                if name in existing:
+                    await db[collection_name].drop_index(name)
+            created[collection_name] = await db[collection_name].create_indexes(models)
+        except Exception as e:
+            logger.error(f"❌ Failed to create indexes on {collection_name}: {e}")
+            created[collection_name] = []
+    logger.info(f"✅ Index bootstrap complete: {created}")
+    return created
+
+
+def _has_collscan(plan) -> bool:
+    if isinstance(plan, dict):
+        if plan.get("stage") == "COLLSCAN":
+            return True
+        return any(_has_collscan(value) for value in plan.values())
+    if isinstance(plan, list):
+        return any(_has_collscan(item) for item in plan)
+    return False
+
+
+async def check_query_plans(db) -> list:
+    """Explain each hot query shape and warn about collection scans"""
+    results = []
+    for label, collection_name, query, sort in QUERY_SHAPES:
+        cursor = db[collection_name].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        try:
+            explain = await cursor.explain()
+        except Exception as e:
+            results.append({"query": label, "collection": collection_name, "error": str(e)})
+            continue
+
+        winning_plan = explain.get("queryPlanner", {}).get("winningPlan", {})
+        collscan = _has_collscan(winning_plan)
+        if collscan:
+            logger.warning(f"⚠️ Query '{label}' on {collection_name} has no usable index (COLLSCAN)")
+        results.append({"query": label, "collection": collection_name, "collscan": collscan})
+    return results
+
+
+async def index_usage(db) -> dict:
+    """Per-collection index access counters from $indexStats"""
+    usage = {}
+    for collection_name in INDEX_SPECS:
+        try:
+            stats = await db[collection_name].aggregate([{"$indexStats": {}}]).to_list(length=None)
+        except Exception as e:
+            usage[collection_name] = {"error": str(e)}
+            continue
+        usage[collection_name] = [
+            {
+                "name": stat["name"],
+                "key": dict(stat["key"]),
+                "ops": stat.get("accesses", {}).get("ops", 0),
+                "since": stat.get("accesses", {}).get("since")
+            }
+            for stat in stats
+        ]
+    return usage
@@ -0,0 +1,224 @@
+"""
+MongoDB driver metrics
+A pymongo command and connection-pool listener that keeps per-(collection,
+operation) latency histograms, connection checkout waits and the most recent
+slow commands. Listener callbacks run on Motor's executor threads, so every
+update is taken under a lock and kept O(1).
+"""
+
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, Optional
+
+from pymongo import monitoring
+
+# Histogram bucket upper bounds in milliseconds; the last bucket is unbounded
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Commands that aren't application queries
+IGNORED_COMMANDS = frozenset({
+    "hello", "ismaster", "isMaster", "saslStart", "saslContinue", "authenticate",
+    "getnonce", "endSessions", "killCursors",
+})
+
+
+class Histogram:
+    """Fixed-bucket latency histogram"""
+
+    __slots__ = ("buckets", "count", "total_ms", "max_ms")
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms: float):
+        index = 0
+        while index < len(BUCKETS_MS) and ms > BUCKETS_MS[index]:
+            index += 1
+        self.buckets[index] += 1
+        self.count += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Upper bound of the bucket holding the given fraction of observations"""
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank:
+                return float(BUCKETS_MS[index]) if index < len(BUCKETS_MS) else round(self.max_ms, 2)
+        return round(self.max_ms, 2)
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 2) if self.count else None,
+            "max_ms": round(self.max_ms, 2),
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "buckets": list(self.buckets),
+        }
+
+
+def command_collection(command_name: str, command: dict) -> str:
+    """Collection a command targets, or "-" for database-level commands"""
+    target = command.get(command_name)
+    if isinstance(target, str):
+        return target
+    # getMore carries the cursor id under its name and the collection separately
+    return command.get("collection") or "-"
+
+
+class MongoMetrics(monitoring.CommandListener, monitoring.ConnectionPoolListener):
+    """Latency and pool metrics, registered on a client through event_listeners"""
+
+    def __init__(self, slow_ms: float = 100.0, slow_samples: int = 20):
+        self.slow_ms = slow_ms
+        self.operations: Dict[tuple, Histogram] = {}
+        self.failures: Dict[tuple, int] = {}
+        self.slow = deque(maxlen=slow_samples)
+        self.slow_count = 0
+        self.checkout_wait = Histogram()
+        self.checkout_failures: Dict[str, int] = {}
+        self.checked_out = 0
+        self.connections_created = 0
+        self.connections_closed = 0
+        self.pool_clears = 0
+        self._pending: Dict[tuple, tuple] = {}
+        self._checkout_started = threading.local()
+        self._lock = threading.Lock()
+
+    # Command monitoring
+
+    def started(self, event):
+        if event.command_name in IGNORED_COMMANDS:
+            return
+        key = (command_collection(event.command_name, event.command), event.command_name)
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = key
+
+    def _finished(self, event, failed: bool):
+        ms = event.duration_micros / 1000
+        with self._lock:
+            key = self._pending.pop((event.connection_id, event.request_id), None)
+            if key is None:
+                return
+            histogram = self.operations.get(key)
+            if histogram is None:
+                histogram = self.operations[key] = Histogram()
+            histogram.observe(ms)
+            if failed:
+                self.failures[key] = self.failures.get(key, 0) + 1
+            if ms >= self.slow_ms:
+                self.slow_count += 1
+                self.slow.append({
+                    "collection": key[0],
+                    "operation": key[1],
+                    "ms": round(ms, 2),
+                    "failed": failed,
+                    "at": datetime.utcnow().isoformat(),
+                })
+
+    def succeeded(self, event):
+        self._finished(event, failed=False)
+
+    def failed(self, event):
+        self._finished(event, failed=True)
+
+    # Connection pool monitoring
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            self.connections_created += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.connections_closed += 1
+
+    def connection_check_out_started(self, event):
+        self._checkout_started.value = time.perf_counter()
+
+    def connection_check_out_failed(self, event):
+        reason = str(event.reason)
+        with self._lock:
+            self.checkout_failures[reason] = self.checkout_failures.get(reason, 0) + 1
+
+    def connection_checked_out(self, event):
+        started = getattr(self._checkout_started, "value", None)
+        self._checkout_started.value = None
+        with self._lock:
+            self.checked_out += 1
+            if started is not None:
+                self.checkout_wait.observe((time.perf_counter() - started) * 1000)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            operations = {}
+            for (collection, operation), histogram in sorted(self.operations.items()):
+                summary = histogram.summary()
+                summary["failures"] = self.failures.get((collection, operation), 0)
+                operations[f"{collection}.{operation}"] = summary
+            return {
+                "buckets_ms": list(BUCKETS_MS),
+                "operations": operations,
+                "pool": {
+                    "checked_out": self.checked_out,
+                    "connections_open": self.connections_created - self.connections_closed,
+                    "connections_created": self.connections_created,
+                    "pool_clears": self.pool_clears,
+                    "checkout_wait": self.checkout_wait.summary(),
+                    "checkout_failures": dict(self.checkout_failures),
+                },
+                "slow_threshold_ms": self.slow_ms,
+                "slow_count": self.slow_count,
+                "recent_slow": list(self.slow),
+            }
+
+    def collect(self, exposition):
+        """Add these metrics to a prometheus.Exposition"""
+        with self._lock:
+            for (collection, operation), histogram in sorted(self.operations.items()):
+                labels = {"collection": collection, "operation": operation}
+                exposition.histogram("mongodb_command_duration_seconds", "MongoDB command round trip time",
+                                     histogram, labels)
+                exposition.counter("mongodb_command_failures_total", "MongoDB commands that failed",
+                                   self.failures.get((collection, operation), 0), labels)
+            exposition.histogram("mongodb_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection",
+                                 self.checkout_wait)
+            exposition.gauge("mongodb_pool_checked_out", "Connections currently checked out", self.checked_out)
+            exposition.gauge("mongodb_pool_connections", "Open pooled connections",
+                             self.connections_created - self.connections_closed)
+            for reason, count in sorted(self.checkout_failures.items()):
+                exposition.counter("mongodb_pool_checkout_failures_total", "Failed connection checkouts",
+                                   count, {"reason": reason})
+            exposition.counter("mongodb_slow_commands_total", f"MongoDB commands slower than {self.slow_ms:g}ms",
+                               self.slow_count)
@@ -3,12 +3,29 @@ from discord.ext import commands
 import asyncio
 import os
 from dotenv import load_dotenv
-from motor.motor_asyncio import AsyncIOMotorClient
 from datetime import datetime, timedelta
 from typing import Optional
 import logging
-import uuid
+import re
+import time
 from pathlib import Path
+from database import client as mongo_client, db
+from activity_buffer import ActivityBuffer
+from activity_rollups import ROLLUP_COLLECTION, day_start, message_count, top_users, window_start
+from db_indexes import ensure_indexes
+from response_cache import CACHE_VERSIONS_COLLECTION, invalidate_guild
+from moderation_analytics import daily_summary, violations_report as build_violations_report
+from presence_index import PresenceIndex
+from bulk_moderation import BulkRunner, build_action_record
+from dm_queue import DMQueue
+from violation_counters import (VIOLATION_COUNTERS_COLLECTION, EscalationPolicy, backfill_counters, get_counter,
+                                increment_counter, increment_counters, warn_count)
+from violation_scores import VIOLATION_SCORES_COLLECTION, ViolationScorer
+from flood_detector import FloodConfig, FloodDetector
+from command_sync import COMMAND_SYNC_COLLECTION, CommandSyncer
+from member_events import JOIN, LEAVE, MEMBER_EVENTS_COLLECTION, growth_report, record_member_event
+from bot_cluster import ShardStats, format_stats, parse_shard_ids
+from bot_metrics import BotMetrics
 
 # Load environment variables
 ROOT_DIR = Path(__file__).parent
@@ -18,10 +35,8 @@ load_dotenv(ROOT_DIR / '.env')
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-mongo_client = AsyncIOMotorClient(mongo_url)
-db = mongo_client[os.environ['DB_NAME']]
+# Write-behind buffer for message activity (flushed in batches)
+activity_buffer = ActivityBuffer.from_env(db.server_activity, rollup_collection=db[ROLLUP_COLLECTION])
 
 # Bot setup with required intents
 intents = discord.Intents.default()
@@ -29,13 +44,67 @@ intents.message_content = True
 intents.members = True
 intents.guilds = True
 intents.moderation = True
+# Privileged; without it member statuses stay "offline" (enable it in the developer portal first)
+intents.presences = os.environ.get('DISCORD_PRESENCE_INTENT', 'false').lower() == 'true'
+
+# Cluster mode: bot_cluster.py runs this file once per shard range
+CLUSTER_ID = int(os.environ['BOT_CLUSTER_ID']) if os.environ.get('BOT_CLUSTER_ID') else None
+SHARD_IDS = parse_shard_ids(os.environ.get('BOT_SHARD_IDS', ''))
+CLUSTER_STATS_INTERVAL = float(os.environ.get('BOT_CLUSTER_STATS_INTERVAL', '10'))
 
 # Initialize bot with Arabic-friendly settings
-bot = commands.Bot(
-    command_prefix='!',
-    intents=intents,
-    help_command=None  # We'll create custom help
+if SHARD_IDS:
+    bot = commands.AutoShardedBot(
+        command_prefix='!',
+        intents=intents,
+        help_command=None,
+        shard_ids=SHARD_IDS,
+        shard_count=int(os.environ['BOT_SHARD_COUNT'])
+    )
+else:
+    bot = commands.Bot(
+        command_prefix='!',
+        intents=intents,
+        help_command=None  # We'll create custom help
+    )
+
+# Per-shard event rates reported to the cluster coordinator
+shard_stats = ShardStats(SHARD_IDS or [0])
+
+# Command/event latency and event-loop lag, served on the API's /metrics
+bot_metrics = BotMetrics(
+    # Opt-in: timing every loop callback has a cost for the whole process (0 = off)
+    slow_callback_ms=float(os.environ.get('BOT_SLOW_CALLBACK_MS', '0')),
+    const_labels={"cluster": str(CLUSTER_ID)} if CLUSTER_ID is not None else None
 )
+BOT_METRICS_FILE = Path(os.environ.get(
+    'BOT_METRICS_FILE',
+    str(ROOT_DIR / ("bot_metrics.prom" if CLUSTER_ID is None else f"bot_metrics.cluster{CLUSTER_ID}.prom"))
+))
+BOT_METRICS_INTERVAL = float(os.environ.get('BOT_METRICS_INTERVAL', '15'))
+
+# Incremental member/presence counters for the stats commands
+presence_index = PresenceIndex(drift_check_interval=float(os.environ.get('PRESENCE_DRIFT_CHECK_INTERVAL', '1800')))
+
+# Moderation DMs are delivered in the background; kick/ban wait at most this long
+dm_queue = DMQueue.from_env()
+DM_DELIVERY_TIMEOUT = float(os.environ.get('DM_DELIVERY_TIMEOUT', '5'))
+
+# Automatic action at N warnings (ESCALATION_POLICY="3:mute:60,5:kick")
+escalation_policy = EscalationPolicy.from_env()
+
+# Time-decayed violation scores (VIOLATION_WEIGHTS, VIOLATION_HALF_LIFE_DAYS)
+violation_scorer = ViolationScorer.from_env()
+
+# Skips tree.sync for scopes whose command definitions haven't changed
+command_syncer = CommandSyncer.from_env(bot.tree, db[COMMAND_SYNC_COLLECTION])
+
+# Automatic spam/flood timeouts (FLOOD_* settings)
+flood_detector = FloodDetector(FloodConfig.from_env())
+
+# Bulk moderation limits
+BULK_MODERATION_CONCURRENCY = int(os.environ.get('BULK_MODERATION_CONCURRENCY', '5'))
+BULK_MODERATION_MAX_TARGETS = int(os.environ.get('BULK_MODERATION_MAX_TARGETS', '1000'))
 
 # Emoji mapping for reactions
 POLL_EMOJIS = ['1️⃣', '2️⃣', '3️⃣', '4️⃣', '5️⃣', '6️⃣', '7️⃣', '8️⃣', '9️⃣', '🔟']
@@ -43,37 +112,69 @@ POLL_EMOJIS = ['1️⃣', '2️⃣', '3️⃣', '4️⃣', '5️⃣', '6️⃣',
 # Database helper functions
 async def log_moderation_action(action_type: str, target_user_id: int, moderator_id: int, guild_id: int, reason: str, duration: Optional[int] = None):
     """Log moderation actions to database"""
-    action = {
-        "id": str(uuid.uuid4()),
-        "action_type": action_type,
-        "target_user_id": target_user_id,
-        "moderator_id": moderator_id,
-        "guild_id": guild_id,
-        "reason": reason,
-        "duration": duration,
-        "timestamp": datetime.utcnow()
-    }
+    action = build_action_record(action_type, target_user_id, moderator_id, guild_id, reason, duration)
     await db.moderation_logs.insert_one(action)
+    await invalidate_guild(guild_id, db[CACHE_VERSIONS_COLLECTION])
     logger.info(f"Logged moderation action: {action_type} for user {target_user_id}")
+    
+    try:
+        await violation_scorer.record(db[VIOLATION_SCORES_COLLECTION], [action])
+    except Exception as e:
+        logger.error(f"Failed to update violation score for {target_user_id}: {e}")
+    
+    # Keep the per-member violation counter in step; returns the updated counter
+    try:
+        return await increment_counter(db[VIOLATION_COUNTERS_COLLECTION], action)
+    except Exception as e:
+        logger.error(f"Failed to update violation counter for {target_user_id}: {e}")
+        return None
+
+async def log_moderation_actions(actions: list):
+    """Log a batch of moderation actions in a single write"""
+    if not actions:
+        return
+    await db.moderation_logs.insert_many(actions, ordered=False)
+    try:
+        await increment_counters(db[VIOLATION_COUNTERS_COLLECTION], actions)
+    except Exception as e:
+        logger.error(f"Failed to update violation counters: {e}")
+    try:
+        await violation_scorer.record(db[VIOLATION_SCORES_COLLECTION], actions)
+    except Exception as e:
+        logger.error(f"Failed to update violation scores: {e}")
+    for guild_id in {action["guild_id"] for action in actions}:
+        await invalidate_guild(guild_id, db[CACHE_VERSIONS_COLLECTION])
+    logger.info(f"Logged {len(actions)} moderation action(s) in bulk")
 
 async def get_user_violations(user_id: int, guild_id: int):
     """Get violations count for a user"""
-    violations = await db.moderation_logs.count_documents({
-        "target_user_id": user_id,
-        "guild_id": guild_id,
-        "action_type": {"$in": ["warn", "mute", "kick", "ban"]}
-    })
-    return violations
-
-async def save_server_activity(guild_id: int, activity_data: dict):
-    """Save server activity data"""
-    activity = {
-        "id": str(uuid.uuid4()),
-        "guild_id": guild_id,
-        "timestamp": datetime.utcnow(),
-        **activity_data
-    }
-    await db.server_activity.insert_one(activity)
+    counter = await get_counter(db[VIOLATION_COUNTERS_COLLECTION], guild_id, user_id)
+    return counter["total"]
+
+async def apply_escalation(interaction: discord.Interaction, member: discord.Member, step, warnings: int):
+    """Run the escalation policy step a warning just triggered"""
+    reason = f"تصعيد تلقائي: {warnings} تحذيرات"
+    try:
+        if step.action == "mute":
+            await member.timeout(discord.utils.utcnow() + timedelta(minutes=step.minutes), reason=reason)
+            await log_moderation_action("mute", member.id, bot.user.id, interaction.guild.id, reason, step.minutes)
+            await interaction.followup.send(f"🔇 تم كتم {member.mention} تلقائياً لمدة {step.minutes} دقيقة ({reason})")
+        elif step.action == "kick":
+            dm_embed = discord.Embed(
+                title="تم طردك من الخادم",
+                description=f"**الخادم:** {interaction.guild.name}\n**السبب:** {reason}",
+                color=discord.Color.red()
+            )
+            await dm_queue.deliver(member, dm_embed, timeout=DM_DELIVERY_TIMEOUT)
+            await member.kick(reason=reason)
+            await log_moderation_action("kick", member.id, bot.user.id, interaction.guild.id, reason)
+            await interaction.followup.send(f"👢 تم طرد {member.mention} تلقائياً ({reason})")
+    except discord.Forbidden:
+        await interaction.followup.send("❌ ليس لدي صلاحية لتطبيق التصعيد التلقائي على هذا العضو", ephemeral=True)
+
+def save_server_activity(guild_id: int, activity_data: dict):
+    """Queue server activity data for the next batched write"""
+    return activity_buffer.record(guild_id, activity_data)
 
 # Bot Events
 @bot.event
@@ -81,37 +182,58 @@ async def on_ready():
     logger.info(f'{bot.user} قد اتصل بديسكورد!')
     logger.info(f'Bot is in {len(bot.guilds)} servers')
     
-    # Sync slash commands globally and for specific guilds
+    # Sync slash commands globally and per guild, skipping scopes that are unchanged;
+    # in a cluster only the first worker syncs the global scope
     try:
-        # Global sync (can take up to 1 hour)
-        synced = await bot.tree.sync()
-        logger.info(f'Synced {len(synced)} global command(s)')
-        
-        # Sync for specific guild for instant availability
-        for guild in bot.guilds:
-            try:
-                guild_synced = await bot.tree.sync(guild=guild)
-                logger.info(f'Synced {len(guild_synced)} command(s) for guild {guild.name}')
-            except Exception as e:
-                logger.error(f'Failed to sync commands for guild {guild.name}: {e}')
-                
+        await command_syncer.sync(bot.guilds, include_global=not CLUSTER_ID)
     except Exception as e:
-        logger.error(f'Failed to sync global commands: {e}')
+        logger.error(f'Failed to sync commands: {e}')
         
     # Print available commands
     logger.info("Available commands:")
     for command in bot.tree.get_commands():
         logger.info(f"  /{command.name} - {command.description}")
+    
+    # Build presence counters before reporting ready so stats commands are accurate
+    for guild in bot.guilds:
+        await presence_index.rebuild(guild)
+    presence_index.start_drift_checks(bot)
+    
+    logger.info("Bot is ready and all commands are synced!")
 
 @bot.event
 async def on_guild_join(guild):
     """Sync commands when bot joins a new guild"""
+    await presence_index.rebuild(guild)
     try:
-        synced = await bot.tree.sync(guild=guild)
-        logger.info(f'Synced {len(synced)} command(s) for new guild {guild.name}')
+        await command_syncer.sync([guild])
     except Exception as e:
         logger.error(f'Failed to sync commands for new guild {guild.name}: {e}')
 
+@bot.event
+async def on_guild_remove(guild):
+    presence_index.forget(guild.id)
+
+@bot.event
+async def on_member_join(member):
+    presence_index.member_joined(member)
+    try:
+        await record_member_event(db[MEMBER_EVENTS_COLLECTION], member, JOIN)
+    except Exception as e:
+        logger.error(f"Failed to record join for {member.id}: {e}")
+
+@bot.event
+async def on_member_remove(member):
+    presence_index.member_left(member)
+    try:
+        await record_member_event(db[MEMBER_EVENTS_COLLECTION], member, LEAVE)
+    except Exception as e:
+        logger.error(f"Failed to record leave for {member.id}: {e}")
+
+@bot.event
+async def on_presence_update(before, after):
+    presence_index.presence_changed(after)
+
 @bot.event
 async def on_message(message):
     if message.author == bot.user:
@@ -119,14 +241,66 @@ async def on_message(message):
     
     # Log message activity for statistics
     if message.guild:
-        await save_server_activity(message.guild.id, {
+        shard_stats.message(message.guild.shard_id)
+        save_server_activity(message.guild.id, {
             "type": "message",
             "user_id": message.author.id,
             "channel_id": message.channel.id
         })
+        
+        if not message.author.bot:
+            verdict = flood_detector.check(message.guild.id, message.channel.id, message.author.id,
+                                           message.content, time.monotonic())
+            if verdict is not None:
+                await handle_flood(message, verdict)
     
     await bot.process_commands(message)
 
+if CLUSTER_ID is not None:
+    @bot.event
+    async def on_socket_event_type(event_type):
+        shard_stats.gateway_event()
+
+async def report_cluster_stats():
+    """Print a stats line for the coordinator every CLUSTER_STATS_INTERVAL seconds"""
+    while True:
+        await asyncio.sleep(CLUSTER_STATS_INTERVAL)
+        report = shard_stats.report(CLUSTER_ID, bot.is_ready(), getattr(bot, 'latencies', [(0, bot.latency)]),
+                                    (guild.shard_id for guild in bot.guilds))
+        print(format_stats(report), flush=True)
+
+# Reasons shown to the member and in the moderation log
+FLOOD_REASONS = {
+    "user_flood": "إرسال رسائل كثيرة بسرعة",
+    "channel_flood": "المشاركة في إغراق القناة بالرسائل",
+    "duplicate": "تكرار نفس الرسالة",
+}
+
+async def handle_flood(message: discord.Message, verdict: str):
+    """Time out a member the flood detector flagged, like the mute command would"""
+    member = message.author
+    if not isinstance(member, discord.Member) or member.guild_permissions.manage_messages:
+        return  # Moderators are exempt
+    
+    minutes = flood_detector.config.timeout_minutes
+    reason = f"كتم تلقائي: {FLOOD_REASONS[verdict]}"
+    try:
+        await member.timeout(discord.utils.utcnow() + timedelta(minutes=minutes), reason=reason)
+    except discord.Forbidden:
+        logger.warning(f"Flood detected for {member.id} in guild {message.guild.id} but timeout is not permitted")
+        return
+    except discord.HTTPException as e:
+        logger.error(f"Failed to time out flooding member {member.id}: {e}")
+        return
+    
+    logger.info(f"🚨 Auto-muted {member.id} in guild {message.guild.id} ({verdict})")
+    await log_moderation_action("mute", member.id, bot.user.id, message.guild.id, reason, minutes)
+    dm_queue.enqueue(member, discord.Embed(
+        title="تم كتمك في الخادم",
+        description=f"**الخادم:** {message.guild.name}\n**المدة:** {minutes} دقيقة\n**السبب:** {reason}",
+        color=discord.Color.orange()
+    ))
+
 # ====================
 # MODERATION COMMANDS
 # ====================
@@ -193,16 +367,13 @@ async def mute_member(interaction: discord.Interaction, العضو: discord.Memb
         # Log to database
         await log_moderation_action("mute", العضو.id, interaction.user.id, interaction.guild.id, سبب, دقائق)
         
-        # Try to DM the user
-        try:
-            dm_embed = discord.Embed(
-                title="تم كتمك في الخادم",
-                description=f"**الخادم:** {interaction.guild.name}\n**المدة:** {دقائق} دقيقة\n**السبب:** {سبب}",
-                color=discord.Color.orange()
-            )
-            await العضو.send(embed=dm_embed)
-        except:
-            pass  # User has DMs disabled
+        # Notify the user in the background
+        dm_embed = discord.Embed(
+            title="تم كتمك في الخادم",
+            description=f"**الخادم:** {interaction.guild.name}\n**المدة:** {دقائق} دقيقة\n**السبب:** {سبب}",
+            color=discord.Color.orange()
+        )
+        dm_queue.enqueue(العضو, dm_embed)
             
     except discord.Forbidden:
         await interaction.response.send_message("❌ ليس لدي صلاحية لكتم هذا العضو", ephemeral=True)
@@ -241,17 +412,17 @@ async def kick_member(interaction: discord.Interaction, العضو: discord.Memb
         await interaction.response.send_message("❌ ليس لديك صلاحية لطرد الأعضاء", ephemeral=True)
         return
     
+    # Delivering the DM can outlast the 3s Discord gives an unacknowledged interaction
+    await interaction.response.defer(thinking=True)
+    
     try:
-        # Send DM before kicking
-        try:
-            dm_embed = discord.Embed(
-                title="تم طردك من الخادم",
-                description=f"**الخادم:** {interaction.guild.name}\n**السبب:** {سبب}",
-                color=discord.Color.red()
-            )
-            await العضو.send(embed=dm_embed)
-        except:
-            pass
+        # DM must be delivered (or time out) while the member still shares the guild
+        dm_embed = discord.Embed(
+            title="تم طردك من الخادم",
+            description=f"**الخادم:** {interaction.guild.name}\n**السبب:** {سبب}",
+            color=discord.Color.red()
+        )
+        await dm_queue.deliver(العضو, dm_embed, timeout=DM_DELIVERY_TIMEOUT)
         
         await العضو.kick(reason=سبب)
         
@@ -263,11 +434,11 @@ async def kick_member(interaction: discord.Interaction, العضو: discord.Memb
         embed.add_field(name="السبب", value=سبب, inline=False)
         embed.add_field(name="المشرف", value=interaction.user.mention, inline=True)
         
-        await interaction.response.send_message(embed=embed)
+        await interaction.followup.send(embed=embed)
         await log_moderation_action("kick", العضو.id, interaction.user.id, interaction.guild.id, سبب)
         
     except discord.Forbidden:
-        await interaction.response.send_message("❌ ليس لدي صلاحية لطرد هذا العضو", ephemeral=True)
+        await interaction.followup.send("❌ ليس لدي صلاحية لطرد هذا العضو", ephemeral=True)
 
 @bot.tree.command(name="حظر", description="حظر عضو من الخادم")
 @discord.app_commands.describe(
@@ -279,17 +450,17 @@ async def ban_member(interaction: discord.Interaction, العضو: discord.Membe
         await interaction.response.send_message("❌ ليس لديك صلاحية لحظر الأعضاء", ephemeral=True)
         return
     
+    # Delivering the DM can outlast the 3s Discord gives an unacknowledged interaction
+    await interaction.response.defer(thinking=True)
+    
     try:
-        # Send DM before banning
-        try:
-            dm_embed = discord.Embed(
-                title="تم حظرك من الخادم",
-                description=f"**الخادم:** {interaction.guild.name}\n**السبب:** {سبب}",
-                color=discord.Color.dark_red()
-            )
-            await العضو.send(embed=dm_embed)
-        except:
-            pass
+        # DM must be delivered (or time out) while the member still shares the guild
+        dm_embed = discord.Embed(
+            title="تم حظرك من الخادم",
+            description=f"**الخادم:** {interaction.guild.name}\n**السبب:** {سبب}",
+            color=discord.Color.dark_red()
+        )
+        await dm_queue.deliver(العضو, dm_embed, timeout=DM_DELIVERY_TIMEOUT)
         
         await العضو.ban(reason=سبب)
         
@@ -301,11 +472,11 @@ async def ban_member(interaction: discord.Interaction, العضو: discord.Membe
         embed.add_field(name="السبب", value=سبب, inline=False)
         embed.add_field(name="المشرف", value=interaction.user.mention, inline=True)
         
-        await interaction.response.send_message(embed=embed)
+        await interaction.followup.send(embed=embed)
         await log_moderation_action("ban", العضو.id, interaction.user.id, interaction.guild.id, سبب)
         
     except discord.Forbidden:
-        await interaction.response.send_message("❌ ليس لدي صلاحية لحظر هذا العضو", ephemeral=True)
+        await interaction.followup.send("❌ ليس لدي صلاحية لحظر هذا العضو", ephemeral=True)
 
 @bot.tree.command(name="فك_حظر", description="فك حظر عضو باستخدام معرف المستخدم")
 @discord.app_commands.describe(
@@ -348,9 +519,11 @@ async def warn_member(interaction: discord.Interaction, العضو: discord.Memb
         await interaction.response.send_message("❌ ليس لديك صلاحية لإعطاء تحذيرات", ephemeral=True)
         return
     
-    # Get current warnings count
-    warnings_count = await get_user_violations(العضو.id, interaction.guild.id)
-    new_warnings = warnings_count + 1
+    # The counter comes back from the write itself; no separate count query
+    counter = await log_moderation_action("warn", العضو.id, interaction.user.id, interaction.guild.id, سبب)
+    if counter is None:
+        counter = await get_counter(db[VIOLATION_COUNTERS_COLLECTION], interaction.guild.id, العضو.id)
+    new_warnings = counter["total"]
     
     embed = discord.Embed(
         title="⚠️ تم إعطاء تحذير",
@@ -362,18 +535,145 @@ async def warn_member(interaction: discord.Interaction, العضو: discord.Memb
     embed.add_field(name="المشرف", value=interaction.user.mention, inline=True)
     
     await interaction.response.send_message(embed=embed)
-    await log_moderation_action("warn", العضو.id, interaction.user.id, interaction.guild.id, سبب)
     
-    # Send DM to user
+    # Notify the user in the background
+    dm_embed = discord.Embed(
+        title="تم إعطاؤك تحذير",
+        description=f"**الخادم:** {interaction.guild.name}\n**السبب:** {سبب}\n**عدد التحذيرات:** {new_warnings}",
+        color=discord.Color.yellow()
+    )
+    dm_queue.enqueue(العضو, dm_embed)
+    
+    step = escalation_policy.step_for(warn_count(counter))
+    if step is not None:
+        await apply_escalation(interaction, العضو, step, warn_count(counter))
+
+# action -> (required permission, Arabic label, DM title, DM colour)
+BULK_ACTIONS = {
+    "mute": ("moderate_members", "كتم", "تم كتمك في الخادم", discord.Color.orange()),
+    "kick": ("kick_members", "طرد", "تم طردك من الخادم", discord.Color.red()),
+    "ban": ("ban_members", "حظر", "تم حظرك من الخادم", discord.Color.dark_red()),
+    "warn": ("manage_messages", "تحذير", "تم إعطاؤك تحذير", discord.Color.yellow()),
+}
+
+@bot.tree.command(name="إشراف_جماعي", description="تطبيق إجراء إشرافي على عدة أعضاء دفعة واحدة")
+@discord.app_commands.describe(
+    الإجراء="الإجراء المراد تطبيقه",
+    الأعضاء="إشارات أو معرفات الأعضاء مفصولة بمسافات",
+    الرتبة="تطبيق الإجراء على جميع أعضاء هذه الرتبة",
+    سبب="سبب الإجراء",
+    دقائق="مدة الكتم بالدقائق (للكتم فقط)",
+    إشعار="إرسال رسالة خاصة لكل عضو"
+)
+@discord.app_commands.choices(الإجراء=[
+    discord.app_commands.Choice(name="كتم", value="mute"),
+    discord.app_commands.Choice(name="طرد", value="kick"),
+    discord.app_commands.Choice(name="حظر", value="ban"),
+    discord.app_commands.Choice(name="تحذير", value="warn"),
+])
+async def bulk_moderation(interaction: discord.Interaction, الإجراء: discord.app_commands.Choice[str],
+                          الأعضاء: Optional[str] = None, الرتبة: Optional[discord.Role] = None,
+                          سبب: str = "لا يوجد سبب", دقائق: int = 10, إشعار: bool = True):
+    action_type = الإجراء.value
+    permission, label, dm_title, dm_color = BULK_ACTIONS[action_type]
+    if not getattr(interaction.user.guild_permissions, permission):
+        await interaction.response.send_message(f"❌ ليس لديك صلاحية {label} الأعضاء", ephemeral=True)
+        return
+    
+    if action_type == "mute" and (دقائق < 1 or دقائق > 40320):  # Discord limit: 28 days
+        await interaction.response.send_message("❌ يجب أن تكون المدة بين 1 دقيقة و 28 يوم", ephemeral=True)
+        return
+    
+    guild = interaction.guild
+    
+    # Resolve targets from mentions/IDs and the role, without duplicates
+    targets = {}
+    missing = 0
+    for user_id in re.findall(r"\d{15,20}", الأعضاء or ""):
+        member = guild.get_member(int(user_id))
+        if member is None:
+            missing += 1
+        else:
+            targets[member.id] = member
+    if الرتبة is not None:
+        for member in الرتبة.members:
+            targets[member.id] = member
+    for protected_id in (interaction.user.id, bot.user.id, guild.owner_id):
+        targets.pop(protected_id, None)
+    
+    if not targets:
+        await interaction.response.send_message("❌ لم يتم العثور على أعضاء لتطبيق الإجراء عليهم", ephemeral=True)
+        return
+    if len(targets) > BULK_MODERATION_MAX_TARGETS:
+        await interaction.response.send_message(f"❌ الحد الأقصى {BULK_MODERATION_MAX_TARGETS} عضو في العملية الواحدة", ephemeral=True)
+        return
+    
+    await interaction.response.defer(thinking=True)
+    progress_message = await interaction.followup.send(f"⏳ جاري {label} الأعضاء... 0/{len(targets)}", wait=True)
+    
+    dm_text = f"**الخادم:** {guild.name}\n**السبب:** {سبب}"
+    if action_type == "mute":
+        dm_text += f"\n**المدة:** {دقائق} دقيقة"
+    duration = دقائق if action_type == "mute" else None
+    records = []
+    
+    async def apply(member: discord.Member):
+        if action_type == "mute":
+            await member.timeout(discord.utils.utcnow() + timedelta(minutes=دقائق), reason=سبب)
+        elif إشعار and action_type in ("kick", "ban"):
+            # Must be delivered while the member still shares the guild
+            await dm_queue.deliver(member, discord.Embed(title=dm_title, description=dm_text, color=dm_color),
+                                   timeout=DM_DELIVERY_TIMEOUT)
+        
+        if action_type == "kick":
+            await member.kick(reason=سبب)
+        elif action_type == "ban":
+            await member.ban(reason=سبب)
+        
+        records.append(build_action_record(action_type, member.id, interaction.user.id, guild.id, سبب, duration))
+        if إشعار and action_type in ("mute", "warn"):
+            dm_queue.enqueue(member, discord.Embed(title=dm_title, description=dm_text, color=dm_color))
+    
+    async def report_progress(result):
+        await progress_message.edit(content=f"⏳ جاري {label} الأعضاء... {result.done}/{result.total}")
+    
+    runner = BulkRunner(apply, concurrency=BULK_MODERATION_CONCURRENCY, on_progress=report_progress)
     try:
-        dm_embed = discord.Embed(
-            title="تم إعطاؤك تحذير",
-            description=f"**الخادم:** {interaction.guild.name}\n**السبب:** {سبب}\n**عدد التحذيرات:** {new_warnings}",
-            color=discord.Color.yellow()
-        )
-        await العضو.send(embed=dm_embed)
-    except:
-        pass
+        result = await runner.run(targets.values())
+    finally:
+        # One audit write for everything that was applied, even if the run was interrupted
+        await log_moderation_actions(records)
+    
+    embed = discord.Embed(
+        title=f"📋 نتيجة {label} الجماعي",
+        color=discord.Color.green() if not result.failed else discord.Color.orange(),
+        timestamp=discord.utils.utcnow()
+    )
+    embed.add_field(name="✅ نجح", value=str(len(result.succeeded)), inline=True)
+    embed.add_field(name="❌ فشل", value=str(len(result.failed)), inline=True)
+    if missing:
+        embed.add_field(name="❔ غير موجودين", value=str(missing), inline=True)
+    embed.add_field(name="السبب", value=سبب, inline=False)
+    embed.add_field(name="المشرف", value=interaction.user.mention, inline=True)
+    if result.failed:
+        failures = "\n".join(f"• <@{user_id}>: {error[:80]}" for user_id, error in list(result.failed.items())[:10])
+        embed.add_field(name="تفاصيل الفشل", value=failures, inline=False)
+    
+    await progress_message.edit(content=f"✅ اكتمل: {result.done}/{result.total}")
+    await interaction.followup.send(embed=embed)
+    
+    # Bulk warnings count toward the escalation policy just like single ones
+    if action_type == "warn":
+        for record in records:
+            member = targets[record["target_user_id"]]
+            try:
+                warnings = warn_count(await get_counter(db[VIOLATION_COUNTERS_COLLECTION], guild.id, member.id))
+            except Exception as e:
+                logger.error(f"Failed to read violation counter for {member.id}: {e}")
+                continue
+            step = escalation_policy.step_for(warnings)
+            if step is not None:
+                await apply_escalation(interaction, member, step, warnings)
 
 # ====================
 # ANNOUNCEMENT & POLL COMMANDS
@@ -449,12 +749,13 @@ async def create_poll(interaction: discord.Interaction, السؤال: str, ال
 async def active_members(interaction: discord.Interaction):
     guild = interaction.guild
     
-    # Count members by status
-    online_members = [m for m in guild.members if m.status == discord.Status.online and not m.bot]
-    idle_members = [m for m in guild.members if m.status == discord.Status.idle and not m.bot]
-    dnd_members = [m for m in guild.members if m.status == discord.Status.dnd and not m.bot]
+    # Counts come from the presence index instead of scanning guild.members
+    presence = presence_index.get(guild.id)
+    online_count = presence.human_status_counts["online"]
+    idle_count = presence.human_status_counts["idle"]
+    dnd_count = presence.human_status_counts["dnd"]
     
-    total_active = len(online_members) + len(idle_members) + len(dnd_members)
+    total_active = online_count + idle_count + dnd_count
     
     embed = discord.Embed(
         title="🟢 الأعضاء النشطين",
@@ -464,15 +765,16 @@ async def active_members(interaction: discord.Interaction):
     
     embed.add_field(
         name="📊 الإحصائيات",
-        value=f"**المتصلين:** {len(online_members)}\n**بعيد:** {len(idle_members)}\n**مشغول:** {len(dnd_members)}\n**المجموع:** {total_active}",
+        value=f"**المتصلين:** {online_count}\n**بعيد:** {idle_count}\n**مشغول:** {dnd_count}\n**المجموع:** {total_active}",
         inline=False
     )
     
     # Show top 10 online members
+    online_members = [m for m in map(guild.get_member, presence_index.online_humans(guild.id, 10)) if m is not None]
     if online_members:
-        online_list = "\n".join([f"• {member.display_name}" for member in online_members[:10]])
-        if len(online_members) > 10:
-            online_list += f"\n... و {len(online_members) - 10} آخرين"
+        online_list = "\n".join([f"• {member.display_name}" for member in online_members])
+        if online_count > 10:
+            online_list += f"\n... و {online_count - 10} آخرين"
         embed.add_field(name="🟢 المتصلين", value=online_list, inline=True)
     
     await interaction.response.send_message(embed=embed)
@@ -515,9 +817,11 @@ async def member_violations(interaction: discord.Interaction, العضو: discor
             violations_text += f"{action_emoji} **{violation['action_type']}** - {violation['reason']}\n📅 {date}\n\n"
         
         embed.description = violations_text
+        counter = await get_counter(db[VIOLATION_COUNTERS_COLLECTION], interaction.guild.id, العضو.id)
+        score = await violation_scorer.get_score(db[VIOLATION_SCORES_COLLECTION], interaction.guild.id, العضو.id)
         embed.add_field(
             name="📊 الإجمالي", 
-            value=f"**عدد المخالفات:** {len(violations)}", 
+            value=f"**عدد المخالفات:** {counter['total']}\n**درجة الخطورة:** {score:.2f}", 
             inline=False
         )
     
@@ -531,15 +835,15 @@ async def member_violations(interaction: discord.Interaction, العضو: discor
 async def server_stats(interaction: discord.Interaction):
     guild = interaction.guild
     
-    # Count members by status
-    online = len([m for m in guild.members if m.status == discord.Status.online])
-    idle = len([m for m in guild.members if m.status == discord.Status.idle])
-    dnd = len([m for m in guild.members if m.status == discord.Status.dnd])
-    offline = len([m for m in guild.members if m.status == discord.Status.offline])
+    # O(1) counters maintained from member/presence events
+    presence = presence_index.get(guild.id)
+    online = presence.status_counts["online"]
+    idle = presence.status_counts["idle"]
+    dnd = presence.status_counts["dnd"]
+    offline = presence.status_counts["offline"]
     
-    # Count bots vs humans
-    bots = len([m for m in guild.members if m.bot])
-    humans = len([m for m in guild.members if not m.bot])
+    bots = presence.bots
+    humans = presence.humans
     
     embed = discord.Embed(
         title=f"📊 إحصائيات {guild.name}",
@@ -591,17 +895,11 @@ async def daily_report(interaction: discord.Interaction):
     guild = interaction.guild
     today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
     
-    # Get today's moderation actions
-    mod_actions = await db.moderation_logs.find({
-        "guild_id": guild.id,
-        "timestamp": {"$gte": today}
-    }).to_list(length=None)
+    # Get today's moderation actions summarized on the server
+    mod_summary = (await daily_summary(db.moderation_logs, guild.id, today))["moderation_actions"]
     
-    # Get today's activity
-    activities = await db.server_activity.find({
-        "guild_id": guild.id,
-        "timestamp": {"$gte": today}
-    }).to_list(length=None)
+    # Get today's message count from the daily rollups
+    today_messages = await message_count(db[ROLLUP_COLLECTION], guild.id, today)
     
     embed = discord.Embed(
         title="📊 التقرير اليومي",
@@ -611,11 +909,6 @@ async def daily_report(interaction: discord.Interaction):
     )
     
     # Moderation summary
-    mod_summary = {}
-    for action in mod_actions:
-        action_type = action["action_type"]
-        mod_summary[action_type] = mod_summary.get(action_type, 0) + 1
-    
     if mod_summary:
         mod_text = "\n".join([f"**{action}:** {count}" for action, count in mod_summary.items()])
         embed.add_field(name="🛡️ إجراءات الإشراف", value=mod_text, inline=True)
@@ -623,13 +916,12 @@ async def daily_report(interaction: discord.Interaction):
         embed.add_field(name="🛡️ إجراءات الإشراف", value="✅ لا توجد إجراءات", inline=True)
     
     # Activity summary
-    message_count = len([a for a in activities if a.get("type") == "message"])
-    embed.add_field(name="💬 الرسائل", value=str(message_count), inline=True)
+    embed.add_field(name="💬 الرسائل", value=str(today_messages), inline=True)
     
     # Current stats
     embed.add_field(
         name="👥 الأعضاء الحاليين",
-        value=f"**المجموع:** {guild.member_count}\n**متصل:** {len([m for m in guild.members if m.status == discord.Status.online])}",
+        value=f"**المجموع:** {guild.member_count}\n**متصل:** {presence_index.get(guild.id).status_counts['online']}",
         inline=True
     )
     
@@ -645,23 +937,11 @@ async def daily_report(interaction: discord.Interaction):
 ])
 async def most_active(interaction: discord.Interaction, الفترة: str):
     days = 7 if الفترة == "week" else 30
-    start_date = datetime.utcnow() - timedelta(days=days)
-    
-    # Get activities from database
-    activities = await db.server_activity.find({
-        "guild_id": interaction.guild.id,
-        "timestamp": {"$gte": start_date},
-        "type": "message"
-    }).to_list(length=None)
-    
-    # Count messages per user
-    user_activity = {}
-    for activity in activities:
-        user_id = activity["user_id"]
-        user_activity[user_id] = user_activity.get(user_id, 0) + 1
+    start_day = window_start(days)
     
-    # Sort by activity
-    sorted_users = sorted(user_activity.items(), key=lambda x: x[1], reverse=True)[:10]
+    # Top users from the per-day rollups
+    top = await top_users(db[ROLLUP_COLLECTION], interaction.guild.id, start_day, limit=10)
+    sorted_users = [(row["user_id"], row["message_count"]) for row in top]
     
     embed = discord.Embed(
         title=f"🏆 أكثر الأعضاء نشاطاً - آخر {الفترة}",
@@ -745,14 +1025,12 @@ async def server_growth(interaction: discord.Interaction):
     
     guild = interaction.guild
     
-    # Calculate growth periods
     now = datetime.utcnow()
-    week_ago = now - timedelta(days=7)
-    month_ago = now - timedelta(days=30)
     
-    # Count new members (approximation based on join dates)
-    week_joins = len([m for m in guild.members if m.joined_at and m.joined_at >= week_ago])
-    month_joins = len([m for m in guild.members if m.joined_at and m.joined_at >= month_ago])
+    # Joins and departures from the member event ledger
+    events = db[MEMBER_EVENTS_COLLECTION]
+    week = await growth_report(events, guild.id, days=7, now=now)
+    month = await growth_report(events, guild.id, days=30, member_count=guild.member_count, now=now)
     
     embed = discord.Embed(
         title="📈 نمو الخادم",
@@ -761,11 +1039,19 @@ async def server_growth(interaction: discord.Interaction):
     )
     
     embed.add_field(name="👥 الأعضاء الحاليين", value=str(guild.member_count), inline=True)
-    embed.add_field(name="📅 الأسبوع الماضي", value=f"+{week_joins} عضو", inline=True)
-    embed.add_field(name="📅 الشهر الماضي", value=f"+{month_joins} عضو", inline=True)
+    embed.add_field(
+        name="📅 الأسبوع الماضي",
+        value=f"**انضم:** +{week['joins']}\n**غادر:** -{week['leaves']}\n**الصافي:** {week['net_growth']:+d}",
+        inline=True
+    )
+    embed.add_field(
+        name="📅 الشهر الماضي",
+        value=f"**انضم:** +{month['joins']}\n**غادر:** -{month['leaves']}\n**الصافي:** {month['net_growth']:+d}\n**معدل المغادرة:** {month['churn_rate'] * 100:.1f}%",
+        inline=True
+    )
     
     # Server age
-    server_age = (now - guild.created_at).days
+    server_age = (discord.utils.utcnow() - guild.created_at).days
     embed.add_field(
         name="📊 معدل النمو",
         value=f"**عمر الخادم:** {server_age} يوم\n**المعدل اليومي:** {guild.member_count / max(server_age, 1):.1f} عضو/يوم",
@@ -780,12 +1066,10 @@ async def violations_report(interaction: discord.Interaction):
         await interaction.response.send_message("❌ مطلوب صلاحية المدير", ephemeral=True)
         return
     
-    # Get all violations for this guild
-    violations = await db.moderation_logs.find({
-        "guild_id": interaction.guild.id
-    }).to_list(length=None)
+    # Aggregate violations for this guild on the server
+    report = await build_violations_report(db.moderation_logs, interaction.guild.id, top=5)
     
-    if not violations:
+    if not report["total_violations"]:
         embed = discord.Embed(
             title="📋 تقرير المخالفات",
             description="✅ لا توجد مخالفات مسجلة",
@@ -794,36 +1078,22 @@ async def violations_report(interaction: discord.Interaction):
         await interaction.response.send_message(embed=embed)
         return
     
-    # Analyze violations
-    total_violations = len(violations)
-    violation_types = {}
-    top_violators = {}
-    
-    for violation in violations:
-        # Count by type
-        v_type = violation["action_type"]
-        violation_types[v_type] = violation_types.get(v_type, 0) + 1
-        
-        # Count by user
-        user_id = violation["target_user_id"]
-        top_violators[user_id] = top_violators.get(user_id, 0) + 1
-    
     embed = discord.Embed(
         title="📋 تقرير المخالفات الشامل",
         color=discord.Color.orange(),
         timestamp=discord.utils.utcnow()
     )
     
-    embed.add_field(name="📊 إجمالي المخالفات", value=str(total_violations), inline=True)
+    embed.add_field(name="📊 إجمالي المخالفات", value=str(report["total_violations"]), inline=True)
     
-    # Types breakdown
-    types_text = "\n".join([f"**{v_type}:** {count}" for v_type, count in sorted(violation_types.items(), key=lambda x: x[1], reverse=True)])
+    # Types breakdown (already sorted by count)
+    types_text = "\n".join([f"**{v_type}:** {count}" for v_type, count in report["violation_types"].items()])
     embed.add_field(name="📈 أنواع المخالفات", value=types_text, inline=True)
     
     # Top violators
-    sorted_violators = sorted(top_violators.items(), key=lambda x: x[1], reverse=True)[:5]
     violators_text = ""
-    for user_id, count in sorted_violators:
+    for violator in report["top_violators"]:
+        user_id, count = violator["user_id"], violator["count"]
         try:
             user = interaction.guild.get_member(user_id)
             name = user.display_name if user else f"مستخدم محذوف ({user_id})"
@@ -844,7 +1114,7 @@ async def violations_report(interaction: discord.Interaction):
 async def ping_command(interaction: discord.Interaction):
     embed = discord.Embed(
         title="🏓 Pong!",
-        description=f"البوت يعمل!\nLatency: {round(bot.latency * 1000)}ms",
+        description=f"البوت يعمل!\nLatency: {round(bot.latency * 1000)}ms\nLoop lag: {round(bot_metrics.last_lag_ms)}ms",
         color=discord.Color.green()
     )
     await interaction.response.send_message(embed=embed)
@@ -926,9 +1196,49 @@ async def on_command_error(ctx, error):
     if hasattr(ctx, 'send'):
         await ctx.send("❌ حدث خطأ أثناء تنفيذ الأمر")
 
+# Time every slash command and event handler defined above
+bot_metrics.instrument(bot)
+
+async def write_bot_metrics():
+    """Dump metrics for the API's /metrics when the bot runs in its own process"""
+    while True:
+        await asyncio.sleep(BOT_METRICS_INTERVAL)
+        bot_metrics.write_textfile(BOT_METRICS_FILE)
+
 # Run the bot
-async def run_discord_bot():
-    """Run Discord bot with proper error handling and logging"""
+def bot_state() -> dict:
+    """Snapshot of the live bot for in-process API handlers"""
+    ready = bot.is_ready()
+    return {
+        "ready": ready,
+        "user": str(bot.user) if bot.user else None,
+        "latency_ms": round(bot.latency * 1000, 2) if ready else None,
+        "guild_count": len(bot.guilds),
+        "guilds": [
+            {"id": guild.id, "name": guild.name, "member_count": guild.member_count}
+            for guild in bot.guilds
+        ],
+        "activity_buffer": activity_buffer.stats(),
+        "dm_queue": dm_queue.stats(),
+        "flood_detector": flood_detector.stats(),
+        "command_sync": command_syncer.last_run,
+        "metrics": bot_metrics.snapshot(),
+    }
+
+async def stop_discord_bot():
+    """Ask a running bot to disconnect; run_discord_bot then returns"""
+    if not bot.is_closed():
+        await bot.close()
+
+async def run_discord_bot(close_client: bool = True, export_metrics: bool = True):
+    """Run Discord bot with proper error handling and logging
+
+    close_client=False leaves the shared Mongo client open for the API.
+    export_metrics=False skips the metrics textfile when the API's /metrics
+    reads bot_metrics from this process directly.
+    """
+    stats_reporter = None
+    metrics_writer = None
     try:
         logger.info("🤖 Discord bot starting...")
         
@@ -948,7 +1258,26 @@ async def run_discord_bot():
             logger.error(f"❌ Database connection failed: {db_error}")
             raise
         
+        await ensure_indexes(db)
+        # First run with counters: seed them from existing moderation logs
+        if not await db[VIOLATION_COUNTERS_COLLECTION].estimated_document_count():
+            await backfill_counters(db.moderation_logs, db[VIOLATION_COUNTERS_COLLECTION])
+        if not await db[VIOLATION_SCORES_COLLECTION].estimated_document_count():
+            await violation_scorer.backfill(db.moderation_logs, db[VIOLATION_SCORES_COLLECTION])
+        activity_buffer.start()
+        dm_queue.start()
+        bot_metrics.start()
+        if export_metrics:
+            metrics_writer = asyncio.create_task(write_bot_metrics())
+        
+        if CLUSTER_ID is not None:
+            stats_reporter = asyncio.create_task(report_cluster_stats())
+            logger.info(f"🧩 Cluster worker {CLUSTER_ID}: shards {SHARD_IDS} of {bot.shard_count}")
+        
         logger.info("🚀 Starting Discord bot with token...")
+        if bot.is_closed():
+            # Restarting in the same process; reset the client's closed state
+            bot.clear()
         await bot.start(token)
         
     except discord.errors.LoginFailure as e:
@@ -963,9 +1292,23 @@ async def run_discord_bot():
         raise
     finally:
         logger.info("🛑 Discord bot shutting down...")
+        if stats_reporter is not None:
+            stats_reporter.cancel()
+        if metrics_writer is not None:
+            metrics_writer.cancel()
+        bot_metrics.stop()
+        presence_index.stop_drift_checks()
         if not bot.is_closed():
             await bot.close()
-        if mongo_client:
+        try:
+            await activity_buffer.close()
+        except Exception as e:
+            logger.error(f"❌ Failed to flush activity buffer: {e}")
+        try:
+            await dm_queue.close()
+        except Exception as e:
+            logger.error(f"❌ Failed to drain DM queue: {e}")
+        if close_client:
             mongo_client.close()
 
 if __name__ == "__main__":
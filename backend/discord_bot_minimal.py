@@ -8,7 +8,6 @@ from discord.ext import commands
 import asyncio
 import os
 import sys
-from motor.motor_asyncio import AsyncIOMotorClient
 from datetime import datetime, timedelta
 from typing import Optional
 import logging
@@ -27,10 +26,7 @@ logger = logging.getLogger(__name__)
 
 # MongoDB connection with error handling
 try:
-    mongo_url = os.environ['MONGO_URL']
-    db_name = os.environ['DB_NAME']
-    mongo_client = AsyncIOMotorClient(mongo_url)
-    db = mongo_client[db_name]
+    from database import client as mongo_client, db
     logger.info("MongoDB connection initialized")
 except KeyError as e:
     logger.error(f"Missing environment variable: {e}")
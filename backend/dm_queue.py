@@ -0,0 +1,194 @@
+"""
+Background delivery queue for moderation DMs
+Commands enqueue a notification and move on; workers deliver it with retry and
+backoff, de-duplicating identical pending notifications to the same user.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, List
+
+from bulk_moderation import retry_after
+
+logger = logging.getLogger(__name__)
+
+# HTTP statuses that retrying can't fix (DMs closed, user gone)
+PERMANENT_STATUSES = (403, 404)
+
+
+class DMQueue:
+    """Bounded queue of direct messages delivered by a small worker pool"""
+
+    def __init__(self, workers: int = 2, max_queue: int = 1000, max_retries: int = 3,
+                 backoff_initial: float = 1.0, backoff_max: float = 30.0, dedup_window: float = 60.0):
+        self.workers = max(1, workers)
+        self.max_queue = max_queue
+        self.max_retries = max_retries
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.dedup_window = dedup_window
+
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+        # dedup key -> future of the pending delivery
+        self._pending: Dict[tuple, asyncio.Future] = {}
+        # dedup key -> monotonic time of the last successful delivery
+        self._recent: Dict[tuple, float] = {}
+        self._retry_tasks = set()
+
+        # Counters
+        self.enqueued = 0
+        self.delivered = 0
+        self.failed = 0
+        self.retried = 0
+        self.deduplicated = 0
+        self.dropped = 0
+        self.timeouts = 0
+        self.max_delivery_ms = 0.0
+        self._total_delivery_ms = 0.0
+
+    @classmethod
+    def from_env(cls):
+        """Build a queue configured from DM_QUEUE_* environment variables"""
+        return cls(
+            workers=int(os.environ.get('DM_QUEUE_WORKERS', '2')),
+            max_queue=int(os.environ.get('DM_QUEUE_MAX', '1000')),
+            max_retries=int(os.environ.get('DM_QUEUE_MAX_RETRIES', '3')),
+            dedup_window=float(os.environ.get('DM_QUEUE_DEDUP_WINDOW', '60')),
+        )
+
+    @staticmethod
+    def dedup_key(user, embed) -> tuple:
+        return user.id, embed.title, embed.description
+
+    def enqueue(self, user, embed) -> asyncio.Future:
+        """Queue a DM; the future resolves to True once delivered, False if given up"""
+        loop = asyncio.get_running_loop()
+        key = self.dedup_key(user, embed)
+
+        existing = self._pending.get(key)
+        if existing is not None:
+            self.deduplicated += 1
+            return existing
+        delivered_at = self._recent.get(key)
+        if delivered_at is not None and time.monotonic() - delivered_at < self.dedup_window:
+            self.deduplicated += 1
+            future = loop.create_future()
+            future.set_result(True)
+            return future
+
+        future = loop.create_future()
+        if len(self._pending) >= self.max_queue:
+            self.dropped += 1
+            logger.warning(f"DM queue full; dropping notification for {user.id}")
+            future.set_result(False)
+            return future
+
+        self._pending[key] = future
+        self._queue.put_nowait({"key": key, "user": user, "embed": embed, "attempts": 0,
+                                "enqueued_at": time.monotonic(), "future": future})
+        self.enqueued += 1
+        return future
+
+    async def deliver(self, user, embed, timeout: float = 5.0) -> bool:
+        """Queue a DM and wait up to `timeout` seconds for it to be delivered"""
+        future = self.enqueue(user, embed)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout=timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            return False
+
+    def start(self):
+        """Start the delivery workers on the running loop"""
+        self._tasks = [task for task in self._tasks if not task.done()]
+        if not self._tasks:
+            # A queue is bound to the loop it first waited on; carry over items enqueued before start
+            queue, self._queue = self._queue, asyncio.Queue()
+            while not queue.empty():
+                self._queue.put_nowait(queue.get_nowait())
+        while len(self._tasks) < self.workers:
+            self._tasks.append(asyncio.create_task(self._worker()))
+
+    def _finish(self, item: dict, delivered: bool):
+        self._pending.pop(item["key"], None)
+        if delivered:
+            now = time.monotonic()
+            self._recent[item["key"]] = now
+            elapsed_ms = (now - item["enqueued_at"]) * 1000
+            self.delivered += 1
+            self._total_delivery_ms += elapsed_ms
+            self.max_delivery_ms = max(self.max_delivery_ms, elapsed_ms)
+            if len(self._recent) > self.max_queue:
+                cutoff = now - self.dedup_window
+                self._recent = {key: at for key, at in self._recent.items() if at >= cutoff}
+        else:
+            self.failed += 1
+        if not item["future"].done():
+            item["future"].set_result(delivered)
+
+    async def _retry_later(self, item: dict, delay: float):
+        await asyncio.sleep(delay)
+        self._queue.put_nowait(item)
+
+    async def _worker(self):
+        while True:
+            item = await self._queue.get()
+            try:
+                await item["user"].send(embed=item["embed"])
+                self._finish(item, True)
+            except Exception as e:
+                permanent = getattr(e, "status", None) in PERMANENT_STATUSES
+                if permanent or item["attempts"] >= self.max_retries:
+                    if not permanent:
+                        logger.warning(f"Giving up on DM to {item['user'].id}: {e}")
+                    self._finish(item, False)
+                else:
+                    # Retry off the worker so other users' DMs keep flowing
+                    item["attempts"] += 1
+                    self.retried += 1
+                    delay = retry_after(e) or min(self.backoff_initial * (2 ** (item["attempts"] - 1)), self.backoff_max)
+                    task = asyncio.create_task(self._retry_later(item, delay))
+                    self._retry_tasks.add(task)
+                    task.add_done_callback(self._retry_tasks.discard)
+            finally:
+                self._queue.task_done()
+
+    async def close(self, timeout: float = 5.0):
+        """Give queued DMs up to `timeout` seconds, then stop the workers"""
+        deadline = time.monotonic() + timeout
+        while self._pending and self._tasks and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        if self._pending:
+            logger.warning(f"DM queue closed with {len(self._pending)} undelivered notification(s)")
+        tasks = self._tasks + list(self._retry_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+        for future in self._pending.values():
+            if not future.done():
+                future.set_result(False)
+        self._pending.clear()
+        # Callers were just told these weren't delivered; a later start() must not send them
+        while not self._queue.empty():
+            self._queue.get_nowait()
+            self._queue.task_done()
+        logger.info(f"DM queue closed: {self.stats()}")
+
+    def stats(self) -> dict:
+        """Return delivery counters and latency"""
+        return {
+            "enqueued": self.enqueued,
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "retried": self.retried,
+            "deduplicated": self.deduplicated,
+            "dropped": self.dropped,
+            "timeouts": self.timeouts,
+            "pending": len(self._pending),
+            "avg_delivery_ms": round(self._total_delivery_ms / self.delivered, 2) if self.delivered else 0.0,
+            "max_delivery_ms": round(self.max_delivery_ms, 2),
+        }
@@ -0,0 +1,141 @@
+"""
+In-memory spam and flood detection for on_message
+Per-user and per-channel sliding windows kept in fixed-size ring buffers, plus
+a duplicate-content check over a bounded set of recent message hashes.
+Every check is O(1) per message and every table is LRU-bounded.
+"""
+
+import os
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Optional
+
+USER_FLOOD = "user_flood"
+CHANNEL_FLOOD = "channel_flood"
+DUPLICATE = "duplicate"
+
+
+class RateWindow:
+    """Timestamps of the last `limit` events; full and recent means over the limit"""
+
+    __slots__ = ("events",)
+
+    def __init__(self, limit: int):
+        self.events = deque(maxlen=limit)
+
+    def hit(self, now: float, window: float) -> bool:
+        """Record an event; True once `limit` events fall inside `window` seconds"""
+        self.events.append(now)
+        return len(self.events) == self.events.maxlen and now - self.events[0] <= window
+
+    def count_since(self, cutoff: float) -> int:
+        count = 0
+        for timestamp in reversed(self.events):
+            if timestamp < cutoff:
+                break
+            count += 1
+        return count
+
+
+class LRUTable(OrderedDict):
+    """OrderedDict that drops its least recently used key past max_size"""
+
+    def __init__(self, max_size: int):
+        super().__init__()
+        self.max_size = max_size
+        self.evictions = 0
+
+    def touch(self, key, factory):
+        value = self.get(key)
+        if value is None:
+            value = self[key] = factory()
+            if len(self) > self.max_size:
+                self.popitem(last=False)
+                self.evictions += 1
+        else:
+            self.move_to_end(key)
+        return value
+
+
+@dataclass
+class FloodConfig:
+    enabled: bool = True
+    user_limit: int = 6
+    user_window: float = 5.0
+    channel_limit: int = 30
+    channel_window: float = 5.0
+    duplicate_limit: int = 3
+    duplicate_window: float = 30.0
+    timeout_minutes: int = 10
+    max_tracked: int = 100000
+
+    @classmethod
+    def from_env(cls):
+        """Build a config from FLOOD_* environment variables"""
+        return cls(
+            enabled=os.environ.get('FLOOD_ENABLED', 'true').lower() == 'true',
+            user_limit=int(os.environ.get('FLOOD_USER_LIMIT', '6')),
+            user_window=float(os.environ.get('FLOOD_USER_WINDOW', '5')),
+            channel_limit=int(os.environ.get('FLOOD_CHANNEL_LIMIT', '30')),
+            channel_window=float(os.environ.get('FLOOD_CHANNEL_WINDOW', '5')),
+            duplicate_limit=int(os.environ.get('FLOOD_DUPLICATE_LIMIT', '3')),
+            duplicate_window=float(os.environ.get('FLOOD_DUPLICATE_WINDOW', '30')),
+            timeout_minutes=int(os.environ.get('FLOOD_TIMEOUT_MINUTES', '10')),
+            max_tracked=int(os.environ.get('FLOOD_MAX_TRACKED', '100000')),
+        )
+
+
+def content_hash(content: str) -> Optional[int]:
+    """Hash of the normalised text; None for messages without text"""
+    normalized = " ".join(content.lower().split())
+    return hash(normalized) if normalized else None
+
+
+class FloodDetector:
+    """Flags users who flood, or repeat themselves, and users flooding a busy channel"""
+
+    def __init__(self, config: Optional[FloodConfig] = None):
+        self.config = config or FloodConfig()
+        self.users = LRUTable(self.config.max_tracked)
+        self.hashes = LRUTable(self.config.max_tracked)
+        self.channels = LRUTable(max(1, self.config.max_tracked // 10))
+        self.triggered = {USER_FLOOD: 0, CHANNEL_FLOOD: 0, DUPLICATE: 0}
+
+    def check(self, guild_id: int, channel_id: int, user_id: int, content: str, now: float) -> Optional[str]:
+        """Record a message and return the rule it broke, if any"""
+        config = self.config
+        if not config.enabled:
+            return None
+        user_key = (guild_id, user_id)
+
+        user_window = self.users.touch(user_key, lambda: RateWindow(config.user_limit))
+        verdict = USER_FLOOD if user_window.hit(now, config.user_window) else None
+
+        channel_window = self.channels.touch(channel_id, lambda: RateWindow(config.channel_limit))
+        if channel_window.hit(now, config.channel_window) and verdict is None:
+            # While the channel floods, half the usual per-user rate is enough
+            if user_window.count_since(now - config.user_window) >= max(2, config.user_limit // 2):
+                verdict = CHANNEL_FLOOD
+
+        digest = content_hash(content)
+        if digest is not None:
+            duplicates = self.hashes.touch((guild_id, user_id, digest), lambda: RateWindow(config.duplicate_limit))
+            if duplicates.hit(now, config.duplicate_window) and verdict is None:
+                verdict = DUPLICATE
+
+        if verdict is not None:
+            self.triggered[verdict] += 1
+            # Start the user over so one burst produces one action
+            user_window.events.clear()
+            if digest is not None:
+                self.hashes.pop((guild_id, user_id, digest), None)
+        return verdict
+
+    def stats(self) -> dict:
+        return {
+            "tracked_users": len(self.users),
+            "tracked_hashes": len(self.hashes),
+            "tracked_channels": len(self.channels),
+            "evictions": self.users.evictions + self.hashes.evictions + self.channels.evictions,
+            "triggered": dict(self.triggered),
+        }
@@ -0,0 +1,80 @@
+"""
+Layered health checks
+/livez answers without touching anything. /readyz reads the status that
+background probers cached for each dependency and reports how fresh it is.
+A deep check re-runs every prober now; it is single-flight and rate-limited
+so a burst of ?deep=1 requests costs one round of checks.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional
+
+
+@dataclass
+class Dependency:
+    # Returns at least {"ok": bool, "checked_at": unix time or None}
+    status: Callable[[], dict]
+    refresh: Optional[Callable[[], Awaitable]] = None
+    # Cached status older than this (seconds) counts as not ready
+    max_age: Optional[float] = None
+    # Optional dependencies are reported but don't affect readiness
+    required: bool = True
+
+
+class HealthChecks:
+    """Registry of dependencies behind /readyz and deep health checks"""
+
+    def __init__(self, min_deep_interval: float = 10.0):
+        self.min_deep_interval = min_deep_interval
+        self.dependencies: Dict[str, Dependency] = {}
+        self.last_deep_at: Optional[float] = None
+        self._deep_task: Optional[asyncio.Task] = None
+
+    def register(self, name: str, status: Callable[[], dict], refresh: Optional[Callable[[], Awaitable]] = None,
+                 max_age: Optional[float] = None, required: bool = True):
+        self.dependencies[name] = Dependency(status, refresh, max_age, required)
+
+    def readiness(self, now: Optional[float] = None) -> dict:
+        """Cached status of every dependency with its age; ready only if all required ones are fresh and ok"""
+        now = time.time() if now is None else now
+        report = {}
+        ready = True
+        for name, dependency in self.dependencies.items():
+            status = dict(dependency.status())
+            checked_at = status.pop("checked_at", None)
+            age = round(now - checked_at, 1) if checked_at is not None else None
+            stale = dependency.max_age is not None and (age is None or age > dependency.max_age)
+            report[name] = {
+                **status,
+                "checked_at": datetime.utcfromtimestamp(checked_at).isoformat() if checked_at is not None else None,
+                "age_seconds": age,
+                "stale": stale,
+                "required": dependency.required,
+            }
+            if dependency.required and (stale or not status.get("ok")):
+                ready = False
+        return {"ready": ready, "dependencies": report}
+
+    async def _refresh_all(self):
+        refreshes = [dependency.refresh() for dependency in self.dependencies.values() if dependency.refresh]
+        await asyncio.gather(*refreshes, return_exceptions=True)
+
+    async def deep_check(self) -> dict:
+        """Run every prober now, unless one ran within min_deep_interval seconds"""
+        now = time.monotonic()
+        running = self._deep_task is not None and not self._deep_task.done()
+        if not running and self.last_deep_at is not None and now - self.last_deep_at < self.min_deep_interval:
+            return {
+                "performed": False,
+                "retry_after_seconds": round(self.min_deep_interval - (now - self.last_deep_at), 1),
+            }
+        if not running:
+            self.last_deep_at = now
+            self._deep_task = asyncio.create_task(self._refresh_all())
+        started = time.perf_counter()
+        # Concurrent callers share the one in-flight round of checks
+        await asyncio.shield(self._deep_task)
+        return {"performed": True, "waited_ms": round((time.perf_counter() - started) * 1000, 2)}
@@ -1,14 +1,35 @@
 #!/usr/bin/env python3
 """
 Health Monitor Script for Render Deployment
-This script can be run periodically to keep the service alive and monitor its health
+Probes every endpoint of every target concurrently over one pooled aiohttp
+session, keeps p50/p95/p99 latency over a rolling window, appends one compact
+JSON line per round to an on-disk time series and alerts when thresholds are
+crossed. Keeps the service awake as a side effect.
+
+Configuration (environment):
+  MONITOR_TARGETS        comma-separated base URLs (default: SERVICE_URL or http://localhost:10000)
+  MONITOR_ENDPOINTS      comma-separated paths (default: /livez,/readyz)
+  CHECK_INTERVAL_SECONDS seconds between rounds (default: CHECK_INTERVAL_MINUTES * 60, i.e. 300)
+  MONITOR_TIMEOUT        per-request timeout in seconds (default: 10)
+  MONITOR_WINDOW_SECONDS rolling window for the statistics (default: 3600)
+  MONITOR_SERIES_FILE    time series path (default: health_series.jsonl next to this file)
+  MONITOR_ALERT_P95_MS, MONITOR_ALERT_ERROR_RATE, MONITOR_ALERT_CONSECUTIVE_FAILURES
+  MONITOR_ALERT_WEBHOOK  optional Discord webhook URL that receives alert messages
 """
 
-import requests
-import time
+import argparse
+import asyncio
+import json
 import logging
+import math
 import os
-from datetime import datetime
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import aiohttp
 
 # Configure logging
 logging.basicConfig(
@@ -18,75 +39,270 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
-def ping_service(base_url):
-    """Ping the service to keep it alive"""
-    try:
-        # Health check endpoint
-        health_response = requests.get(f"{base_url}/api/health", timeout=30)
-        health_data = health_response.json()
-        
-        logger.info("✅ Health Check Response:")
-        logger.info(f"  - Status: {health_data.get('status')}")
-        logger.info(f"  - Bot Status: {health_data.get('bot_status')}")
-        logger.info(f"  - Database: {health_data.get('database_status')}")
-        
-        if health_data.get('system_resources'):
-            resources = health_data['system_resources']
-            logger.info(f"  - Memory: {resources.get('memory_mb')} MB")
-            logger.info(f"  - CPU: {resources.get('cpu_percent')}%")
-        
-        # Keep-alive ping
-        keep_alive_response = requests.get(f"{base_url}/api/keep-alive", timeout=10)
-        if keep_alive_response.status_code == 200:
-            logger.info("✅ Keep-alive ping successful")
-        
-        return True
-        
-    except requests.exceptions.RequestException as e:
-        logger.error(f"❌ Service ping failed: {e}")
-        return False
-    except Exception as e:
-        logger.error(f"❌ Unexpected error: {e}")
-        return False
-
-def monitor_service(base_url, interval_minutes=5):
-    """Monitor service health at regular intervals"""
-    logger.info(f"🔍 Starting health monitor for {base_url}")
-    logger.info(f"📅 Check interval: {interval_minutes} minutes")
-    
-    consecutive_failures = 0
-    max_failures = 3
-    
-    while True:
+DEFAULT_SERIES_FILE = Path(__file__).parent / "health_series.jsonl"
+
+
+def percentile(sorted_values: List[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class LatencyWindow:
+    """Probe results from the last `window_seconds` seconds"""
+
+    def __init__(self, window_seconds: float = 3600.0):
+        self.window_seconds = window_seconds
+        # (timestamp, latency_ms, ok)
+        self.samples = deque()
+        self.consecutive_failures = 0
+        self.last_status: Optional[int] = None
+        self.last_error: Optional[str] = None
+
+    def add(self, timestamp: float, latency_ms: float, ok: bool, status: Optional[int] = None,
+            error: Optional[str] = None):
+        self.samples.append((timestamp, latency_ms, ok))
+        self.consecutive_failures = 0 if ok else self.consecutive_failures + 1
+        self.last_status = status
+        self.last_error = error
+        self.prune(timestamp)
+
+    def prune(self, now: float):
+        cutoff = now - self.window_seconds
+        while self.samples and self.samples[0][0] < cutoff:
+            self.samples.popleft()
+
+    def stats(self) -> dict:
+        # Failed requests often end at the timeout; only successful ones describe latency
+        latencies = sorted(latency for _, latency, ok in self.samples if ok)
+        errors = sum(1 for _, _, ok in self.samples if not ok)
+        return {
+            "count": len(self.samples),
+            "errors": errors,
+            "error_rate": round(errors / len(self.samples), 4) if self.samples else 0.0,
+            "p50_ms": percentile(latencies, 0.50),
+            "p95_ms": percentile(latencies, 0.95),
+            "p99_ms": percentile(latencies, 0.99),
+            "consecutive_failures": self.consecutive_failures,
+            "last_status": self.last_status,
+        }
+
+
+@dataclass
+class AlertThresholds:
+    p95_ms: Optional[float] = 2000.0
+    error_rate: Optional[float] = 0.2
+    consecutive_failures: Optional[int] = 3
+    # Don't judge p95/error rate on fewer samples than this
+    min_samples: int = 5
+
+    @classmethod
+    def from_env(cls):
+        """Build thresholds from MONITOR_ALERT_* environment variables; 0 disables one"""
+        def setting(name: str, default: str, cast):
+            value = cast(os.environ.get(name, default))
+            return value or None
+
+        return cls(
+            p95_ms=setting('MONITOR_ALERT_P95_MS', '2000', float),
+            error_rate=setting('MONITOR_ALERT_ERROR_RATE', '0.2', float),
+            consecutive_failures=setting('MONITOR_ALERT_CONSECUTIVE_FAILURES', '3', int),
+            min_samples=int(os.environ.get('MONITOR_ALERT_MIN_SAMPLES', '5')),
+        )
+
+    def breaches(self, stats: dict) -> List[str]:
+        """Human-readable reasons the stats cross a threshold"""
+        reasons = []
+        if self.consecutive_failures and stats["consecutive_failures"] >= self.consecutive_failures:
+            reasons.append(f"{stats['consecutive_failures']} consecutive failures")
+        if stats["count"] >= self.min_samples:
+            if self.error_rate and stats["error_rate"] >= self.error_rate:
+                reasons.append(f"error rate {stats['error_rate']:.0%}")
+            if self.p95_ms and stats["p95_ms"] is not None and stats["p95_ms"] >= self.p95_ms:
+                reasons.append(f"p95 {stats['p95_ms']:.0f}ms")
+        return reasons
+
+
+class SeriesWriter:
+    """Appends one compact JSON line per round, rotating to .1 past max_bytes"""
+
+    def __init__(self, path: Path, max_bytes: int = 5 * 1024 * 1024):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+
+    def append(self, timestamp: float, stats: Dict[str, dict]):
+        # {"t": unix, "s": {"<url>": [count, errors, p50, p95, p99, last_status]}}
+        line = json.dumps({
+            "t": round(timestamp, 3),
+            "s": {
+                key: [s["count"], s["errors"], s["p50_ms"], s["p95_ms"], s["p99_ms"], s["last_status"]]
+                for key, s in stats.items()
+            },
+        }, separators=(",", ":"))
         try:
-            logger.info(f"⏰ Health check at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-            
-            if ping_service(base_url):
-                consecutive_failures = 0
-                logger.info(f"😴 Sleeping for {interval_minutes} minutes...")
-            else:
-                consecutive_failures += 1
-                logger.warning(f"⚠️ Consecutive failures: {consecutive_failures}/{max_failures}")
-                
-                if consecutive_failures >= max_failures:
-                    logger.error("🚨 Service appears to be down after multiple checks!")
-                    # You could add notification logic here (email, webhook, etc.)
-            
-            time.sleep(interval_minutes * 60)
-            
-        except KeyboardInterrupt:
-            logger.info("⏹️ Health monitor stopped by user")
-            break
-        except Exception as e:
-            logger.error(f"💥 Monitor error: {e}")
-            time.sleep(60)  # Wait 1 minute before retrying
+            with open(self.path, "a", encoding="utf-8") as handle:
+                handle.write(line + "\n")
+                size = handle.tell()
+            if size >= self.max_bytes:
+                self.path.replace(Path(f"{self.path}.1"))
+        except OSError as e:
+            logger.warning(f"Could not write health series: {e}")
 
-if __name__ == "__main__":
-    # Default to localhost for testing, but can be overridden
-    service_url = os.environ.get('SERVICE_URL', 'http://localhost:10000')
-    interval = int(os.environ.get('CHECK_INTERVAL_MINUTES', '5'))
-    
+
+def read_series(path: Path) -> List[dict]:
+    """Parse a series file back into {"t", "s": {url: stats}} rows"""
+    fields = ("count", "errors", "p50_ms", "p95_ms", "p99_ms", "last_status")
+    rows = []
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            row = json.loads(line)
+            rows.append({"t": row["t"], "s": {key: dict(zip(fields, values)) for key, values in row["s"].items()}})
+    return rows
+
+
+class HealthMonitor:
+    """Concurrent prober for several endpoints on several targets"""
+
+    def __init__(self, targets: List[str], endpoints: List[str], interval: float = 300.0,
+                 timeout: float = 10.0, window_seconds: float = 3600.0,
+                 thresholds: Optional[AlertThresholds] = None, series: Optional[SeriesWriter] = None,
+                 alert_webhook: Optional[str] = None):
+        self.urls = [f"{target.rstrip('/')}{endpoint}" for target in targets for endpoint in endpoints]
+        self.interval = interval
+        self.timeout = timeout
+        self.thresholds = thresholds or AlertThresholds()
+        self.series = series
+        self.alert_webhook = alert_webhook
+        self.windows: Dict[str, LatencyWindow] = {url: LatencyWindow(window_seconds) for url in self.urls}
+        # url -> reasons currently alerting
+        self.alerts: Dict[str, List[str]] = {}
+        self.rounds = 0
+
+    @classmethod
+    def from_env(cls):
+        """Build a monitor from SERVICE_URL / MONITOR_* environment variables"""
+        targets = os.environ.get('MONITOR_TARGETS') or os.environ.get('SERVICE_URL', 'http://localhost:10000')
+        interval = os.environ.get('CHECK_INTERVAL_SECONDS')
+        if interval is None:
+            interval = float(os.environ.get('CHECK_INTERVAL_MINUTES', '5')) * 60
+        return cls(
+            targets=[t.strip() for t in targets.split(",") if t.strip()],
+            endpoints=[e.strip() for e in os.environ.get('MONITOR_ENDPOINTS', '/livez,/readyz').split(",") if e.strip()],
+            interval=float(interval),
+            timeout=float(os.environ.get('MONITOR_TIMEOUT', '10')),
+            window_seconds=float(os.environ.get('MONITOR_WINDOW_SECONDS', '3600')),
+            thresholds=AlertThresholds.from_env(),
+            series=SeriesWriter(Path(os.environ.get('MONITOR_SERIES_FILE', str(DEFAULT_SERIES_FILE))),
+                                int(os.environ.get('MONITOR_SERIES_MAX_BYTES', str(5 * 1024 * 1024)))),
+            alert_webhook=os.environ.get('MONITOR_ALERT_WEBHOOK') or None,
+        )
+
+    def session(self) -> aiohttp.ClientSession:
+        """One pooled, keep-alive session for every probe"""
+        # A connection per URL plus one for the alert webhook, so no probe's latency
+        # includes time spent queued for a free connection
+        return aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=len(self.urls) + 1, ttl_dns_cache=300),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+
+    async def probe(self, session: aiohttp.ClientSession, url: str):
+        started = time.perf_counter()
+        status, error = None, None
+        try:
+            async with session.get(url) as response:
+                await response.read()
+                status = response.status
+        except asyncio.TimeoutError:
+            error = "timeout"
+        except aiohttp.ClientError as e:
+            error = repr(e)
+        latency_ms = round((time.perf_counter() - started) * 1000, 2)
+        ok = status is not None and status < 400
+        self.windows[url].add(time.time(), latency_ms, ok, status, error)
+        if not ok:
+            logger.warning(f"❌ {url}: {error or f'HTTP {status}'} after {latency_ms:.0f}ms")
+
+    async def check_round(self, session: aiohttp.ClientSession) -> Dict[str, dict]:
+        """Probe every URL concurrently, then update alerts and the time series"""
+        await asyncio.gather(*(self.probe(session, url) for url in self.urls))
+        self.rounds += 1
+        now = time.time()
+        stats = {}
+        for url, window in self.windows.items():
+            window.prune(now)
+            stats[url] = window.stats()
+        if self.series is not None:
+            # File append and rotation are blocking; keep them off the event loop
+            await asyncio.to_thread(self.series.append, now, stats)
+        await self._update_alerts(session, stats)
+        for url, s in stats.items():
+            logger.info(f"{'✅' if s['consecutive_failures'] == 0 else '⚠️'} {url}: "
+                        f"p50={s['p50_ms']}ms p95={s['p95_ms']}ms p99={s['p99_ms']}ms "
+                        f"errors={s['errors']}/{s['count']}")
+        return stats
+
+    async def _update_alerts(self, session: aiohttp.ClientSession, stats: Dict[str, dict]):
+        for url, s in stats.items():
+            reasons = self.thresholds.breaches(s)
+            was_alerting = url in self.alerts
+            if reasons and not was_alerting:
+                self.alerts[url] = reasons
+                await self.alert(session, f"🚨 {url} is unhealthy: {', '.join(reasons)}")
+            elif reasons:
+                self.alerts[url] = reasons
+            elif was_alerting:
+                del self.alerts[url]
+                await self.alert(session, f"✅ {url} recovered")
+
+    async def alert(self, session: aiohttp.ClientSession, message: str):
+        logger.warning(message)
+        if not self.alert_webhook:
+            return
+        try:
+            async with session.post(self.alert_webhook, json={"content": message}) as response:
+                if response.status >= 400:
+                    logger.warning(f"Alert webhook returned {response.status}")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"Alert webhook failed: {e!r}")
+
+    async def run(self, stop_event: Optional[asyncio.Event] = None, rounds: Optional[int] = None):
+        """Probe every `interval` seconds until stop_event is set or `rounds` rounds ran"""
+        stop_event = stop_event or asyncio.Event()
+        logger.info(f"🔍 Monitoring {len(self.urls)} endpoint(s) every {self.interval:g}s")
+        async with self.session() as session:
+            while not stop_event.is_set():
+                started = time.monotonic()
+                try:
+                    await self.check_round(session)
+                except Exception as e:
+                    logger.error(f"💥 Monitor error: {e}")
+                if rounds is not None and self.rounds >= rounds:
+                    break
+                # Rounds start on a fixed cadence regardless of how long probing took
+                delay = max(0.0, self.interval - (time.monotonic() - started))
+                try:
+                    await asyncio.wait_for(stop_event.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Probe the service's health endpoints")
+    parser.add_argument("--once", action="store_true", help="Run a single round and exit")
+    args = parser.parse_args()
+
+    monitor = HealthMonitor.from_env()
     logger.info("🚀 Discord Bot Health Monitor")
-    logger.info(f"🎯 Target URL: {service_url}")
-    
-    monitor_service(service_url, interval)
\ No newline at end of file
+    for url in monitor.urls:
+        logger.info(f"🎯 Target URL: {url}")
+    try:
+        asyncio.run(monitor.run(rounds=1 if args.once else None))
+    except KeyboardInterrupt:
+        logger.info("⏹️ Health monitor stopped by user")
+
+
+if __name__ == "__main__":
+    main()
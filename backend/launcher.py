@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Single launcher for the web service and the Discord bot
+Heavy modules (discord, motor, psutil, uvicorn, server, discord_bot) are only
+imported by the mode that needs them, the Mongo ping and Discord token check
+run in parallel, and every startup phase is timed for /api/health.
+
+Usage: python launcher.py [all|web|bot]   (default: all)
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+PROCESS_STARTED = time.perf_counter()
+
+# `python launcher.py` runs this file as __main__; make `import launcher` (as
+# server.py does for the timings) return this module rather than a second copy
+sys.modules.setdefault("launcher", sys.modules[__name__])
+
+ROOT_DIR = Path(__file__).parent
+sys.path.insert(0, str(ROOT_DIR))
+
+REQUIRED_ENV = {
+    "all": ("DISCORD_BOT_TOKEN", "MONGO_URL", "DB_NAME"),
+    "web": ("MONGO_URL", "DB_NAME"),
+    "bot": ("DISCORD_BOT_TOKEN", "MONGO_URL", "DB_NAME"),
+}
+
+logger = logging.getLogger("launcher")
+
+
+class StartupTimings:
+    """Milliseconds spent in each startup phase, shared with the health endpoint"""
+
+    def __init__(self):
+        self.mode: Optional[str] = None
+        self.phases: Dict[str, float] = {}
+        self.checks: Dict[str, dict] = {}
+        self.ready_ms: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def record(self, phase: str, started: float):
+        with self._lock:
+            self.phases[phase] = round((time.perf_counter() - started) * 1000, 2)
+
+    def phase(self, name: str):
+        return _Phase(self, name)
+
+    def mark_ready(self):
+        """Time from process start until the service can take requests"""
+        if self.ready_ms is None:
+            self.ready_ms = round((time.perf_counter() - PROCESS_STARTED) * 1000, 2)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "phases_ms": dict(self.phases),
+                "checks": dict(self.checks),
+                "ready_ms": self.ready_ms,
+            }
+
+
+class _Phase:
+
+    def __init__(self, timings: StartupTimings, name: str):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timings.record(self.name, self.started)
+        return False
+
+
+startup_timings = StartupTimings()
+
+
+def configure_logging():
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[logging.StreamHandler(sys.stdout)]
+    )
+
+
+def check_environment(mode: str) -> bool:
+    """Check the environment variables the mode needs"""
+    missing = [var for var in REQUIRED_ENV[mode] if not os.environ.get(var)]
+    if missing:
+        logger.error(f"Missing required environment variables: {', '.join(missing)}")
+        logger.error("Please set these variables in your Render dashboard:")
+        for var in missing:
+            logger.error(f"  - {var}")
+        return False
+    logger.info("✅ All required environment variables are set")
+    logger.info(f"DB_NAME: {os.environ.get('DB_NAME')}")
+    logger.info(f"PORT: {os.environ.get('PORT', '10000')}")
+    return True
+
+
+def log_system_resources():
+    """Log process and system memory/CPU"""
+    try:
+        import psutil
+        process = psutil.Process()
+        logger.info(f"📊 Memory: {process.memory_info().rss / 1024 / 1024:.2f} MB, "
+                    f"CPU: {process.cpu_percent():.2f}%, System memory: {psutil.virtual_memory().percent:.1f}% used")
+    except Exception as e:
+        logger.warning(f"Could not log system resources: {e}")
+
+
+# Readiness checks
+
+async def _timed_check(name: str, check) -> dict:
+    started = time.perf_counter()
+    try:
+        result = {"ok": True, **(await check() or {})}
+    except Exception as e:
+        result = {"ok": False, "error": str(e)}
+    result["ms"] = round((time.perf_counter() - started) * 1000, 2)
+    startup_timings.checks[name] = result
+    return result
+
+
+async def ping_mongo(timeout_ms: int = 5000):
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'], serverSelectionTimeoutMS=timeout_ms)
+    try:
+        await client.admin.command('ping')
+    finally:
+        client.close()
+
+
+async def validate_discord_token(timeout: float = 5.0):
+    """Ask Discord who the token belongs to; raises only for a rejected token"""
+    import aiohttp
+
+    token = os.environ['DISCORD_BOT_TOKEN']
+    try:
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+            async with session.get("https://discord.com/api/v10/users/@me",
+                                   headers={"Authorization": f"Bot {token}"}) as response:
+                if response.status == 401:
+                    raise ValueError("Discord rejected DISCORD_BOT_TOKEN (401)")
+                if response.status == 200:
+                    return {"user": (await response.json()).get("username")}
+                return {"warning": f"unexpected status {response.status}"}
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        # Network trouble isn't a bad token; let the bot retry on its own
+        return {"warning": f"could not reach Discord: {e!r}"}
+
+
+async def preflight(mode: str) -> dict:
+    """Run the readiness checks for `mode` concurrently"""
+    checks = {"mongo": _timed_check("mongo", ping_mongo)}
+    if mode in ("all", "bot"):
+        checks["discord_token"] = _timed_check("discord_token", validate_discord_token)
+    results = await asyncio.gather(*checks.values())
+    return dict(zip(checks, results))
+
+
+def run_preflight_in_thread(mode: str):
+    """Start preflight on its own loop; the returned thread's .result holds the checks"""
+    def target():
+        with startup_timings.phase("preflight"):
+            thread.result = asyncio.run(preflight(mode))
+
+    thread = threading.Thread(target=target, name="preflight", daemon=True)
+    thread.result = {}
+    thread.start()
+    return thread
+
+
+# Discord bot
+
+app_shutdown = threading.Event()
+
+
+def run_bot_with_recovery(max_retries: int = 5, backoff: float = 30):
+    """Run the Discord bot, restarting it with a growing delay after crashes"""
+    with startup_timings.phase("import_discord_bot"):
+        from discord_bot import run_discord_bot
+        from database import client as mongo_client
+
+    async def attempts():
+        retry_count = 0
+        while not app_shutdown.is_set() and retry_count < max_retries:
+            try:
+                logger.info(f"🤖 Starting Discord bot (attempt {retry_count + 1}/{max_retries})")
+                # The shared Mongo client has to outlive a crashed attempt
+                await run_discord_bot(close_client=False)
+            except Exception as e:
+                retry_count += 1
+                logger.error(f"❌ Discord bot crashed: {e}")
+                if retry_count < max_retries and not app_shutdown.is_set():
+                    wait_time = min(backoff * retry_count, 300)
+                    logger.info(f"🔄 Retrying in {wait_time} seconds...")
+                    await asyncio.to_thread(app_shutdown.wait, wait_time)
+                else:
+                    logger.error(f"💥 Bot failed after {max_retries} attempts")
+                    break
+
+    try:
+        # One loop for every attempt: Motor binds the client to the loop it first ran on
+        asyncio.run(attempts())
+    finally:
+        mongo_client.close()
+    logger.info("🛑 Bot thread terminated")
+
+
+def keep_alive_loop(interval: float = 300):
+    """Self-ping so Render's free tier doesn't spin the service down"""
+    import urllib.request
+
+    url = f"http://localhost:{os.environ.get('PORT', '10000')}/livez"
+    ping_count = 0
+    while not app_shutdown.wait(interval):
+        ping_count += 1
+        try:
+            with urllib.request.urlopen(url, timeout=5) as response:
+                logger.info(f"💓 Self-ping #{ping_count} returned {response.status}")
+        except Exception as e:
+            logger.warning(f"⚠️ Self-ping failed: {e}")
+        if ping_count % 6 == 0:
+            log_system_resources()
+
+
+# Web server
+
+def run_web(checks: threading.Thread):
+    with startup_timings.phase("import_server"):
+        import uvicorn
+        from server import app
+
+    # Usually finished by now; a rejected token keeps the in-process bot from starting
+    checks.join()
+    token = checks.result.get("discord_token", {})
+    if token.get("ok") is False:
+        logger.error(f"❌ Not starting the bot: {token['error']}")
+        os.environ["BOT_AUTOSTART"] = "false"
+
+    port = int(os.environ.get('PORT', 10000))
+    logger.info(f"🌐 Starting FastAPI web server on port {port}...")
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=port,
+        log_level="warning" if os.environ.get('RENDER') else "info",
+        access_log=not os.environ.get('RENDER'),
+        timeout_keep_alive=30,
+        timeout_graceful_shutdown=30,
+        loop="asyncio"
+    )
+
+
+def main(mode: str = "all"):
+    if mode not in REQUIRED_ENV:
+        raise SystemExit(f"Unknown mode {mode!r}; expected one of {', '.join(REQUIRED_ENV)}")
+    startup_timings.mode = mode
+
+    with startup_timings.phase("environment"):
+        configure_logging()
+        from dotenv import load_dotenv
+        load_dotenv(ROOT_DIR / '.env')
+        if not check_environment(mode):
+            sys.exit(1)
+
+    logger.info(f"🚀 Starting in '{mode}' mode")
+    # Checks run while this thread imports the server
+    checks = run_preflight_in_thread(mode)
+
+    try:
+        if mode == "bot":
+            checks.join()
+            if checks.result.get("discord_token", {}).get("ok") is False:
+                logger.error(f"❌ {checks.result['discord_token']['error']}")
+                sys.exit(1)
+            run_bot_with_recovery()
+            return
+
+        if mode == "all":
+            # The bot runs as a task in the API's lifespan, on the same loop and Mongo client
+            os.environ.setdefault("BOT_RUNTIME", "inprocess")
+            os.environ.setdefault("BOT_AUTOSTART", "true")
+            threading.Thread(target=keep_alive_loop, name="keep-alive", daemon=True).start()
+
+        run_web(checks)
+    except KeyboardInterrupt:
+        logger.info("⏹️ Service stopped by user")
+    finally:
+        app_shutdown.set()
+        logger.info("🧹 Cleanup completed")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else "all")
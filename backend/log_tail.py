@@ -0,0 +1,108 @@
+"""
+Log tailing without reading whole files
+Reverse-seeks from the end for the last N lines and resumes from a byte-offset
+cursor for new lines, following rotation to <file>.1
+"""
+
+import os
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+BLOCK_SIZE = 8192
+# Upper bound on bytes returned by one read_since call
+MAX_READ_BYTES = 1024 * 1024
+
+
+def make_cursor(inode: int, offset: int) -> str:
+    return f"{inode}-{offset}"
+
+
+def parse_cursor(cursor: str) -> Tuple[int, int]:
+    """Split a cursor into (inode, offset); raises ValueError when malformed"""
+    inode, offset = cursor.split("-", 1)
+    inode, offset = int(inode), int(offset)
+    if offset < 0:
+        raise ValueError("Negative offset")
+    return inode, offset
+
+
+def _decode(chunk: bytes) -> List[str]:
+    return [line.decode("utf-8", errors="replace").rstrip("\r") for line in chunk.split(b"\n")]
+
+
+def tail_lines(path: Path, count: int, block_size: int = BLOCK_SIZE) -> Tuple[List[str], str]:
+    """Last `count` complete lines of a file and the cursor just after them"""
+    with open(path, "rb") as f:
+        inode = os.fstat(f.fileno()).st_ino
+        position = f.seek(0, os.SEEK_END)
+        buffer = b""
+        # count + 1 newlines guarantee `count` whole lines inside the buffer
+        while position > 0 and buffer.count(b"\n") <= count:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            buffer = f.read(read_size) + buffer
+
+    # Ignore a trailing partial line that is still being written
+    complete_end = buffer.rfind(b"\n")
+    if complete_end == -1:
+        return [], make_cursor(inode, position)
+    lines = _decode(buffer[:complete_end])
+    if position > 0:
+        # The first fragment started before the buffer
+        lines = lines[1:]
+    return lines[-count:], make_cursor(inode, position + complete_end + 1)
+
+
+def _read_from(path: Path, offset: int, max_bytes: int, max_lines: Optional[int] = None) -> Tuple[List[str], int]:
+    """Complete lines from `offset` (at most `max_lines`), plus the offset after the last one returned"""
+    if max_lines == 0:
+        return [], offset
+    with open(path, "rb") as f:
+        f.seek(offset)
+        chunk = f.read(max_bytes)
+    complete_end = chunk.rfind(b"\n")
+    if complete_end == -1:
+        if len(chunk) >= max_bytes:
+            # A single line longer than max_bytes; hand it out in pieces
+            return _decode(chunk), offset + len(chunk)
+        return [], offset
+    if max_lines is not None:
+        raw_lines = chunk[:complete_end].split(b"\n")
+        if len(raw_lines) > max_lines:
+            # Stop after the last returned line so the rest is read next time
+            complete_end = sum(len(line) + 1 for line in raw_lines[:max_lines]) - 1
+    return _decode(chunk[:complete_end]), offset + complete_end + 1
+
+
+def read_since(path: Path, cursor: Optional[str], max_bytes: int = MAX_READ_BYTES,
+               max_lines: Optional[int] = None) -> Tuple[List[str], str, bool]:
+    """New complete lines since `cursor`; returns (lines, next_cursor, rotated)
+
+    If the file was rotated since the cursor was issued, the rest of the rotated
+    file (<path>.1) is returned first, then the new file from the beginning.
+    The cursor always ends at the last line returned, so lines beyond
+    `max_lines` come back on the next call.
+    """
+    stat = os.stat(path)
+    if cursor is None:
+        return [], make_cursor(stat.st_ino, stat.st_size), False
+
+    inode, offset = parse_cursor(cursor)
+    if inode == stat.st_ino and offset <= stat.st_size:
+        lines, offset = _read_from(path, offset, max_bytes, max_lines)
+        return lines, make_cursor(inode, offset), False
+
+    # Rotated (new inode) or truncated (shorter than the cursor)
+    lines = []
+    rotated_path = Path(f"{path}.1")
+    if inode != stat.st_ino and rotated_path.exists() and os.stat(rotated_path).st_ino == inode:
+        old_lines, old_offset = _read_from(rotated_path, offset, max_bytes, max_lines)
+        lines.extend(old_lines)
+        if old_offset < os.stat(rotated_path).st_size and len(old_lines) > 0:
+            # More left in the rotated file than one read allows; resume there next time
+            return lines, make_cursor(inode, old_offset), True
+    remaining = None if max_lines is None else max_lines - len(lines)
+    new_lines, new_offset = _read_from(path, 0, max_bytes, remaining)
+    lines.extend(new_lines)
+    return lines, make_cursor(stat.st_ino, new_offset), True
@@ -0,0 +1,94 @@
+"""
+Member join/leave ledger and growth reports
+Growth is aggregated over the event window instead of scanning guild.members
+"""
+
+from datetime import datetime, timedelta
+from typing import Optional
+
+from pymongo import ASCENDING
+
+from activity_rollups import day_start
+
+MEMBER_EVENTS_COLLECTION = "member_events"
+
+JOIN = "join"
+LEAVE = "leave"
+
+
+def build_member_event(guild_id: int, user_id: int, event_type: str, is_bot: bool = False,
+                       timestamp: Optional[datetime] = None) -> dict:
+    timestamp = timestamp or datetime.utcnow()
+    return {
+        "guild_id": guild_id,
+        "user_id": user_id,
+        "type": event_type,
+        "bot": is_bot,
+        "timestamp": timestamp,
+        # Stored so the daily series groups on a plain field
+        "day": day_start(timestamp)
+    }
+
+
+async def record_member_event(collection, member, event_type: str):
+    """Append a join/leave event for a discord.Member"""
+    await collection.insert_one(build_member_event(member.guild.id, member.id, event_type, member.bot))
+
+
+def _daily_series(rows, start: datetime, end: datetime) -> list:
+    """One entry per day in [start, end], zero-filled"""
+    by_day = {}
+    for row in rows:
+        entry = by_day.setdefault(row["_id"]["day"], {JOIN: 0, LEAVE: 0})
+        entry[row["_id"]["type"]] = row["count"]
+
+    series = []
+    day = day_start(start)
+    while day <= end:
+        counts = by_day.get(day, {JOIN: 0, LEAVE: 0})
+        series.append({
+            "day": day.strftime("%Y-%m-%d"),
+            "joins": counts[JOIN],
+            "leaves": counts[LEAVE],
+            "net": counts[JOIN] - counts[LEAVE]
+        })
+        day += timedelta(days=1)
+    return series
+
+
+async def growth_report(collection, guild_id: Optional[int], days: int = 30,
+                        member_count: Optional[int] = None, now: Optional[datetime] = None) -> dict:
+    """Joins, leaves, net growth, churn and a daily series for the last `days` days
+
+    `member_count` (current members) is needed for the churn rate, which is
+    leaves divided by the membership at the start of the window.
+    """
+    now = now or datetime.utcnow()
+    since = now - timedelta(days=days)
+    match = {"timestamp": {"$gte": since}}
+    if guild_id:
+        match["guild_id"] = guild_id
+
+    pipeline = [
+        {"$match": match},
+        {"$group": {"_id": {"day": "$day", "type": "$type"}, "count": {"$sum": 1}}},
+        {"$sort": {"_id.day": ASCENDING}}
+    ]
+    rows = await collection.aggregate(pipeline).to_list(length=None)
+
+    series = _daily_series(rows, since, now)
+    joins = sum(row["count"] for row in rows if row["_id"]["type"] == JOIN)
+    leaves = sum(row["count"] for row in rows if row["_id"]["type"] == LEAVE)
+    report = {
+        "guild_id": guild_id,
+        "days": days,
+        "joins": joins,
+        "leaves": leaves,
+        "net_growth": joins - leaves,
+        "daily_series": series
+    }
+    if member_count is not None:
+        members_at_start = member_count - report["net_growth"]
+        report["members_at_start"] = members_at_start
+        report["churn_rate"] = round(leaves / members_at_start, 4) if members_at_start > 0 else 0.0
+    return report
@@ -0,0 +1,68 @@
+"""
+Moderation analytics shared by the REST API and the slash commands
+All counting happens in MongoDB aggregation pipelines; only summaries cross the wire
+"""
+
+from datetime import datetime
+from typing import Optional
+
+from pymongo import DESCENDING
+
+
+def _match(guild_id: Optional[int], since: Optional[datetime] = None) -> dict:
+    match = {}
+    if guild_id:
+        match["guild_id"] = guild_id
+    if since:
+        match["timestamp"] = {"$gte": since}
+    return match
+
+
+async def action_type_counts(collection, guild_id: Optional[int] = None,
+                             since: Optional[datetime] = None) -> dict:
+    """Count moderation actions per action_type, most frequent first"""
+    pipeline = [
+        {"$match": _match(guild_id, since)},
+        {"$group": {"_id": "$action_type", "count": {"$sum": 1}}},
+        {"$sort": {"count": DESCENDING, "_id": 1}}
+    ]
+    rows = await collection.aggregate(pipeline).to_list(length=None)
+    return {row["_id"]: row["count"] for row in rows}
+
+
+async def violations_report(collection, guild_id: Optional[int] = None, top: int = 10,
+                            since: Optional[datetime] = None) -> dict:
+    """Total, per-type counts and top-N violators in a single round-trip"""
+    pipeline = [
+        {"$match": _match(guild_id, since)},
+        {"$facet": {
+            "types": [
+                {"$group": {"_id": "$action_type", "count": {"$sum": 1}}},
+                {"$sort": {"count": DESCENDING, "_id": 1}}
+            ],
+            "violators": [
+                {"$group": {"_id": "$target_user_id", "count": {"$sum": 1}}},
+                {"$sort": {"count": DESCENDING, "_id": 1}},
+                {"$limit": top}
+            ]
+        }}
+    ]
+    rows = await collection.aggregate(pipeline).to_list(length=1)
+    facets = rows[0] if rows else {"types": [], "violators": []}
+
+    violation_types = {row["_id"]: row["count"] for row in facets["types"]}
+    return {
+        "guild_id": guild_id,
+        "total_violations": sum(violation_types.values()),
+        "violation_types": violation_types,
+        "top_violators": [{"user_id": row["_id"], "count": row["count"]} for row in facets["violators"]]
+    }
+
+
+async def daily_summary(collection, guild_id: Optional[int], day: datetime) -> dict:
+    """Moderation actions recorded since the start of `day`"""
+    moderation_actions = await action_type_counts(collection, guild_id, since=day)
+    return {
+        "moderation_actions": moderation_actions,
+        "total_moderation_actions": sum(moderation_actions.values())
+    }
@@ -0,0 +1,78 @@
+"""
+Keyset pagination on (timestamp, id) and NDJSON streaming exports
+Pages are addressed by an opaque cursor, so deep pages cost the same as the first
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import AsyncIterator, Optional, Tuple
+
+from pymongo import DESCENDING
+
+SORT_KEYS = [("timestamp", DESCENDING), ("id", DESCENDING)]
+
+# Never send Mongo's ObjectId to clients
+DEFAULT_PROJECTION = {"_id": 0}
+
+
+def encode_cursor(timestamp: datetime, doc_id: str) -> str:
+    """Encode the position after a document as an opaque token"""
+    raw = json.dumps({"t": timestamp.isoformat(), "i": doc_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Tuple[datetime, str]:
+    """Decode a cursor token; raises ValueError if it was not produced by encode_cursor"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(data["t"]), str(data["i"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def after_cursor(query: dict, cursor: Optional[str]) -> dict:
+    """Restrict a query to documents that sort after the cursor position"""
+    if not cursor:
+        return query
+    timestamp, doc_id = decode_cursor(cursor)
+    position = {"$or": [
+        {"timestamp": {"$lt": timestamp}},
+        {"timestamp": timestamp, "id": {"$lt": doc_id}}
+    ]}
+    return {"$and": [query, position]} if query else position
+
+
+async def fetch_page(collection, query: dict, limit: int, cursor: Optional[str] = None,
+                     projection: Optional[dict] = None) -> Tuple[list, Optional[str]]:
+    """Return one page of documents, newest first, plus the cursor for the next page"""
+    docs = await collection.find(
+        after_cursor(query, cursor), projection or DEFAULT_PROJECTION
+    ).sort(SORT_KEYS).limit(limit + 1).to_list(length=limit + 1)
+
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(docs[-1]["timestamp"], docs[-1]["id"])
+    return docs, next_cursor
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def to_json_line(doc: dict) -> str:
+    return json.dumps(doc, default=_json_default, ensure_ascii=False) + "\n"
+
+
+async def stream_ndjson(collection, query: dict, batch_size: int = 1000,
+                        cursor: Optional[str] = None, projection: Optional[dict] = None) -> AsyncIterator[str]:
+    """Yield every matching document as one JSON line, holding one batch at a time"""
+    mongo_cursor = collection.find(
+        after_cursor(query, cursor), projection or DEFAULT_PROJECTION
+    ).sort(SORT_KEYS).batch_size(batch_size)
+    async for doc in mongo_cursor:
+        yield to_json_line(doc)
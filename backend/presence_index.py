@@ -0,0 +1,184 @@
+"""
+Per-guild presence and membership counters
+Maintained incrementally from gateway events so stats commands are O(1)
+instead of scanning guild.members, with a periodic drift check.
+"""
+
+import asyncio
+import logging
+from typing import Dict, Iterable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+STATUSES = ("online", "idle", "dnd", "offline")
+
+
+def normalize_status(status) -> str:
+    """Map discord.Status (including invisible/unknown) onto the four counted buckets"""
+    value = str(status)
+    return value if value in STATUSES else "offline"
+
+
+class GuildPresence:
+    """Counters for one guild"""
+
+    def __init__(self):
+        # member_id -> (status, is_bot); needed to decrement the right bucket later
+        self.members: Dict[int, Tuple[str, bool]] = {}
+        self.status_counts = dict.fromkeys(STATUSES, 0)
+        self.human_status_counts = dict.fromkeys(STATUSES, 0)
+        self.bots = 0
+        # Insertion-ordered set of online humans, for "who is online" listings
+        self.online_humans: Dict[int, None] = {}
+
+    def _add(self, member_id: int, status: str, is_bot: bool):
+        self.members[member_id] = (status, is_bot)
+        self.status_counts[status] += 1
+        if is_bot:
+            self.bots += 1
+        else:
+            self.human_status_counts[status] += 1
+            if status == "online":
+                self.online_humans[member_id] = None
+
+    def _remove(self, member_id: int):
+        status, is_bot = self.members.pop(member_id)
+        self.status_counts[status] -= 1
+        if is_bot:
+            self.bots -= 1
+        else:
+            self.human_status_counts[status] -= 1
+            self.online_humans.pop(member_id, None)
+
+    def upsert(self, member_id: int, status: str, is_bot: bool):
+        if member_id in self.members:
+            self._remove(member_id)
+        self._add(member_id, status, is_bot)
+
+    def remove(self, member_id: int):
+        if member_id in self.members:
+            self._remove(member_id)
+
+    @property
+    def total(self) -> int:
+        return len(self.members)
+
+    @property
+    def humans(self) -> int:
+        return self.total - self.bots
+
+    def snapshot(self) -> dict:
+        return {
+            "total": self.total,
+            "humans": self.humans,
+            "bots": self.bots,
+            "status": dict(self.status_counts),
+            "human_status": dict(self.human_status_counts),
+        }
+
+
+class PresenceIndex:
+    """Presence counters for every guild the bot is in"""
+
+    def __init__(self, drift_check_interval: float = 1800.0, yield_every: int = 5000):
+        self.guilds: Dict[int, GuildPresence] = {}
+        self.drift_check_interval = drift_check_interval
+        self.yield_every = yield_every
+        self.drift_corrections = 0
+        self._drift_task = None
+        # guild_id -> event logs of builds in progress, replayed once each build finishes
+        self._journals: Dict[int, List[list]] = {}
+
+    def get(self, guild_id: int) -> GuildPresence:
+        return self.guilds.setdefault(guild_id, GuildPresence())
+
+    async def _build(self, members: Iterable) -> GuildPresence:
+        """Build counters from a member list, yielding to the loop on big guilds"""
+        presence = GuildPresence()
+        for i, member in enumerate(members, 1):
+            presence._add(member.id, normalize_status(member.status), member.bot)
+            if i % self.yield_every == 0:
+                await asyncio.sleep(0)
+        return presence
+
+    async def _build_guild(self, guild) -> GuildPresence:
+        """Build a guild's counters, replaying gateway events that arrived while _build yielded"""
+        journal = []
+        self._journals.setdefault(guild.id, []).append(journal)
+        try:
+            presence = await self._build(list(guild.members))
+        finally:
+            journals = self._journals[guild.id]
+            journals.remove(journal)
+            if not journals:
+                del self._journals[guild.id]
+        for member_id, status, is_bot in journal:
+            if status is None:
+                presence.remove(member_id)
+            else:
+                presence.upsert(member_id, status, is_bot)
+        return presence
+
+    async def rebuild(self, guild):
+        self.guilds[guild.id] = await self._build_guild(guild)
+
+    def forget(self, guild_id: int):
+        self.guilds.pop(guild_id, None)
+
+    def _journal(self, guild_id: int, member_id: int, status, is_bot: bool):
+        for journal in self._journals.get(guild_id, ()):
+            journal.append((member_id, status, is_bot))
+
+    # Gateway event hooks
+    def member_joined(self, member):
+        status = normalize_status(member.status)
+        self.get(member.guild.id).upsert(member.id, status, member.bot)
+        self._journal(member.guild.id, member.id, status, member.bot)
+
+    def member_left(self, member):
+        self.get(member.guild.id).remove(member.id)
+        self._journal(member.guild.id, member.id, None, member.bot)
+
+    def presence_changed(self, member):
+        # upsert also covers members whose join we missed (e.g. during a reconnect)
+        status = normalize_status(member.status)
+        self.get(member.guild.id).upsert(member.id, status, member.bot)
+        self._journal(member.guild.id, member.id, status, member.bot)
+
+    def online_humans(self, guild_id: int, limit: int = 10) -> List[int]:
+        ids = []
+        for member_id in self.get(guild_id).online_humans:
+            ids.append(member_id)
+            if len(ids) >= limit:
+                break
+        return ids
+
+    async def check_drift(self, guild) -> bool:
+        """Compare counters with the real member list; replace them on mismatch"""
+        fresh = await self._build_guild(guild)
+        current = self.guilds.get(guild.id)
+        if current is not None and current.snapshot() == fresh.snapshot():
+            return False
+        if current is not None:
+            self.drift_corrections += 1
+            logger.warning(f"Presence counters drifted for guild {guild.id}: {current.snapshot()} -> {fresh.snapshot()}")
+        self.guilds[guild.id] = fresh
+        return True
+
+    async def _drift_loop(self, bot):
+        while True:
+            await asyncio.sleep(self.drift_check_interval)
+            for guild in list(bot.guilds):
+                try:
+                    await self.check_drift(guild)
+                except Exception as e:
+                    logger.error(f"Presence drift check failed for guild {guild.id}: {e}")
+
+    def start_drift_checks(self, bot):
+        if self._drift_task is None or self._drift_task.done():
+            self._drift_task = asyncio.create_task(self._drift_loop(bot))
+
+    def stop_drift_checks(self):
+        if self._drift_task is not None:
+            self._drift_task.cancel()
+            self._drift_task = None
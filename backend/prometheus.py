@@ -0,0 +1,94 @@
+"""
+Prometheus text exposition
+A small builder for the text format served on /metrics. Samples are grouped
+by metric family so each family's HELP/TYPE header appears once, and textfile
+dumps from other processes (the bot, cluster workers) can be merged in.
+"""
+
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(labels: Optional[Dict[str, object]]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Exposition:
+    """Collects samples by family and renders them in the text format"""
+
+    def __init__(self, const_labels: Optional[Dict[str, object]] = None):
+        self.const_labels = dict(const_labels or {})
+        # name -> [type, help, sample lines]
+        self.families: "OrderedDict[str, list]" = OrderedDict()
+
+    def _family(self, name: str, kind: str, help_text: str) -> list:
+        family = self.families.get(name)
+        if family is None:
+            family = self.families[name] = [kind, help_text, []]
+        return family[2]
+
+    def _sample(self, lines: list, name: str, labels: Optional[Dict[str, object]], value: float):
+        lines.append(f"{name}{format_labels({**self.const_labels, **(labels or {})})} {_format_value(value)}")
+
+    def gauge(self, name: str, help_text: str, value: float, labels: Optional[Dict[str, object]] = None):
+        self._sample(self._family(name, "gauge", help_text), name, labels, value)
+
+    def counter(self, name: str, help_text: str, value: float, labels: Optional[Dict[str, object]] = None):
+        self._sample(self._family(name, "counter", help_text), name, labels, value)
+
+    def histogram(self, name: str, help_text: str, histogram, labels: Optional[Dict[str, object]] = None):
+        """Export a db_metrics.Histogram (milliseconds) as a histogram in seconds"""
+        from db_metrics import BUCKETS_MS
+
+        lines = self._family(name, "histogram", help_text)
+        cumulative = 0
+        for bound, count in zip(list(BUCKETS_MS) + [float("inf")], histogram.buckets):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else _format_value(bound / 1000)
+            self._sample(lines, f"{name}_bucket", {**(labels or {}), "le": le}, cumulative)
+        self._sample(lines, f"{name}_sum", labels, round(histogram.total_ms / 1000, 6))
+        self._sample(lines, f"{name}_count", labels, histogram.count)
+
+    def render(self) -> str:
+        out: List[str] = []
+        for name, (kind, help_text, lines) in self.families.items():
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} {kind}")
+            out.extend(lines)
+        return "\n".join(out) + "\n" if out else ""
+
+
+def merge_expositions(texts: Iterable[str]) -> str:
+    """Merge rendered expositions, keeping one header per family"""
+    families: "OrderedDict[str, list]" = OrderedDict()
+    for text in texts:
+        current = None
+        for line in text.splitlines():
+            if line.startswith("# HELP ") or line.startswith("# TYPE "):
+                name = line.split(" ", 3)[2]
+                family = families.setdefault(name, [None, None, []])
+                family[0 if line.startswith("# HELP ") else 1] = line
+                current = family
+            elif line and not line.startswith("#") and current is not None:
+                current[2].append(line)
+    out: List[str] = []
+    for help_line, type_line, lines in families.values():
+        out.extend(line for line in (help_line, type_line) if line)
+        out.extend(lines)
+    return "\n".join(out) + "\n" if out else ""
@@ -0,0 +1,166 @@
+"""
+In-process TTL cache for report endpoints
+LRU-bounded, with single-flight coalescing of concurrent misses and
+per-guild invalidation when new moderation actions are logged. The bot may
+run in another process, so invalidations also bump a per-guild version in
+MongoDB that is part of every cache key.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSIONS_COLLECTION = "cache_versions"
+# Version document bumped by every guild's writes, for the all-guilds reports
+ALL_GUILDS = "all"
+
+# Seconds each endpoint's responses may be served from cache
+ENDPOINT_TTLS = {
+    "reports_daily": 30,
+    "reports_violations": 60,
+    "reports_growth": 60,
+    "server_activity": 60,
+}
+
+
+class ResponseCache:
+    """TTL + LRU cache keyed by endpoint name and query parameters"""
+
+    def __init__(self, max_entries: int = 256, versions=None):
+        self.max_entries = max_entries
+        # Collection of per-guild versions shared with the bot process, or None
+        self.versions = versions
+        # key -> (expires_at, guild_id, value)
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._generations = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(endpoint: str, params: dict):
+        return endpoint, tuple(sorted(params.items()))
+
+    def _generation(self, guild_id: Optional[int]) -> int:
+        return self._generations.get(guild_id, 0)
+
+    async def get_or_compute(self, endpoint: str, params: dict, compute: Callable[[], Awaitable],
+                             ttl: Optional[float] = None):
+        """Return a cached response or compute it once for all concurrent callers"""
+        guild_id = params.get("guild_id")
+        version = None
+        if self.versions is not None:
+            try:
+                version = await read_version(self.versions, guild_id)
+            except Exception as e:
+                logger.warning(f"Could not read cache version; bypassing the cache: {e}")
+                return await compute()
+        key = (*self.make_key(endpoint, params), version)
+        ttl = ENDPOINT_TTLS.get(endpoint, 30) if ttl is None else ttl
+
+        # Everything below runs on one event loop; no awaits between a check and its update
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            del self._entries[key]
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(inflight)
+        self.misses += 1
+        inflight = asyncio.get_running_loop().create_future()
+        self._inflight[key] = inflight
+        generation = self._generation(guild_id)
+
+        try:
+            value = await compute()
+        except BaseException as e:
+            self._inflight.pop(key, None)
+            if isinstance(e, Exception):
+                inflight.set_exception(e)
+                # Mark the exception retrieved when nobody else was waiting
+                inflight.exception()
+            else:
+                inflight.cancel()
+            raise
+
+        self._inflight.pop(key, None)
+        # Don't store a result computed before an invalidation landed
+        if self._generation(guild_id) == generation:
+            self._entries[key] = (time.monotonic() + ttl, guild_id, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        inflight.set_result(value)
+        return value
+
+    def invalidate_guild(self, guild_id: int) -> int:
+        """Drop entries for a guild and the all-guilds aggregates that include it"""
+        self._generations[guild_id] = self._generation(guild_id) + 1
+        self._generations[None] = self._generation(None) + 1
+        stale = [key for key, entry in self._entries.items() if entry[1] in (guild_id, None)]
+        for key in stale:
+            del self._entries[key]
+        self.invalidations += len(stale)
+        return len(stale)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_ratio": round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0,
+        }
+
+
+async def read_version(collection, guild_id: Optional[int]) -> int:
+    document = await collection.find_one({"_id": guild_id or ALL_GUILDS}, {"version": 1})
+    return document["version"] if document else 0
+
+
+async def bump_version(collection, guild_id: int):
+    """Move the guild's and the all-guilds version on, so every process misses its old entries"""
+    await collection.bulk_write([
+        UpdateOne({"_id": key}, {"$inc": {"version": 1}}, upsert=True) for key in (guild_id, ALL_GUILDS)
+    ], ordered=False)
+
+
+# Shared by the API handlers and, when the bot runs in-process, its moderation logging
+report_cache = ResponseCache(max_entries=int(os.environ.get('REPORT_CACHE_MAX_ENTRIES', '256')))
+
+
+async def invalidate_guild(guild_id: int, versions=None) -> int:
+    """Invalidate cached reports after a guild's moderation data changed
+
+    Pass the versions collection to reach API processes other than this one.
+    """
+    if versions is not None:
+        try:
+            await bump_version(versions, guild_id)
+        except Exception as e:
+            logger.warning(f"Could not bump cache version for guild {guild_id}: {e}")
+    return report_cache.invalidate_guild(guild_id)
@@ -1,7 +1,8 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from contextlib import asynccontextmanager
 import os
 import logging
 from pathlib import Path
@@ -9,29 +10,78 @@ from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 import uuid
 from datetime import datetime, timedelta
-import subprocess
 import sys
 import signal
-import psutil
 import asyncio
+import time
+from activity_rollups import ROLLUP_COLLECTION, activity_summary, daily_totals, message_count, window_start
+from moderation_analytics import daily_summary, violations_report
+from member_events import MEMBER_EVENTS_COLLECTION, growth_report
+from violation_scores import VIOLATION_SCORES_COLLECTION, ViolationScorer
+from db_indexes import check_query_plans, ensure_indexes, index_usage
+from activity_retention import RetentionPolicy, ensure_retention_indexes, retention_loop
+from pagination import decode_cursor, fetch_page, stream_ndjson
+from response_cache import CACHE_VERSIONS_COLLECTION, report_cache
+from bot_supervisor import READY, RUNNING, BotSupervisor, BotTaskSupervisor
+from bot_cluster import CLUSTER_READY_MARKER, DEFAULT_STATUS_FILE, read_cluster_status
+from log_tail import make_cursor, parse_cursor, read_since, tail_lines
+from launcher import startup_timings
+from database import client, client_options, db, metrics as mongo_metrics
+from prometheus import CONTENT_TYPE, Exposition, merge_expositions
+from bot_metrics import read_textfiles
+from api_metrics import DatabaseProbe, ProcessSampler, RequestMetrics, RequestMetricsMiddleware
+from health import HealthChecks
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# "inprocess" runs the bot as a task on this event loop, sharing the Mongo client;
+# "subprocess" runs discord_bot.py as a supervised child process
+BOT_RUNTIME = os.environ.get('BOT_RUNTIME', 'subprocess')
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await startup_event()
+    yield
+    await shutdown_event()
 
 # Create the main app without a prefix
-app = FastAPI(title="Discord Bot Management API", version="1.0.0")
+app = FastAPI(title="Discord Bot Management API", version="1.0.0", lifespan=lifespan)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
-# Global variables for bot process management
-bot_process = None
-bot_status = {"status": "stopped", "pid": None, "started_at": None}
+# Bot supervision (output/logs written to bot.log)
+if BOT_RUNTIME == "inprocess":
+    import discord_bot
+    bot_supervisor = BotTaskSupervisor(
+        lambda: discord_bot.run_discord_bot(close_client=False, export_metrics=False),
+        discord_bot.stop_discord_bot,
+        discord_bot.bot.is_ready,
+        log_file=ROOT_DIR / "bot.log"
+    )
+elif BOT_RUNTIME == "cluster":
+    # bot_cluster.py coordinates one AutoShardedBot worker process per shard range
+    discord_bot = None
+    bot_supervisor = BotSupervisor(
+        [sys.executable, "-u", "bot_cluster.py"], ROOT_DIR,
+        ready_marker=CLUSTER_READY_MARKER,
+        stop_timeout=float(os.environ.get('BOT_CLUSTER_STOP_TIMEOUT', '10')) + 5,
+        log_file=ROOT_DIR / "bot.log"
+    )
+else:
+    discord_bot = None
+    bot_supervisor = BotSupervisor.for_discord_bot(ROOT_DIR, log_file=ROOT_DIR / "bot.log")
+
+# The bot usually writes from another process; its invalidations arrive as version bumps in Mongo
+report_cache.versions = db[CACHE_VERSIONS_COLLECTION]
+
+# Raw activity retention and background compaction
+retention_policy = RetentionPolicy.from_env()
+retention_task = None
+
+# Must match the bot's VIOLATION_WEIGHTS / VIOLATION_HALF_LIFE_DAYS to read its scores
+violation_scorer = ViolationScorer.from_env()
 
 # Define Models
 class StatusCheck(BaseModel):
@@ -79,55 +129,47 @@ async def create_status_check(input: StatusCheckCreate):
     return status_obj
 
 @api_router.get("/status", response_model=List[StatusCheck])
-async def get_status_checks():
-    status_checks = await db.status_checks.find().to_list(1000)
+async def get_status_checks(response: Response, limit: int = 1000, cursor: Optional[str] = None):
+    # The body stays a plain list; the next page's cursor travels in a header
+    limit = max(1, min(limit, 1000))
+    try:
+        status_checks, next_cursor = await fetch_page(db.status_checks, {}, limit, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return [StatusCheck(**status_check) for status_check in status_checks]
 
+@api_router.get("/status/export")
+async def export_status_checks():
+    """Stream every status check as NDJSON"""
+    return StreamingResponse(stream_ndjson(db.status_checks, {}), media_type="application/x-ndjson")
+
 # Discord Bot Management Routes
 @api_router.get("/bot/status")
 async def get_bot_status():
     """Get Discord bot status"""
-    global bot_status
-    
-    # Check if process is actually running
-    if bot_status["pid"]:
-        try:
-            process = psutil.Process(bot_status["pid"])
-            if process.is_running():
-                bot_status["status"] = "running"
-            else:
-                bot_status["status"] = "stopped"
-                bot_status["pid"] = None
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            bot_status["status"] = "stopped"
-            bot_status["pid"] = None
-    
-    return bot_status
+    status = bot_supervisor.status()
+    if BOT_RUNTIME == "cluster":
+        status["cluster"] = read_cluster_status(
+            Path(os.environ.get('BOT_CLUSTER_STATUS_FILE', str(DEFAULT_STATUS_FILE)))
+        )
+    return status
+
+@api_router.get("/bot/state")
+async def get_bot_state():
+    """Live guild cache, latency and queue stats of an in-process bot"""
+    if discord_bot is None:
+        raise HTTPException(status_code=409, detail="Bot state is only available with BOT_RUNTIME=inprocess")
+    return discord_bot.bot_state()
 
 @api_router.post("/bot/start")
 async def start_bot():
     """Start the Discord bot"""
-    global bot_process, bot_status
-    
-    if bot_status["status"] == "running":
-        return {"message": "Bot is already running", "status": bot_status}
-    
     try:
-        # Start the Discord bot as a separate process
-        bot_process = subprocess.Popen(
-            [sys.executable, "discord_bot.py"],
-            cwd=ROOT_DIR,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE
-        )
-        
-        bot_status = {
-            "status": "starting",
-            "pid": bot_process.pid,
-            "started_at": datetime.utcnow().isoformat()
-        }
-        
-        return {"message": "Bot started successfully", "status": bot_status}
+        if not await bot_supervisor.start():
+            return {"message": "Bot is already running", "status": bot_supervisor.status()}
+        return {"message": "Bot started successfully", "status": bot_supervisor.status()}
     
     except Exception as e:
         return {"message": f"Failed to start bot: {str(e)}", "status": "error"}
@@ -135,35 +177,10 @@ async def start_bot():
 @api_router.post("/bot/stop")
 async def stop_bot():
     """Stop the Discord bot"""
-    global bot_process, bot_status
-    
-    if bot_status["status"] == "stopped":
-        return {"message": "Bot is already stopped", "status": bot_status}
-    
     try:
-        if bot_process and bot_status["pid"]:
-            try:
-                # Try to terminate gracefully
-                process = psutil.Process(bot_status["pid"])
-                process.terminate()
-                
-                # Wait up to 5 seconds for graceful shutdown
-                try:
-                    process.wait(timeout=5)
-                except psutil.TimeoutExpired:
-                    # Force kill if it doesn't terminate gracefully
-                    process.kill()
-                
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                pass  # Process already dead
-        
-        bot_status = {
-            "status": "stopped",
-            "pid": None,
-            "started_at": None
-        }
-        
-        return {"message": "Bot stopped successfully", "status": bot_status}
+        if not await bot_supervisor.stop():
+            return {"message": "Bot is already stopped", "status": bot_supervisor.status()}
+        return {"message": "Bot stopped successfully", "status": bot_supervisor.status()}
     
     except Exception as e:
         return {"message": f"Failed to stop bot: {str(e)}", "status": "error"}
@@ -172,146 +189,179 @@ async def stop_bot():
 async def restart_bot():
     """Restart the Discord bot"""
     stop_response = await stop_bot()
-    if "error" in stop_response.get("status", ""):
+    if stop_response.get("status") == "error":
         return stop_response
     
-    # Wait a moment before restarting
-    await asyncio.sleep(2)
-    
     return await start_bot()
 
+@api_router.get("/bot/output")
+async def get_bot_output(lines: int = 50):
+    """Get the most recent lines the bot process wrote to stdout/stderr"""
+    lines = max(1, min(lines, bot_supervisor.output.maxlen))
+    return {"output": bot_supervisor.recent_output(lines)}
+
 @api_router.get("/bot/logs")
-async def get_bot_logs():
-    """Get recent bot logs"""
+async def get_bot_logs(lines: int = 50, cursor: Optional[str] = None):
+    """Get recent bot logs, or only the lines written after `cursor`"""
+    lines = max(1, min(lines, 5000))
     try:
         log_file = ROOT_DIR / "bot.log"
-        if log_file.exists():
-            with open(log_file, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                recent_lines = lines[-50:]  # Get last 50 lines
-                return {"logs": recent_lines}
-        else:
-            return {"logs": ["No log file found"]}
+        if not log_file.exists():
+            return {"logs": ["No log file found"], "cursor": None}
+        if cursor:
+            # Capped at `lines`; the cursor stops at the last line returned so the rest comes next call
+            new_lines, next_cursor, rotated = await asyncio.to_thread(read_since, log_file, cursor, max_lines=lines)
+            return {"logs": new_lines, "cursor": next_cursor, "rotated": rotated}
+        recent_lines, next_cursor = await asyncio.to_thread(tail_lines, log_file, lines)
+        return {"logs": recent_lines, "cursor": next_cursor}
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     except Exception as e:
-        return {"logs": [f"Error reading logs: {str(e)}"]}
+        return {"logs": [f"Error reading logs: {str(e)}"], "cursor": None}
+
+@api_router.get("/bot/logs/stream")
+async def stream_bot_logs(request: Request, cursor: Optional[str] = None, poll_interval: float = 0.5):
+    """Push new bot log lines as server-sent events"""
+    log_file = ROOT_DIR / "bot.log"
+    # EventSource resends the last event id when it reconnects
+    cursor = request.headers.get("last-event-id") or cursor
+    if cursor:
+        try:
+            parse_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    poll_interval = max(0.1, min(poll_interval, 10.0))
+    
+    async def events():
+        # Without a cursor start at the end, or at the very start of a file that appears later
+        position = cursor or (None if log_file.exists() else make_cursor(0, 0))
+        idle = 0.0
+        while not await request.is_disconnected():
+            if log_file.exists():
+                new_lines, position, _ = await asyncio.to_thread(read_since, log_file, position)
+                if new_lines:
+                    idle = 0.0
+                    payload = "".join(f"data: {line}\n" for line in new_lines)
+                    yield f"id: {position}\n{payload}\n"
+                    continue
+            idle += poll_interval
+            if idle >= 15:
+                # Comment line keeps proxies from closing an idle stream
+                idle = 0.0
+                yield ": keep-alive\n\n"
+            await asyncio.sleep(poll_interval)
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
 
 # Database API Routes for Discord Bot Data
 @api_router.get("/bot/moderation-logs")
-async def get_moderation_logs(guild_id: Optional[int] = None, limit: int = 50):
-    """Get moderation logs"""
+async def get_moderation_logs(guild_id: Optional[int] = None, limit: int = 50, cursor: Optional[str] = None):
+    """Get a page of moderation logs, newest first"""
     query = {}
     if guild_id:
         query["guild_id"] = guild_id
     
-    logs = await db.moderation_logs.find(query).sort("timestamp", -1).limit(limit).to_list(length=limit)
-    return {"logs": logs, "total": len(logs)}
+    limit = max(1, min(limit, 500))
+    try:
+        logs, next_cursor = await fetch_page(db.moderation_logs, query, limit, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"logs": logs, "total": len(logs), "next_cursor": next_cursor}
 
-@api_router.get("/bot/server-activity")
-async def get_server_activity(guild_id: Optional[int] = None, days: int = 7):
-    """Get server activity statistics"""
-    start_date = datetime.utcnow() - timedelta(days=days)
-    
-    query = {"timestamp": {"$gte": start_date}}
+@api_router.get("/bot/moderation-logs/export")
+async def export_moderation_logs(guild_id: Optional[int] = None, cursor: Optional[str] = None):
+    """Stream moderation logs as NDJSON without loading them into memory"""
+    query = {}
     if guild_id:
         query["guild_id"] = guild_id
     
-    activities = await db.server_activity.find(query).to_list(length=None)
-    
-    # Count messages per user
-    user_activity = {}
-    daily_activity = {}
-    
-    for activity in activities:
-        if activity.get("type") == "message":
-            user_id = activity["user_id"]
-            user_activity[user_id] = user_activity.get(user_id, 0) + 1
-            
-            # Daily breakdown
-            day = activity["timestamp"].strftime("%Y-%m-%d")
-            daily_activity[day] = daily_activity.get(day, 0) + 1
-    
-    # Sort by activity
-    sorted_users = sorted(user_activity.items(), key=lambda x: x[1], reverse=True)[:10]
+    # Validate the cursor before the response starts streaming
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    return StreamingResponse(stream_ndjson(db.moderation_logs, query, cursor=cursor), media_type="application/x-ndjson")
+
+@api_router.get("/bot/server-activity")
+async def get_server_activity(guild_id: Optional[int] = None, days: int = 7):
+    """Get server activity statistics"""
+    async def compute():
+        summary = await activity_summary(db[ROLLUP_COLLECTION], guild_id, days)
+        return {
+            "period_days": days,
+            **summary
+        }
     
+    return await report_cache.get_or_compute("server_activity", {"guild_id": guild_id, "days": days}, compute)
+
+@api_router.get("/bot/activity-history")
+async def get_activity_history(guild_id: Optional[int] = None, days: int = 90):
+    """Get compacted per-day message totals, including days whose raw events expired"""
+    start_day = window_start(days)
     return {
         "period_days": days,
-        "total_messages": len([a for a in activities if a.get("type") == "message"]),
-        "active_users": len(user_activity),
-        "top_users": [{"user_id": user_id, "message_count": count} for user_id, count in sorted_users],
-        "daily_breakdown": daily_activity
+        "raw_retention_days": retention_policy.raw_days,
+        "daily_totals": await daily_totals(db[ROLLUP_COLLECTION], guild_id, start_day)
     }
 
 @api_router.get("/bot/reports/daily")
 async def get_daily_report(guild_id: Optional[int] = None):
     """Generate daily report"""
+    return await report_cache.get_or_compute("reports_daily", {"guild_id": guild_id}, lambda: _build_daily_report(guild_id))
+
+async def _build_daily_report(guild_id: Optional[int]):
+    """Build today's report from the moderation and activity summaries"""
     today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
     
-    query = {"timestamp": {"$gte": today}}
-    if guild_id:
-        query["guild_id"] = guild_id
-    
-    # Get today's moderation actions
-    mod_actions = await db.moderation_logs.find(query).to_list(length=None)
-    
-    # Get today's activity
-    activities = await db.server_activity.find(query).to_list(length=None)
-    
-    # Summarize moderation actions
-    mod_summary = {}
-    for action in mod_actions:
-        action_type = action["action_type"]
-        mod_summary[action_type] = mod_summary.get(action_type, 0) + 1
+    # Summarize today's moderation actions on the server
+    mod_summary = await daily_summary(db.moderation_logs, guild_id, today)
     
-    # Count messages
-    message_count = len([a for a in activities if a.get("type") == "message"])
+    # Get today's message count from the daily rollups
+    today_messages = await message_count(db[ROLLUP_COLLECTION], guild_id, today)
     
     return {
         "date": today.isoformat(),
         "guild_id": guild_id,
-        "moderation_actions": mod_summary,
-        "total_moderation_actions": len(mod_actions),
-        "message_count": message_count,
-        "total_activities": len(activities)
+        **mod_summary,
+        "message_count": today_messages,
+        # Messages are the only activity type recorded
+        "total_activities": today_messages
     }
 
 @api_router.get("/bot/reports/violations")
 async def get_violations_report(guild_id: Optional[int] = None):
     """Generate comprehensive violations report"""
-    query = {}
-    if guild_id:
-        query["guild_id"] = guild_id
-    
-    violations = await db.moderation_logs.find(query).to_list(length=None)
-    
-    if not violations:
-        return {
-            "guild_id": guild_id,
-            "total_violations": 0,
-            "violation_types": {},
-            "top_violators": []
-        }
-    
-    # Analyze violations
-    violation_types = {}
-    top_violators = {}
-    
-    for violation in violations:
-        # Count by type
-        v_type = violation["action_type"]
-        violation_types[v_type] = violation_types.get(v_type, 0) + 1
-        
-        # Count by user
-        user_id = violation["target_user_id"]
-        top_violators[user_id] = top_violators.get(user_id, 0) + 1
-    
-    # Sort top violators
-    sorted_violators = sorted(top_violators.items(), key=lambda x: x[1], reverse=True)[:10]
-    
+    return await report_cache.get_or_compute(
+        "reports_violations", {"guild_id": guild_id},
+        lambda: violations_report(db.moderation_logs, guild_id, top=10)
+    )
+
+@api_router.get("/bot/reports/growth")
+async def get_growth_report(guild_id: Optional[int] = None, days: int = 30, member_count: Optional[int] = None):
+    """Joins, leaves, net growth, churn and daily series from the member event ledger"""
+    days = max(1, min(days, 365))
+    return await report_cache.get_or_compute(
+        "reports_growth", {"guild_id": guild_id, "days": days, "member_count": member_count},
+        lambda: growth_report(db[MEMBER_EVENTS_COLLECTION], guild_id, days, member_count)
+    )
+
+@api_router.get("/bot/risk")
+async def get_risk(guild_id: int, limit: int = 10):
+    """Members with the highest time-decayed violation scores"""
+    limit = max(1, min(limit, 100))
     return {
         "guild_id": guild_id,
-        "total_violations": len(violations),
-        "violation_types": violation_types,
-        "top_violators": [{"user_id": user_id, "count": count} for user_id, count in sorted_violators]
+        "half_life_days": violation_scorer.half_life_days,
+        "members": await violation_scorer.top_risk(db[VIOLATION_SCORES_COLLECTION], guild_id, limit)
+    }
+
+@api_router.get("/admin/indexes")
+async def get_index_stats():
+    """Report index usage counters and hot query plans"""
+    return {
+        "usage": await index_usage(db),
+        "query_plans": await check_query_plans(db)
     }
 
 # Include the router in the main app
@@ -323,6 +373,37 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
+)
+
+# Request counts/latency per route; process stats and the DB ping are refreshed in the background
+request_metrics = RequestMetrics()
+app.add_middleware(RequestMetricsMiddleware, metrics=request_metrics)
+process_sampler = ProcessSampler(interval=float(os.environ.get('PROCESS_SAMPLE_INTERVAL', '15')))
+db_probe = DatabaseProbe.from_env(db)
+
+# /readyz reads these cached statuses; /api/health?deep=1 refreshes them (at most every HEALTH_DEEP_MIN_INTERVAL)
+health_checks = HealthChecks(min_deep_interval=float(os.environ.get('HEALTH_DEEP_MIN_INTERVAL', '10')))
+health_checks.register(
+    "mongodb",
+    lambda: {"ok": db_probe.up, "checked_at": db_probe.checked_at, "status": db_probe.status,
+             "latency_ms": db_probe.latency_ms},
+    refresh=db_probe.check,
+    max_age=db_probe.interval * 3 + db_probe.timeout
+)
+health_checks.register(
+    "process",
+    lambda: {"ok": bool(process_sampler.sample), "checked_at": process_sampler.sampled_at,
+             "memory_mb": process_sampler.sample.get("memory_mb")},
+    refresh=process_sampler.refresh,
+    max_age=process_sampler.interval * 3,
+    required=False
+)
+health_checks.register(
+    "bot",
+    lambda: {"ok": bot_supervisor.state in (READY, RUNNING), "checked_at": time.time(),
+             "state": bot_supervisor.state},
+    required=os.environ.get('READYZ_REQUIRE_BOT', 'false').lower() == 'true'
 )
 
 # Configure logging
@@ -332,68 +413,109 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@app.on_event("startup")
 async def startup_event():
-    """Start the Discord bot when FastAPI starts"""
+    """Start background work, and the Discord bot when it runs in-process"""
     logger.info("FastAPI server starting...")
-    logger.info("Discord bot can be started via /api/bot/start endpoint")
+    
+    # Index bootstrap runs in the background so the port is bound right away
+    global retention_task
+    retention_task = asyncio.create_task(_bootstrap_database())
+    process_sampler.start()
+    db_probe.start()
+    
+    if BOT_RUNTIME == "inprocess" and os.environ.get('BOT_AUTOSTART', 'false').lower() == 'true':
+        await bot_supervisor.start()
+        logger.info("🤖 Discord bot started on the API event loop")
+    else:
+        logger.info("Discord bot can be started via /api/bot/start endpoint")
+    
+    startup_timings.mark_ready()
+
+async def _bootstrap_database():
+    """Create indexes, flag scans, then run retention compaction for the life of the app"""
+    with startup_timings.phase("index_bootstrap"):
+        # Create the indexes the hot queries need, then flag any remaining scans
+        try:
+            await ensure_indexes(db)
+            await check_query_plans(db)
+        except Exception as e:
+            logger.error(f"Index bootstrap failed: {e}")
+        
+        # Expire old raw activity and keep compacting completed days
+        try:
+            await ensure_retention_indexes(db, retention_policy)
+        except Exception as e:
+            logger.error(f"Retention setup failed: {e}")
+    await retention_loop(db, retention_policy)
 
-@app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
-    global bot_process, bot_status
+    if retention_task:
+        retention_task.cancel()
+    process_sampler.stop()
+    db_probe.stop()
     
-    # Stop bot process if running
-    if bot_status["status"] == "running" and bot_status["pid"]:
-        try:
-            process = psutil.Process(bot_status["pid"])
-            process.terminate()
-            process.wait(timeout=5)
-        except:
-            pass
+    # Stop the bot (task or process) before closing the shared client
+    try:
+        await bot_supervisor.stop()
+    except Exception as e:
+        logger.error(f"Failed to stop bot process: {e}")
     
     # Close database connection
     client.close()
     logger.info("FastAPI server shutting down...")
 
+@app.get("/livez")
+async def livez():
+    """Liveness: the process is up and its event loop is serving requests"""
+    return {"status": "alive"}
+
+@app.get("/readyz")
+async def readyz(response: Response):
+    """Readiness from the background probers' cached results; 503 until required dependencies are ok"""
+    readiness = health_checks.readiness()
+    if not readiness["ready"]:
+        response.status_code = 503
+    return readiness
+
 # Health check endpoint with detailed status
 @app.get("/api/health")
-async def health_check():
-    """Comprehensive health check endpoint"""
-    import psutil
-    
-    # Check database connection
-    db_status = "unknown"
-    try:
-        # Simple database ping
-        await db.command("ping")
-        db_status = "connected"
-    except Exception as e:
-        db_status = f"error: {str(e)}"
-    
-    # Get system resources
-    try:
-        process = psutil.Process()
-        memory_info = process.memory_info()
-        cpu_percent = process.cpu_percent()
-        
-        system_info = {
-            "memory_mb": round(memory_info.rss / 1024 / 1024, 2),
-            "cpu_percent": cpu_percent,
-            "system_memory_percent": psutil.virtual_memory().percent
-        }
-    except:
-        system_info = {"error": "Could not get system info"}
-    
+async def health_check(deep: bool = False):
+    """Detailed health; cached values unless deep=1 forces fresh (rate-limited) checks"""
+    deep_check = await health_checks.deep_check() if deep else None
+    readiness = health_checks.readiness()
     return {
-        "status": "healthy",
+        "status": "healthy" if readiness["ready"] else "unhealthy",
+        "ready": readiness["ready"],
         "timestamp": datetime.utcnow().isoformat(),
-        "bot_status": bot_status["status"],
-        "database_status": db_status,
-        "system_resources": system_info,
-        "uptime_seconds": (datetime.utcnow() - datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)).total_seconds()
+        "bot_status": bot_supervisor.state,
+        "bot_runtime": BOT_RUNTIME,
+        "database_status": db_probe.status,
+        "dependencies": readiness["dependencies"],
+        "deep_check": deep_check,
+        "system_resources": process_sampler.snapshot(),
+        "report_cache": report_cache.stats(),
+        "database": {"pool_settings": client_options(), **mongo_metrics.snapshot()},
+        "startup": startup_timings.snapshot(),
+        "uptime_seconds": process_sampler.uptime_seconds()
     }
 
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus metrics for the API, its MongoDB client and the bot"""
+    exposition = Exposition()
+    request_metrics.collect(exposition)
+    process_sampler.collect(exposition)
+    db_probe.collect(exposition)
+    mongo_metrics.collect(exposition)
+    texts = [exposition.render()]
+    if discord_bot is not None:
+        texts.append(discord_bot.bot_metrics.render())
+    else:
+        # The bot process (or each cluster worker) dumps its metrics next to us
+        texts.extend(await asyncio.to_thread(read_textfiles, ROOT_DIR))
+    return Response(merge_expositions(texts), media_type=CONTENT_TYPE)
+
 # Keep-alive endpoint for Render
 @app.get("/api/keep-alive")
 async def keep_alive():
@@ -0,0 +1,175 @@
+"""
+Per-(guild, user) violation counters and warning escalation
+Counters are $inc'ed in the moderation logging path so reading a member's
+violation count is one indexed lookup instead of a count over moderation_logs.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Tuple
+
+from pymongo import ReturnDocument, UpdateOne
+
+logger = logging.getLogger(__name__)
+
+VIOLATION_COUNTERS_COLLECTION = "violation_counters"
+
+# Action types that count as violations (matches the old count_documents $in)
+VIOLATION_TYPES = ("warn", "mute", "kick", "ban")
+
+ESCALATION_ACTIONS = ("mute", "kick")
+
+
+def _counter_update(action: dict) -> Tuple[dict, dict]:
+    return (
+        {"guild_id": action["guild_id"], "user_id": action["target_user_id"]},
+        {
+            "$inc": {"total": 1, f"by_type.{action['action_type']}": 1},
+            "$max": {"last_violation_at": action["timestamp"]}
+        }
+    )
+
+
+def build_counter_updates(actions: Iterable[dict]) -> List[UpdateOne]:
+    """One $inc upsert per violation in a batch of moderation_logs documents"""
+    return [
+        UpdateOne(*_counter_update(action), upsert=True)
+        for action in actions if action["action_type"] in VIOLATION_TYPES
+    ]
+
+
+async def increment_counter(collection, action: dict) -> Optional[dict]:
+    """Count one logged action; returns the updated counter, or None for non-violations"""
+    if action["action_type"] not in VIOLATION_TYPES:
+        return None
+    query, update = _counter_update(action)
+    return await collection.find_one_and_update(
+        query, update, upsert=True, return_document=ReturnDocument.AFTER, projection={"_id": 0}
+    )
+
+
+async def increment_counters(collection, actions: Iterable[dict]) -> int:
+    updates = build_counter_updates(actions)
+    if updates:
+        await collection.bulk_write(updates, ordered=False)
+    return len(updates)
+
+
+async def get_counter(collection, guild_id: int, user_id: int) -> dict:
+    counter = await collection.find_one({"guild_id": guild_id, "user_id": user_id}, {"_id": 0})
+    return counter or {"guild_id": guild_id, "user_id": user_id, "total": 0, "by_type": {}}
+
+
+def warn_count(counter: Optional[dict]) -> int:
+    return ((counter or {}).get("by_type") or {}).get("warn", 0)
+
+
+@dataclass
+class EscalationStep:
+    warnings: int
+    action: str
+    # Timeout length for "mute"
+    minutes: int = 60
+
+
+@dataclass
+class EscalationPolicy:
+    """Automatic action when a member reaches N warnings"""
+    steps: List[EscalationStep] = field(default_factory=list)
+
+    @classmethod
+    def parse(cls, spec: str):
+        """Parse "3:mute:60,5:kick" (warnings:action[:minutes], comma separated)"""
+        steps = []
+        for part in filter(None, (p.strip() for p in spec.split(","))):
+            fields = part.split(":")
+            if len(fields) not in (2, 3) or fields[1] not in ESCALATION_ACTIONS:
+                raise ValueError(f"Invalid escalation step: {part!r}")
+            step = EscalationStep(int(fields[0]), fields[1])
+            if len(fields) == 3:
+                step.minutes = int(fields[2])
+            steps.append(step)
+        return cls(sorted(steps, key=lambda step: step.warnings))
+
+    @classmethod
+    def from_env(cls):
+        """Build a policy from ESCALATION_POLICY; empty disables escalation"""
+        spec = os.environ.get('ESCALATION_POLICY', '')
+        try:
+            return cls.parse(spec)
+        except ValueError as e:
+            logger.error(f"Ignoring ESCALATION_POLICY: {e}")
+            return cls()
+
+    def step_for(self, warnings: int) -> Optional[EscalationStep]:
+        """The step triggered by reaching exactly `warnings` warnings, if any"""
+        for step in self.steps:
+            if step.warnings == warnings:
+                return step
+        return None
+
+
+async def backfill_counters(logs_collection, counters_collection, guild_id: Optional[int] = None,
+                            batch_size: int = 1000) -> int:
+    """Rebuild counters from moderation_logs; safe to re-run ($set, not $inc)"""
+    match = {"action_type": {"$in": list(VIOLATION_TYPES)}}
+    if guild_id:
+        match["guild_id"] = guild_id
+    pipeline = [
+        {"$match": match},
+        {"$group": {
+            "_id": {"guild_id": "$guild_id", "user_id": "$target_user_id", "type": "$action_type"},
+            "count": {"$sum": 1},
+            "last": {"$max": "$timestamp"}
+        }},
+        {"$group": {
+            "_id": {"guild_id": "$_id.guild_id", "user_id": "$_id.user_id"},
+            "types": {"$push": {"k": "$_id.type", "v": "$count"}},
+            "total": {"$sum": "$count"},
+            "last": {"$max": "$last"}
+        }}
+    ]
+
+    written = 0
+    batch = []
+    async for row in logs_collection.aggregate(pipeline, allowDiskUse=True):
+        batch.append(UpdateOne(
+            {"guild_id": row["_id"]["guild_id"], "user_id": row["_id"]["user_id"]},
+            {"$set": {
+                "total": row["total"],
+                "by_type": {item["k"]: item["v"] for item in row["types"]},
+                "last_violation_at": row["last"]
+            }},
+            upsert=True
+        ))
+        if len(batch) >= batch_size:
+            await counters_collection.bulk_write(batch, ordered=False)
+            written += len(batch)
+            batch = []
+    if batch:
+        await counters_collection.bulk_write(batch, ordered=False)
+        written += len(batch)
+
+    logger.info(f"Backfilled {written} violation counter(s)")
+    return written
+
+
+async def _backfill_main(args):
+    from database import client, db
+    from db_indexes import ensure_indexes
+
+    try:
+        await ensure_indexes(db)
+        await backfill_counters(db.moderation_logs, db[VIOLATION_COUNTERS_COLLECTION], args.guild_id)
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Build violation counters from moderation_logs")
+    parser.add_argument("--guild-id", type=int, default=None, help="Only backfill this guild")
+    asyncio.run(_backfill_main(parser.parse_args()))
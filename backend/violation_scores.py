@@ -0,0 +1,186 @@
+"""
+Time-decayed violation scores
+Each member's score halves every half-life and grows by the action's weight on
+every logged violation. Updates are a single atomic pipeline upsert.
+
+Ranking: every score decays at the same rate, so ordering by
+    rank_key = log2(score) + (score_at - EPOCH) / half_life
+orders members by their current score at any moment. rank_key never changes
+between violations, so an index on (guild_id, rank_key) is a maintained
+top-N structure and the current score is 2 ** (rank_key - (now - EPOCH) / half_life).
+"""
+
+import argparse
+import asyncio
+import logging
+import math
+import os
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from pymongo import DESCENDING, UpdateOne
+
+logger = logging.getLogger(__name__)
+
+VIOLATION_SCORES_COLLECTION = "violation_scores"
+
+DEFAULT_WEIGHTS = {"warn": 1.0, "mute": 2.0, "kick": 4.0, "ban": 8.0}
+
+# Reference point for rank keys; changing it (or the half-life) needs a backfill
+EPOCH = datetime(2020, 1, 1)
+
+
+def _parse_weights(spec: str) -> Dict[str, float]:
+    """Parse "warn=1,mute=2,kick=4,ban=8" """
+    weights = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        action_type, weight = part.split("=", 1)
+        weights[action_type.strip()] = float(weight)
+    return weights
+
+
+class ViolationScorer:
+    """Weights and half-life for violation scores"""
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None, half_life_days: float = 30.0):
+        self.weights = dict(DEFAULT_WEIGHTS if weights is None else weights)
+        self.half_life_days = half_life_days
+        self.half_life_ms = half_life_days * 86400 * 1000
+
+    @classmethod
+    def from_env(cls):
+        """Build a scorer from VIOLATION_WEIGHTS and VIOLATION_HALF_LIFE_DAYS"""
+        spec = os.environ.get('VIOLATION_WEIGHTS', '')
+        try:
+            weights = _parse_weights(spec) if spec else None
+        except ValueError as e:
+            logger.error(f"Ignoring VIOLATION_WEIGHTS: {e}")
+            weights = None
+        return cls(weights, float(os.environ.get('VIOLATION_HALF_LIFE_DAYS', '30')))
+
+    def _elapsed_half_lives(self, moment: datetime) -> float:
+        return (moment - EPOCH).total_seconds() * 1000 / self.half_life_ms
+
+    def rank_key(self, score: float, score_at: datetime) -> float:
+        return math.log2(score) + self._elapsed_half_lives(score_at)
+
+    def current_score(self, rank_key: float, now: Optional[datetime] = None) -> float:
+        return 2 ** (rank_key - self._elapsed_half_lives(now or datetime.utcnow()))
+
+    def decayed(self, score: float, score_at: datetime, now: datetime) -> float:
+        return score * 0.5 ** ((now - score_at).total_seconds() * 1000 / self.half_life_ms)
+
+    def _update(self, action: dict):
+        """(filter, pipeline) adding the action's weight to the decayed score"""
+        now = action["timestamp"]
+        weight = self.weights[action["action_type"]]
+        decayed = {"$multiply": [
+            {"$ifNull": ["$score", 0]},
+            {"$pow": [0.5, {"$divide": [
+                {"$subtract": [now, {"$ifNull": ["$score_at", now]}]},
+                self.half_life_ms
+            ]}]}
+        ]}
+        return (
+            {"guild_id": action["guild_id"], "user_id": action["target_user_id"]},
+            [
+                {"$set": {"score": {"$add": [decayed, weight]}, "score_at": now}},
+                {"$set": {"rank_key": {"$add": [
+                    {"$log": ["$score", 2]},
+                    {"$divide": [{"$subtract": [now, EPOCH]}, self.half_life_ms]}
+                ]}}}
+            ]
+        )
+
+    def build_updates(self, actions: Iterable[dict]) -> List[UpdateOne]:
+        """One pipeline upsert per weighted action"""
+        return [
+            UpdateOne(*self._update(action), upsert=True)
+            for action in actions if self.weights.get(action["action_type"], 0) > 0
+        ]
+
+    async def record(self, collection, actions: Iterable[dict]) -> int:
+        updates = self.build_updates(actions)
+        if updates:
+            await collection.bulk_write(updates, ordered=False)
+        return len(updates)
+
+    async def get_score(self, collection, guild_id: int, user_id: int) -> float:
+        doc = await collection.find_one({"guild_id": guild_id, "user_id": user_id}, {"rank_key": 1})
+        return self.current_score(doc["rank_key"]) if doc else 0.0
+
+    async def top_risk(self, collection, guild_id: int, limit: int = 10) -> List[dict]:
+        """Highest current scores in a guild, read straight off the rank index"""
+        now = datetime.utcnow()
+        docs = await collection.find(
+            {"guild_id": guild_id}, {"_id": 0, "user_id": 1, "rank_key": 1, "score_at": 1}
+        ).sort("rank_key", DESCENDING).limit(limit).to_list(length=limit)
+        return [
+            {
+                "user_id": doc["user_id"],
+                "score": round(self.current_score(doc["rank_key"], now), 3),
+                "last_violation_at": doc["score_at"]
+            }
+            for doc in docs
+        ]
+
+    async def backfill(self, logs_collection, scores_collection, guild_id: Optional[int] = None,
+                       batch_size: int = 1000) -> int:
+        """Recompute every score from moderation_logs (after changing weights or half-life)"""
+        now = datetime.utcnow()
+        match = {"action_type": {"$in": [t for t, w in self.weights.items() if w > 0]}}
+        if guild_id:
+            match["guild_id"] = guild_id
+        weight = {"$switch": {
+            "branches": [{"case": {"$eq": ["$action_type", t]}, "then": w} for t, w in self.weights.items()],
+            "default": 0
+        }}
+        pipeline = [
+            {"$match": match},
+            {"$group": {
+                "_id": {"guild_id": "$guild_id", "user_id": "$target_user_id"},
+                "score": {"$sum": {"$multiply": [
+                    weight,
+                    {"$pow": [0.5, {"$divide": [{"$subtract": [now, "$timestamp"]}, self.half_life_ms]}]}
+                ]}}
+            }}
+        ]
+
+        written = 0
+        batch = []
+        async for row in logs_collection.aggregate(pipeline, allowDiskUse=True):
+            if row["score"] <= 0:
+                continue
+            batch.append(UpdateOne(
+                {"guild_id": row["_id"]["guild_id"], "user_id": row["_id"]["user_id"]},
+                {"$set": {"score": row["score"], "score_at": now, "rank_key": self.rank_key(row["score"], now)}},
+                upsert=True
+            ))
+            if len(batch) >= batch_size:
+                await scores_collection.bulk_write(batch, ordered=False)
+                written += len(batch)
+                batch = []
+        if batch:
+            await scores_collection.bulk_write(batch, ordered=False)
+            written += len(batch)
+
+        logger.info(f"Backfilled {written} violation score(s)")
+        return written
+
+
+async def _backfill_main(args):
+    from database import client, db
+    from db_indexes import ensure_indexes
+
+    try:
+        await ensure_indexes(db)
+        await ViolationScorer.from_env().backfill(db.moderation_logs, db[VIOLATION_SCORES_COLLECTION], args.guild_id)
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Recompute violation scores from moderation_logs")
+    parser.add_argument("--guild-id", type=int, default=None, help="Only backfill this guild")
+    asyncio.run(_backfill_main(parser.parse_args()))
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the moderation analytics pipelines
+Seeds a scratch collection with moderation logs and compares the old
+load-everything-and-count-in-Python reports with the aggregation pipelines.
+
+Usage:
+    MONGO_URL=mongodb://localhost:27017 python benchmarks/bench_moderation_analytics.py --count 1000000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from moderation_analytics import daily_summary, violations_report
+
+ACTION_TYPES = ["warn", "mute", "kick", "ban", "unmute", "unban", "clear"]
+
+
+async def seed(collection, count: int, guilds: int, users: int, batch_size: int = 10000):
+    """Insert `count` synthetic moderation logs spread over the last 90 days"""
+    await collection.drop()
+    now = datetime.utcnow()
+    rng = random.Random(42)
+    inserted = 0
+    while inserted < count:
+        batch = []
+        for _ in range(min(batch_size, count - inserted)):
+            batch.append({
+                "id": str(uuid.uuid4()),
+                "action_type": rng.choice(ACTION_TYPES),
+                "target_user_id": rng.randrange(users),
+                "moderator_id": rng.randrange(50),
+                "guild_id": rng.randrange(guilds) + 1,
+                "reason": "benchmark",
+                "duration": None,
+                "timestamp": now - timedelta(seconds=rng.randrange(90 * 24 * 3600))
+            })
+        await collection.insert_many(batch, ordered=False)
+        inserted += len(batch)
+    await collection.create_index([("guild_id", 1), ("timestamp", 1)])
+
+
+async def legacy_violations_report(collection, guild_id):
+    """The previous implementation: fetch every document and count in Python"""
+    violations = await collection.find({"guild_id": guild_id}).to_list(length=None)
+    violation_types = {}
+    top_violators = {}
+    for violation in violations:
+        violation_types[violation["action_type"]] = violation_types.get(violation["action_type"], 0) + 1
+        top_violators[violation["target_user_id"]] = top_violators.get(violation["target_user_id"], 0) + 1
+    sorted_violators = sorted(top_violators.items(), key=lambda x: x[1], reverse=True)[:10]
+    return {
+        "total_violations": len(violations),
+        "violation_types": violation_types,
+        "top_violators": [{"user_id": u, "count": c} for u, c in sorted_violators]
+    }
+
+
+async def legacy_daily_summary(collection, guild_id, day):
+    mod_actions = await collection.find({"guild_id": guild_id, "timestamp": {"$gte": day}}).to_list(length=None)
+    summary = {}
+    for action in mod_actions:
+        summary[action["action_type"]] = summary.get(action["action_type"], 0) + 1
+    return summary
+
+
+async def measure(label, coro_factory, repeat):
+    """Run a coroutine `repeat` times and report best latency and peak Python memory"""
+    timings = []
+    peak = 0
+    for _ in range(repeat):
+        tracemalloc.start()
+        started = time.perf_counter()
+        await coro_factory()
+        timings.append(time.perf_counter() - started)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    print(f"{label:<32} best {min(timings) * 1000:>10.1f} ms   peak {peak / 1024 / 1024:>8.2f} MB")
+
+
+async def main(args):
+    client = AsyncIOMotorClient(os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    collection = client[args.db]["moderation_logs"]
+    try:
+        if not args.skip_seed:
+            print(f"Seeding {args.count} moderation logs into {args.db}.moderation_logs ...")
+            await seed(collection, args.count, args.guilds, args.users)
+
+        guild_id = 1
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        print(f"Guild {guild_id}: {await collection.count_documents({'guild_id': guild_id})} logs\n")
+
+        await measure("violations report (legacy)", lambda: legacy_violations_report(collection, guild_id), args.repeat)
+        await measure("violations report (pipeline)", lambda: violations_report(collection, guild_id), args.repeat)
+        await measure("daily summary (legacy)", lambda: legacy_daily_summary(collection, guild_id, today), args.repeat)
+        await measure("daily summary (pipeline)", lambda: daily_summary(collection, guild_id, today), args.repeat)
+    finally:
+        # Only drop what this run seeded; --skip-seed points at a database someone else owns
+        if not args.skip_seed and not args.keep:
+            await client.drop_database(args.db)
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark moderation analytics pipelines")
+    parser.add_argument("--db", default="bench_moderation_analytics", help="Scratch database name")
+    parser.add_argument("--count", type=int, default=1_000_000, help="Number of logs to seed")
+    parser.add_argument("--guilds", type=int, default=4, help="Number of guilds to spread logs over")
+    parser.add_argument("--users", type=int, default=50_000, help="Number of distinct target users")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement")
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse an already seeded database")
+    parser.add_argument("--keep", action="store_true", help="Keep the seeded database afterwards")
+    asyncio.run(main(parser.parse_args()))
@@ -64,12 +64,12 @@ while true; do
     log_message "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"
     log_message "💓 Keep-Alive Ping #$((successful_pings + failed_pings + 1))"
     
-    # Try multiple endpoints
+    # Try multiple endpoints (cheapest first; none of them touch the database)
     endpoints=(
+        "/livez:Liveness"
         "/wake-up:Wake-up"
         "/api/keep-alive:Keep-alive"
         "/:Root"
-        "/api/health:Health Check"
     )
     
     ping_success=false
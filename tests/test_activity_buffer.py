@@ -0,0 +1,130 @@
+import asyncio
+import sys
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+from pymongo.errors import BulkWriteError
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from activity_buffer import ActivityBuffer
+
+
+class FakeCollection:
+    def __init__(self):
+        self.batches = []
+
+    async def insert_many(self, documents, ordered=True):
+        self.batches.append((list(documents), ordered))
+        return SimpleNamespace(inserted_ids=list(range(len(documents))))
+
+
+class FailingCollection:
+    """insert_many that rejects some documents the way an unordered bulk write reports it"""
+
+    def __init__(self, error):
+        self.error = error
+
+    async def insert_many(self, documents, ordered=True):
+        raise self.error
+
+
+class FakeRollups:
+    def __init__(self):
+        self.events = []
+
+    async def bulk_write(self, updates, ordered=True):
+        self.events.extend(updates)
+
+
+class ActivityBufferTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_record_does_not_write_until_flush(self):
+        collection = FakeCollection()
+        buffer = ActivityBuffer(collection, batch_size=10, max_queue=100)
+
+        self.assertTrue(buffer.record(1, {"type": "message", "user_id": 2}))
+        self.assertEqual(collection.batches, [])
+
+        written = await buffer.flush()
+        self.assertEqual(written, 1)
+        documents, ordered = collection.batches[0]
+        self.assertFalse(ordered)
+        self.assertEqual(documents[0]["guild_id"], 1)
+        self.assertEqual(documents[0]["user_id"], 2)
+
+    async def test_flush_splits_into_batches(self):
+        collection = FakeCollection()
+        buffer = ActivityBuffer(collection, batch_size=3, max_queue=100)
+        for i in range(7):
+            buffer.record(1, {"type": "message", "user_id": i})
+
+        await buffer.flush()
+        self.assertEqual([len(b) for b, _ in collection.batches], [3, 3, 1])
+        stats = buffer.stats()
+        self.assertEqual(stats["queued"], 7)
+        self.assertEqual(stats["flushed"], 7)
+        self.assertEqual(stats["flush_count"], 3)
+        self.assertEqual(stats["pending"], 0)
+
+    async def test_drop_oldest_policy(self):
+        buffer = ActivityBuffer(FakeCollection(), batch_size=1, max_queue=2, overflow_policy="drop_oldest")
+        for i in range(3):
+            self.assertTrue(buffer.record(1, {"user_id": i}))
+
+        self.assertEqual(buffer.dropped, 1)
+        self.assertEqual([e["user_id"] for e in buffer._queue], [1, 2])
+
+    async def test_drop_newest_policy(self):
+        buffer = ActivityBuffer(FakeCollection(), batch_size=1, max_queue=2, overflow_policy="drop_newest")
+        results = [buffer.record(1, {"user_id": i}) for i in range(3)]
+
+        self.assertEqual(results, [True, True, False])
+        self.assertEqual([e["user_id"] for e in buffer._queue], [0, 1])
+
+    async def test_batch_size_triggers_background_flush(self):
+        collection = FakeCollection()
+        buffer = ActivityBuffer(collection, batch_size=2, flush_interval=60, max_queue=10)
+        buffer.start()
+        buffer.record(1, {"user_id": 1})
+        buffer.record(1, {"user_id": 2})
+
+        await asyncio.sleep(0.05)
+        self.assertEqual(buffer.flushed, 2)
+        await buffer.close()
+
+    async def test_close_flushes_pending_events(self):
+        collection = FakeCollection()
+        buffer = ActivityBuffer(collection, batch_size=100, flush_interval=60, max_queue=1000)
+        buffer.start()
+        buffer.record(1, {"user_id": 1})
+
+        await buffer.close()
+        self.assertEqual(buffer.flushed, 1)
+        self.assertEqual(len(collection.batches), 1)
+
+    async def test_rollups_only_count_events_that_were_stored(self):
+        error = BulkWriteError({"nInserted": 2, "writeErrors": [{"index": 1, "code": 11000, "errmsg": "dup"}]})
+        rollups = FakeRollups()
+        buffer = ActivityBuffer(FailingCollection(error), batch_size=10, max_queue=100, rollup_collection=rollups)
+        for user_id in (1, 2, 3):
+            buffer.record(1, {"type": "message", "user_id": user_id})
+
+        self.assertEqual(await buffer.flush(), 2)
+        self.assertEqual(sorted(u._filter["user_id"] for u in rollups.events), [1, 3])
+        self.assertEqual(buffer.failed, 1)
+
+    async def test_rollups_skipped_when_the_failure_is_opaque(self):
+        rollups = FakeRollups()
+        buffer = ActivityBuffer(FailingCollection(ConnectionError("reset")), batch_size=10, max_queue=100,
+                                rollup_collection=rollups)
+        buffer.record(1, {"type": "message", "user_id": 1})
+
+        self.assertEqual(await buffer.flush(), 0)
+        self.assertEqual(rollups.events, [])
+        self.assertEqual(buffer.failed, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
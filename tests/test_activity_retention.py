@@ -0,0 +1,124 @@
+import sys
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from activity_retention import RAW_TTL_INDEX, RetentionPolicy, compact_pending_days, ensure_retention_indexes
+
+NOW = datetime(2024, 6, 10, 12)
+
+
+class FakeCursor:
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def to_list(self, length=None):
+        return self.rows
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for row in self.rows:
+            yield row
+
+
+class FakeCollection:
+    """Records every call in a log shared by the whole fake database"""
+
+    def __init__(self, name, log, indexes=None, rows=None):
+        self.name = name
+        self.log = log
+        self.indexes = indexes or {}
+        self.rows = rows or []
+        self.database = self
+        self.docs = {}
+
+    async def index_information(self):
+        return self.indexes
+
+    async def create_index(self, keys, name, **kwargs):
+        self.log.append(("create_index", self.name, name, kwargs.get("expireAfterSeconds")))
+        self.indexes[name] = kwargs
+
+    async def drop_index(self, name):
+        self.log.append(("drop_index", self.name, name))
+
+    async def command(self, *args, **kwargs):
+        self.log.append(("command", args[0], kwargs["index"]["expireAfterSeconds"]))
+
+    def aggregate(self, pipeline, **kwargs):
+        self.log.append(("aggregate", self.name, pipeline[0]["$match"].get("timestamp")))
+        return FakeCursor(self.rows)
+
+    async def bulk_write(self, updates, ordered=True):
+        self.log.append(("bulk_write", self.name, len(updates)))
+
+    async def update_one(self, query, update, upsert=False):
+        self.docs[query["_id"]] = update["$set"]
+
+    async def find_one(self, query):
+        return self.docs.get(query["_id"])
+
+    def find(self, query, projection=None):
+        return FakeCursor([doc for doc in self.docs.values() if "day" in doc and doc["day"] >= query["day"]["$gte"]])
+
+
+class FakeDb:
+
+    def __init__(self, raw_indexes=None, raw_rows=None):
+        self.log = []
+        self.server_activity = FakeCollection("server_activity", self.log, raw_indexes, raw_rows)
+        self.retention_state = FakeCollection("retention_state", self.log)
+        self.rollups = FakeCollection("activity_daily", self.log)
+
+    def __getitem__(self, name):
+        return self.rollups
+
+
+def raw_row(day):
+    return {"_id": {"guild_id": 1, "user_id": 10, "day": day}, "messages": 3}
+
+
+class RetentionTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_first_deploy_compacts_all_history_before_creating_the_ttl(self):
+        db = FakeDb(raw_rows=[raw_row(datetime(2023, 1, 1)), raw_row(datetime(2024, 6, 9))])
+        await ensure_retention_indexes(db, RetentionPolicy(raw_days=35), now=NOW)
+
+        aggregate = db.log.index(("aggregate", "server_activity", {"$lt": datetime(2024, 6, 10)}))
+        create = db.log.index(("create_index", "server_activity", RAW_TTL_INDEX, 35 * 86400))
+        self.assertLess(aggregate, create)
+        self.assertIn(("bulk_write", "activity_daily", 2), db.log)
+        self.assertEqual(db.retention_state.docs["history"]["through"], datetime(2024, 6, 9))
+
+        # Days covered by the history pass are not recounted one by one
+        self.assertEqual(await compact_pending_days(db, RetentionPolicy(raw_days=35), now=NOW), 0)
+
+    async def test_shorter_ttl_recounts_only_whole_days_first(self):
+        indexes = {RAW_TTL_INDEX: {"expireAfterSeconds": 60 * 86400}}
+        db = FakeDb(raw_indexes=indexes)
+        await ensure_retention_indexes(db, RetentionPolicy(raw_days=35), now=NOW)
+
+        self.assertEqual(db.log[0], ("aggregate", "server_activity",
+                                     {"$gte": datetime(2024, 4, 12), "$lt": datetime(2024, 6, 10)}))
+        self.assertIn(("command", "collMod", 35 * 86400), db.log)
+
+    async def test_unchanged_ttl_skips_the_history_pass(self):
+        db = FakeDb(raw_indexes={RAW_TTL_INDEX: {"expireAfterSeconds": 35 * 86400}})
+        await ensure_retention_indexes(db, RetentionPolicy(raw_days=35), now=NOW)
+        self.assertFalse([call for call in db.log if call[0] == "aggregate"])
+
+    async def test_pending_days_are_compacted_once(self):
+        db = FakeDb()
+        policy = RetentionPolicy(raw_days=35)
+        self.assertEqual(await compact_pending_days(db, policy, now=NOW), 34)
+        self.assertEqual(await compact_pending_days(db, policy, now=NOW), 0)
+        self.assertEqual(await compact_pending_days(db, policy, now=NOW + timedelta(days=1)), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
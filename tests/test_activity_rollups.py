@@ -0,0 +1,46 @@
+import sys
+import unittest
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from activity_rollups import build_rollup_updates, day_start, window_start
+
+
+class RollupUpdatesTest(unittest.TestCase):
+
+    def test_day_start_truncates_to_midnight(self):
+        self.assertEqual(day_start(datetime(2024, 5, 1, 13, 45, 12, 99)), datetime(2024, 5, 1))
+
+    def test_window_covers_exactly_n_calendar_days(self):
+        now = datetime(2024, 5, 7, 15)
+        self.assertEqual(window_start(7, now), datetime(2024, 5, 1))
+        self.assertEqual(window_start(1, now), datetime(2024, 5, 7))
+
+    def test_events_fold_into_one_update_per_guild_day_user(self):
+        events = [
+            {"type": "message", "guild_id": 1, "user_id": 10, "timestamp": datetime(2024, 5, 1, 9)},
+            {"type": "message", "guild_id": 1, "user_id": 10, "timestamp": datetime(2024, 5, 1, 23)},
+            {"type": "message", "guild_id": 1, "user_id": 10, "timestamp": datetime(2024, 5, 2, 1)},
+            {"type": "message", "guild_id": 2, "user_id": 10, "timestamp": datetime(2024, 5, 1, 9)},
+            {"type": "reaction", "guild_id": 1, "user_id": 10, "timestamp": datetime(2024, 5, 1, 9)},
+        ]
+
+        updates = {
+            (u._filter["guild_id"], u._filter["day"], u._filter["user_id"]): u._doc["$inc"]["messages"]
+            for u in build_rollup_updates(events)
+        }
+        self.assertEqual(updates, {
+            (1, datetime(2024, 5, 1), 10): 2,
+            (1, datetime(2024, 5, 2), 10): 1,
+            (2, datetime(2024, 5, 1), 10): 1,
+        })
+
+    def test_updates_are_upserts(self):
+        events = [{"type": "message", "guild_id": 1, "user_id": 10, "timestamp": datetime(2024, 5, 1)}]
+        self.assertTrue(all(u._upsert for u in build_rollup_updates(events)))
+
+
+if __name__ == "__main__":
+    unittest.main()
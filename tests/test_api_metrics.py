@@ -0,0 +1,105 @@
+import asyncio
+import sys
+import time
+import unittest
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI, HTTPException
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from api_metrics import UNMATCHED_ROUTE, DatabaseProbe, ProcessSampler, RequestMetrics, RequestMetricsMiddleware
+from prometheus import Exposition
+
+
+def build_app(metrics: RequestMetrics) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        if item_id == 0:
+            raise HTTPException(status_code=404, detail="missing")
+        return {"id": item_id}
+
+    app.add_middleware(RequestMetricsMiddleware, metrics=metrics)
+    return app
+
+
+class FakeDb:
+
+    def __init__(self, delay: float = 0.0, error: Exception = None):
+        self.delay = delay
+        self.error = error
+
+    async def command(self, name):
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return {"ok": 1}
+
+
+class RequestMetricsTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_requests_are_counted_per_route_template(self):
+        metrics = RequestMetrics()
+        transport = httpx.ASGITransport(app=build_app(metrics))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            for item_id in (1, 2, 3, 0):
+                await http.get(f"/items/{item_id}")
+            await http.get("/random/path")
+
+        self.assertEqual(metrics.responses[("GET", "/items/{item_id}", 200)], 3)
+        self.assertEqual(metrics.responses[("GET", "/items/{item_id}", 404)], 1)
+        self.assertEqual(metrics.responses[("GET", UNMATCHED_ROUTE, 404)], 1)
+        self.assertEqual(metrics.latency[("GET", "/items/{item_id}")].count, 4)
+        self.assertEqual(metrics.in_flight, 0)
+
+        exposition = Exposition()
+        metrics.collect(exposition)
+        text = exposition.render()
+        self.assertIn('http_requests_total{method="GET",route="/items/{item_id}",status="200"} 3', text)
+        self.assertIn('http_request_duration_seconds_count{method="GET",route="/items/{item_id}"} 4', text)
+
+
+class BackgroundSamplersTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_database_probe_tracks_failures(self):
+        probe = DatabaseProbe(FakeDb(), interval=60)
+        self.assertEqual(probe.status, "unknown")
+        await probe.check()
+        self.assertTrue(probe.up)
+        self.assertIsNotNone(probe.snapshot()["age_seconds"])
+
+        probe.db = FakeDb(error=ConnectionError("down"))
+        await probe.check()
+        await probe.check()
+        self.assertFalse(probe.up)
+        self.assertEqual(probe.consecutive_failures, 2)
+
+        probe.db = FakeDb(delay=1.0)
+        probe.timeout = 0.05
+        await probe.check()
+        self.assertIn("TimeoutError", probe.status)
+
+    async def test_database_probe_runs_on_a_schedule(self):
+        probe = DatabaseProbe(FakeDb(), interval=0.02)
+        probe.start()
+        await asyncio.sleep(0.1)
+        probe.stop()
+        self.assertTrue(probe.up)
+
+    async def test_process_sampler_uses_the_real_process_start(self):
+        sampler = ProcessSampler(interval=60)
+        await sampler.refresh()
+        self.assertGreater(sampler.sample["memory_mb"], 0)
+        self.assertLess(sampler.process_start_time(), time.time())
+        self.assertGreater(sampler.uptime_seconds(), 0)
+
+        exposition = Exposition()
+        sampler.collect(exposition)
+        self.assertIn("process_resident_memory_bytes", exposition.render())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+import asyncio
+import json
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from bot_cluster import ClusterCoordinator, ShardStats, format_stats, parse_stats, read_cluster_status, shard_ranges
+
+BACKEND = Path(__file__).resolve().parent.parent / "backend"
+
+# Stands in for discord_bot.py: "connects" its shards and reports stats like a worker
+STUB_WORKER = """
+import os, time
+from bot_cluster import ShardStats, format_stats
+shard_ids = [int(i) for i in os.environ['BOT_SHARD_IDS'].split(',')]
+stats = ShardStats(shard_ids)
+print('Bot is ready', flush=True)
+while True:
+    for shard_id in shard_ids:
+        stats.message(shard_id)
+        stats.gateway_event()
+    report = stats.report(int(os.environ['BOT_CLUSTER_ID']), True, [(i, 0.04) for i in shard_ids], shard_ids)
+    print(format_stats(report), flush=True)
+    time.sleep(float(os.environ['BOT_CLUSTER_STATS_INTERVAL']))
+"""
+
+SILENT_WORKER = "import time; print('Bot is ready', flush=True); time.sleep(30)"
+
+
+async def wait_until(predicate, timeout: float = 5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not reached")
+        await asyncio.sleep(0.02)
+
+
+class ShardingTest(unittest.TestCase):
+
+    def test_shard_ranges_are_contiguous_and_balanced(self):
+        self.assertEqual(shard_ranges(10, 3), [[0, 1, 2, 3], [4, 5, 6], [7, 8, 9]])
+        self.assertEqual(shard_ranges(2, 5), [[0], [1]])
+        self.assertEqual(shard_ranges(1, 1), [[0]])
+
+    def test_stats_report_rates_and_resets(self):
+        stats = ShardStats([3, 4])
+        stats._last_report = 100.0
+        for _ in range(20):
+            stats.gateway_event()
+        for _ in range(10):
+            stats.message(4)
+
+        report = stats.report(1, True, [(3, 0.05), (4, float("inf"))], [3, 4, 4], now=110.0)
+        self.assertEqual(report["events_per_second"], 2.0)
+        self.assertEqual(report["shards"][0], {"shard_id": 3, "latency_ms": 50.0, "guilds": 1,
+                                               "messages_per_second": 0.0})
+        self.assertIsNone(report["shards"][1]["latency_ms"])
+        self.assertEqual(report["shards"][1]["messages_per_second"], 1.0)
+
+        again = stats.report(1, True, [], [], now=120.0)
+        self.assertEqual(again["events_per_second"], 0.0)
+
+    def test_stats_lines_round_trip(self):
+        report = {"cluster_id": 0, "shards": []}
+        self.assertEqual(parse_stats(format_stats(report)), report)
+        self.assertIsNone(parse_stats("Bot is ready"))
+        self.assertIsNone(parse_stats("CLUSTER_STATS {broken"))
+
+
+class ClusterCoordinatorTest(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.status_file = Path(__file__).resolve().parent / "cluster_status_test.json"
+
+    def tearDown(self):
+        if self.status_file.exists():
+            self.status_file.unlink()
+
+    def coordinator(self, code: str, **kwargs) -> ClusterCoordinator:
+        return ClusterCoordinator(
+            5, 2, BACKEND, worker_command=[sys.executable, "-u", "-c", code],
+            status_file=self.status_file, stats_interval=0.05,
+            stable_after=0.1, backoff_initial=0.05, stop_timeout=1.0, **kwargs
+        )
+
+    async def test_workers_report_and_dead_workers_restart(self):
+        coordinator = self.coordinator(STUB_WORKER)
+        stop = asyncio.Event()
+        runner = asyncio.create_task(coordinator.run(stop))
+        try:
+            await wait_until(lambda: len(coordinator.reports) == 2
+                             and coordinator.status()["ready_clusters"] == 2)
+            status = coordinator.status()
+            self.assertEqual([c["shard_ids"] for c in status["clusters"]], [[0, 1, 2], [3, 4]])
+            self.assertEqual(status["guilds"], 5)
+            self.assertEqual(status["max_latency_ms"], 40.0)
+            self.assertGreater(status["events_per_second"], 0)
+            # Stats lines are consumed, not logged as worker output
+            self.assertFalse(any(line.startswith("CLUSTER_STATS") for line in coordinator.workers[0].output))
+
+            await wait_until(lambda: (read_cluster_status(self.status_file) or {}).get("ready_clusters") == 2)
+
+            coordinator.workers[1].process.kill()
+            await wait_until(lambda: coordinator.workers[1].restarts == 1
+                             and coordinator.workers[1].state in ("ready", "running"))
+        finally:
+            stop.set()
+            await runner
+
+        written = json.loads(self.status_file.read_text())
+        self.assertTrue(all(c["status"] == "stopped" for c in written["clusters"]))
+
+    async def test_silent_worker_is_treated_as_hung(self):
+        coordinator = self.coordinator(SILENT_WORKER, stale_after=0.3)
+        stop = asyncio.Event()
+        runner = asyncio.create_task(coordinator.run(stop))
+        try:
+            await wait_until(lambda: coordinator.hung_restarts >= 2)
+            await wait_until(lambda: all(worker.restarts >= 1 for worker in coordinator.workers))
+        finally:
+            stop.set()
+            await runner
+
+
+if __name__ == "__main__":
+    unittest.main()
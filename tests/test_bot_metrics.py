@@ -0,0 +1,148 @@
+import asyncio
+import contextvars
+import functools
+import sys
+import time
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from bot_metrics import BotMetrics, MongoCallListener, _slow_callback_watcher, _timed_request, current_call
+
+
+async def fake_discord_request(delay: float):
+    await asyncio.sleep(delay)
+
+
+async def fake_mongo_command(duration_ms: float):
+    """Report a command from an executor thread the way Motor runs pymongo"""
+    listener = MongoCallListener()
+
+    def run_command():
+        time.sleep(duration_ms / 1000)
+        listener.succeeded(SimpleNamespace(duration_micros=int(duration_ms * 1000)))
+
+    context = contextvars.copy_context()
+    await asyncio.get_running_loop().run_in_executor(None, functools.partial(context.run, run_command))
+
+
+class FakeTree:
+
+    def __init__(self, commands):
+        self.commands = commands
+
+    def walk_commands(self):
+        return iter(self.commands)
+
+
+class BotMetricsTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_command_time_is_split_between_api_db_and_compute(self):
+        metrics = BotMetrics()
+        request = _timed_request(fake_discord_request)
+
+        async def command(interaction):
+            await request(0.05)
+            await fake_mongo_command(30)
+            time.sleep(0.02)
+            return "done"
+
+        wrapped = metrics.wrap("command", "ping", command)
+        self.assertEqual(await wrapped(None), "done")
+        self.assertIsNone(current_call.get())
+
+        stats = metrics.commands["ping"]
+        self.assertEqual(stats.total.count, 1)
+        self.assertGreaterEqual(stats.api.total_ms, 50)
+        self.assertAlmostEqual(stats.db.total_ms, 30, places=3)
+        self.assertGreaterEqual(stats.compute.total_ms, 15)
+        self.assertEqual(stats.errors, 0)
+
+    async def test_failures_are_counted_and_reraised(self):
+        metrics = BotMetrics()
+
+        async def on_message(message):
+            raise RuntimeError("boom")
+
+        with self.assertRaises(RuntimeError):
+            await metrics.wrap("event", "message", on_message)(None)
+        self.assertEqual(metrics.events["message"].errors, 1)
+
+    async def test_requests_outside_a_command_are_not_timed(self):
+        calls = []
+
+        async def request():
+            calls.append(current_call.get())
+
+        await _timed_request(request)()
+        self.assertEqual(calls, [None])
+
+    async def test_instrument_wraps_commands_and_event_handlers_once(self):
+        async def ping(interaction):
+            pass
+
+        async def on_ready():
+            pass
+
+        async def on_socket_event_type(event_type):
+            pass
+
+        command = SimpleNamespace(qualified_name="ping", _callback=ping)
+        bot = SimpleNamespace(tree=FakeTree([command]), on_ready=on_ready,
+                              on_socket_event_type=on_socket_event_type)
+        metrics = BotMetrics()
+        metrics.instrument(bot)
+        metrics.instrument(bot)
+
+        await command._callback(None)
+        await bot.on_ready()
+        self.assertIs(bot.on_socket_event_type, on_socket_event_type)
+        self.assertEqual(metrics.commands["ping"].total.count, 1)
+        self.assertEqual(metrics.events["ready"].total.count, 1)
+
+    async def test_slow_callback_watch_is_off_by_default(self):
+        metrics = BotMetrics()
+        metrics.start(probe_interval=0.02)
+        try:
+            await asyncio.sleep(0.01)
+            self.assertIsNot(_slow_callback_watcher["metrics"], metrics)
+        finally:
+            metrics.stop()
+
+    async def test_blocking_the_loop_shows_up_as_lag_and_slow_callbacks(self):
+        metrics = BotMetrics(slow_callback_ms=50)
+        metrics.start(probe_interval=0.02)
+        try:
+            await asyncio.sleep(0.05)
+
+            async def blocker():
+                time.sleep(0.15)
+
+            await asyncio.create_task(blocker())
+            await asyncio.sleep(0.05)
+        finally:
+            metrics.stop()
+
+        self.assertGreaterEqual(metrics.slow_callbacks, 1)
+        self.assertGreaterEqual(metrics.slowest_callback_ms, 150)
+        self.assertGreaterEqual(metrics.loop_lag.max_ms, 100)
+
+    async def test_render_exports_prometheus_histograms(self):
+        metrics = BotMetrics(const_labels={"cluster": "1"})
+
+        async def ping(interaction):
+            pass
+
+        await metrics.wrap("command", "ping", ping)(None)
+        text = metrics.render()
+        self.assertIn("# TYPE discord_bot_command_duration_seconds histogram", text)
+        self.assertIn('discord_bot_command_duration_seconds_count{cluster="1",command="ping",part="total"} 1', text)
+        self.assertNotIn("event_loop_slow_callbacks_total", text)
+        self.assertIn("event_loop_slow_callbacks_total", BotMetrics(slow_callback_ms=100).render())
+        self.assertEqual(text.count("# TYPE discord_bot_command_duration_seconds"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,214 @@
+import asyncio
+import logging
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from bot_supervisor import BotSupervisor, BotTaskSupervisor
+
+CWD = Path(__file__).resolve().parent
+
+
+def child(code: str, **kwargs) -> BotSupervisor:
+    kwargs.setdefault("stable_after", 0.1)
+    kwargs.setdefault("backoff_initial", 0.05)
+    return BotSupervisor([sys.executable, "-u", "-c", code], CWD, **kwargs)
+
+
+async def wait_for_state(supervisor: BotSupervisor, state: str, timeout: float = 5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while supervisor.state != state:
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError(f"state stayed {supervisor.state!r}, expected {state!r}")
+        await asyncio.sleep(0.01)
+
+
+class BotSupervisorTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_states_progress_to_running_and_stop(self):
+        supervisor = child("import time; print('Bot is ready'); time.sleep(30)")
+
+        self.assertTrue(await supervisor.start())
+        self.assertFalse(await supervisor.start())
+        await wait_for_state(supervisor, "running")
+        self.assertIsNotNone(supervisor.status()["pid"])
+
+        self.assertTrue(await supervisor.stop())
+        status = supervisor.status()
+        self.assertEqual(status["status"], "stopped")
+        self.assertIsNone(status["pid"])
+        self.assertEqual([t["state"] for t in status["transitions"]],
+                         ["starting", "ready", "running", "stopping", "stopped"])
+
+    async def test_slow_to_connect_child_still_reaches_running(self):
+        # Ready arrives well after stable_after has elapsed since the spawn
+        supervisor = child("import time; time.sleep(0.3); print('Bot is ready'); time.sleep(30)")
+        await supervisor.start()
+        await wait_for_state(supervisor, "running")
+        await supervisor.stop()
+
+    async def test_output_is_drained_past_the_pipe_buffer(self):
+        # ~1 MB of output would block a child whose pipe nobody reads
+        supervisor = child("import time\nfor i in range(20000): print('x' * 50, i)\nprint('done')\ntime.sleep(30)",
+                           output_lines=10)
+        await supervisor.start()
+        for _ in range(500):
+            if supervisor.recent_output(1) == ["done"]:
+                break
+            await asyncio.sleep(0.01)
+
+        self.assertEqual(supervisor.recent_output(1), ["done"])
+        self.assertEqual(len(supervisor.output), 10)
+        await supervisor.stop()
+
+    async def test_crash_restarts_with_backoff(self):
+        supervisor = child("import sys; sys.exit(3)", max_restarts=2)
+        await supervisor.start()
+        await wait_for_state(supervisor, "crashed")
+        for _ in range(300):
+            if supervisor._monitor_task.done():
+                break
+            await asyncio.sleep(0.01)
+
+        status = supervisor.status()
+        self.assertEqual(status["restarts"], 2)
+        self.assertEqual(status["last_exit_code"], 3)
+        await supervisor.stop()
+
+    async def test_stop_kills_child_that_ignores_sigterm(self):
+        code = ("import signal, time; signal.signal(signal.SIGTERM, signal.SIG_IGN); "
+                "print('Bot is ready'); time.sleep(30)")
+        supervisor = child(code, stop_timeout=0.2)
+        await supervisor.start()
+        await wait_for_state(supervisor, "ready")
+
+        started = asyncio.get_running_loop().time()
+        await supervisor.stop()
+        self.assertLess(asyncio.get_running_loop().time() - started, 3)
+        self.assertEqual(supervisor.state, "stopped")
+
+    async def test_output_is_written_to_rotating_log_file(self):
+        log_file = CWD / "supervisor_test.log"
+        rotated = Path(f"{log_file}.1")
+        try:
+            supervisor = child("import time\nfor i in range(100): print('line', i)\ntime.sleep(30)",
+                               log_file=log_file, log_max_bytes=500)
+            await supervisor.start()
+            for _ in range(300):
+                if supervisor.recent_output(1) == ["line 99"]:
+                    break
+                await asyncio.sleep(0.01)
+            await supervisor.stop()
+
+            self.assertTrue(rotated.exists())
+            self.assertTrue(log_file.read_text().endswith("line 99\n"))
+        finally:
+            for path in (log_file, rotated):
+                if path.exists():
+                    path.unlink()
+
+
+class FakeBot:
+    """Coroutine-driven stand-in for the Discord client"""
+
+    def __init__(self, crashes: int = 0):
+        self.crashes = crashes
+        self.runs = 0
+        self.ready = False
+        self.closed = asyncio.Event()
+
+    async def run(self):
+        self.runs += 1
+        if self.runs <= self.crashes:
+            raise RuntimeError(f"crash {self.runs}")
+        self.closed.clear()
+        self.ready = True
+        await self.closed.wait()
+        self.ready = False
+
+    async def shutdown(self):
+        self.closed.set()
+
+
+class BotTaskSupervisorTest(unittest.IsolatedAsyncioTestCase):
+
+    def task_supervisor(self, bot: FakeBot, **kwargs) -> BotTaskSupervisor:
+        kwargs.setdefault("stable_after", 0.1)
+        kwargs.setdefault("backoff_initial", 0.05)
+        return BotTaskSupervisor(bot.run, bot.shutdown, lambda: bot.ready, **kwargs)
+
+    async def test_task_runs_on_the_loop_and_stops_gracefully(self):
+        bot = FakeBot()
+        supervisor = self.task_supervisor(bot)
+
+        self.assertTrue(await supervisor.start())
+        await wait_for_state(supervisor, "running")
+        status = supervisor.status()
+        self.assertEqual(status["runtime"], "in-process")
+        self.assertIsNotNone(status["pid"])
+
+        self.assertTrue(await supervisor.stop())
+        self.assertTrue(bot.closed.is_set())
+        self.assertEqual([t["state"] for t in supervisor.status()["transitions"]],
+                         ["starting", "ready", "running", "stopping", "stopped"])
+
+    async def test_crashed_task_is_restarted(self):
+        bot = FakeBot(crashes=2)
+        supervisor = self.task_supervisor(bot)
+        await supervisor.start()
+        await wait_for_state(supervisor, "running")
+
+        status = supervisor.status()
+        self.assertEqual(bot.runs, 3)
+        self.assertEqual(status["restarts"], 2)
+        await supervisor.stop()
+        self.assertEqual(supervisor.state, "stopped")
+
+    async def test_gives_up_after_max_restarts(self):
+        bot = FakeBot(crashes=10)
+        supervisor = self.task_supervisor(bot, max_restarts=1)
+        await supervisor.start()
+        for _ in range(300):
+            if supervisor._monitor_task.done():
+                break
+            await asyncio.sleep(0.01)
+
+        self.assertEqual(bot.runs, 2)
+        self.assertIn("crash 2", supervisor.status()["last_error"])
+        await supervisor.stop()
+
+    async def test_stop_cancels_a_task_that_ignores_shutdown(self):
+        async def hang():
+            await asyncio.sleep(30)
+
+        async def ignore():
+            pass
+
+        supervisor = BotTaskSupervisor(hang, ignore, lambda: True, stable_after=0.05, stop_timeout=0.1)
+        await supervisor.start()
+        await wait_for_state(supervisor, "running")
+
+        started = asyncio.get_running_loop().time()
+        await supervisor.stop()
+        self.assertLess(asyncio.get_running_loop().time() - started, 2)
+        self.assertEqual(supervisor.state, "stopped")
+
+    async def test_only_bot_loggers_are_captured(self):
+        bot = FakeBot()
+        supervisor = self.task_supervisor(bot)
+        await supervisor.start()
+        logging.getLogger("discord_bot").warning("from the bot")
+        logging.getLogger("uvicorn.access").warning("from the api")
+        await supervisor.stop()
+        logging.getLogger("discord_bot").warning("after stop")
+
+        output = "\n".join(supervisor.output)
+        self.assertIn("from the bot", output)
+        self.assertNotIn("from the api", output)
+        self.assertNotIn("after stop", output)
+
+
+if __name__ == "__main__":
+    unittest.main()
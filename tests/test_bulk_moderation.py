@@ -0,0 +1,76 @@
+import asyncio
+import sys
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from bulk_moderation import BulkRunner, retry_after
+
+
+class RateLimitError(Exception):
+    status = 429
+
+    def __init__(self, seconds):
+        super().__init__("rate limited")
+        self.response = SimpleNamespace(headers={"Retry-After": str(seconds)})
+
+
+def targets(count):
+    return [SimpleNamespace(id=i) for i in range(count)]
+
+
+class BulkRunnerTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_concurrency_is_bounded(self):
+        in_flight = 0
+        peak = 0
+
+        async def action(target):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+
+        result = await BulkRunner(action, concurrency=3).run(targets(12))
+        self.assertEqual(len(result.succeeded), 12)
+        self.assertEqual(peak, 3)
+
+    async def test_rate_limit_is_retried_and_other_errors_are_not(self):
+        attempts = {}
+
+        async def action(target):
+            attempts[target.id] = attempts.get(target.id, 0) + 1
+            if target.id == 0 and attempts[0] == 1:
+                raise RateLimitError(0.01)
+            if target.id == 1:
+                raise PermissionError("Missing Permissions")
+
+        result = await BulkRunner(action, concurrency=2).run(targets(3))
+        self.assertEqual(sorted(result.succeeded), [0, 2])
+        self.assertEqual(result.failed, {1: "Missing Permissions"})
+        self.assertEqual((attempts[0], attempts[1]), (2, 1))
+        self.assertEqual(result.rate_limited, 1)
+
+    async def test_final_progress_is_always_reported(self):
+        reports = []
+
+        async def on_progress(result):
+            reports.append(result.done)
+
+        async def action(target):
+            pass
+
+        await BulkRunner(action, progress_interval=60, on_progress=on_progress).run(targets(5))
+        self.assertEqual(reports[-1], 5)
+
+    def test_retry_after_reads_headers(self):
+        self.assertEqual(retry_after(RateLimitError(2.5)), 2.5)
+        self.assertEqual(retry_after(SimpleNamespace(retry_after=4)), 4.0)
+        self.assertIsNone(retry_after(ValueError("nope")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import asyncio
+import sys
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from command_sync import CommandSyncer, fingerprint
+
+
+class FakeCommand:
+
+    def __init__(self, name, description="d"):
+        self.name = name
+        self.description = description
+
+    def to_dict(self):
+        return {"name": self.name, "description": self.description, "type": 1}
+
+
+class FakeTree:
+
+    def __init__(self, commands):
+        self.client = SimpleNamespace(application_id=99)
+        self.commands = commands
+        self.synced = []
+        self.in_flight = 0
+        self.peak = 0
+
+    def get_commands(self, guild=None):
+        return self.commands if guild is None else []
+
+    async def sync(self, guild=None):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        self.synced.append(None if guild is None else guild.id)
+        return self.get_commands(guild)
+
+
+class FakeCursor:
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length=None):
+        return self.docs
+
+
+class FakeCollection:
+
+    def __init__(self):
+        self.docs = {}
+
+    def find(self, query, projection=None):
+        return FakeCursor([{"_id": key, **doc} for key, doc in self.docs.items() if key in query["_id"]["$in"]])
+
+    async def update_one(self, query, update, upsert=False):
+        self.docs.setdefault(query["_id"], {}).update(update["$set"])
+
+
+GUILDS = [SimpleNamespace(id=i, name=f"guild {i}") for i in range(6)]
+
+
+class CommandSyncerTest(unittest.IsolatedAsyncioTestCase):
+
+    def test_fingerprint_ignores_command_order(self):
+        a, b = FakeCommand("a").to_dict(), FakeCommand("b").to_dict()
+        self.assertEqual(fingerprint([a, b]), fingerprint([b, a]))
+        self.assertNotEqual(fingerprint([a]), fingerprint([a, b]))
+
+    async def test_unchanged_tree_is_not_synced_again(self):
+        tree = FakeTree([FakeCommand("ping")])
+        syncer = CommandSyncer(tree, FakeCollection(), concurrency=2)
+
+        first = await syncer.sync(GUILDS)
+        self.assertEqual((first["synced"], first["skipped"]), (7, 0))
+        self.assertEqual(tree.peak, 2)
+
+        second = await syncer.sync(GUILDS)
+        self.assertEqual((second["synced"], second["skipped"]), (0, 7))
+
+    async def test_changed_commands_resync_only_that_scope(self):
+        tree = FakeTree([FakeCommand("ping")])
+        syncer = CommandSyncer(tree, FakeCollection())
+        await syncer.sync(GUILDS)
+        tree.synced.clear()
+
+        tree.commands = [FakeCommand("ping", "new description")]
+        await syncer.sync(GUILDS)
+        self.assertEqual(tree.synced, [None])
+
+
+if __name__ == "__main__":
+    unittest.main()
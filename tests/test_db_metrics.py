@@ -0,0 +1,96 @@
+import sys
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from db_metrics import BUCKETS_MS, Histogram, MongoMetrics, command_collection
+
+
+def started(request_id: int, name: str, command: dict, connection=("localhost", 27017)):
+    return SimpleNamespace(request_id=request_id, command_name=name, command=command, connection_id=connection)
+
+
+def finished(request_id: int, ms: float, connection=("localhost", 27017)):
+    return SimpleNamespace(request_id=request_id, duration_micros=int(ms * 1000), connection_id=connection)
+
+
+class HistogramTest(unittest.TestCase):
+
+    def test_buckets_and_percentiles(self):
+        histogram = Histogram()
+        for ms in [0.5] * 90 + [40] * 9 + [9000]:
+            histogram.observe(ms)
+
+        summary = histogram.summary()
+        self.assertEqual(summary["count"], 100)
+        self.assertEqual(summary["buckets"][0], 90)
+        self.assertEqual(summary["buckets"][BUCKETS_MS.index(50)], 9)
+        self.assertEqual(summary["buckets"][-1], 1)
+        self.assertEqual(summary["p50_ms"], 1.0)
+        self.assertEqual(summary["p95_ms"], 50.0)
+        self.assertEqual(summary["p99_ms"], 50.0)
+        self.assertEqual(summary["max_ms"], 9000)
+
+    def test_empty_histogram(self):
+        self.assertIsNone(Histogram().summary()["p50_ms"])
+
+
+class MongoMetricsTest(unittest.TestCase):
+
+    def test_command_collection(self):
+        self.assertEqual(command_collection("find", {"find": "moderation_logs"}), "moderation_logs")
+        self.assertEqual(command_collection("getMore", {"getMore": 123, "collection": "activity_daily"}),
+                         "activity_daily")
+        self.assertEqual(command_collection("ping", {"ping": 1}), "-")
+
+    def test_latency_is_recorded_per_collection_and_operation(self):
+        metrics = MongoMetrics(slow_ms=100)
+        metrics.started(started(1, "find", {"find": "moderation_logs"}))
+        metrics.started(started(2, "insert", {"insert": "server_activity"}))
+        metrics.started(started(3, "find", {"find": "moderation_logs"}))
+        metrics.succeeded(finished(1, 3))
+        metrics.failed(finished(2, 250))
+        metrics.succeeded(finished(3, 7))
+
+        snapshot = metrics.snapshot()
+        find = snapshot["operations"]["moderation_logs.find"]
+        self.assertEqual(find["count"], 2)
+        self.assertEqual(find["avg_ms"], 5)
+        self.assertEqual(find["failures"], 0)
+        self.assertEqual(snapshot["operations"]["server_activity.insert"]["failures"], 1)
+        self.assertEqual(snapshot["slow_count"], 1)
+        self.assertEqual(snapshot["recent_slow"][0]["collection"], "server_activity")
+        self.assertTrue(snapshot["recent_slow"][0]["failed"])
+
+    def test_handshake_commands_are_ignored(self):
+        metrics = MongoMetrics()
+        metrics.started(started(1, "hello", {"hello": 1}))
+        metrics.succeeded(finished(1, 2))
+        self.assertEqual(metrics.snapshot()["operations"], {})
+
+    def test_pool_checkouts_and_failures(self):
+        metrics = MongoMetrics()
+        event = SimpleNamespace(address=("localhost", 27017), connection_id=1)
+        metrics.connection_created(event)
+        metrics.connection_check_out_started(event)
+        metrics.connection_checked_out(event)
+        metrics.connection_check_out_started(event)
+        metrics.connection_check_out_failed(SimpleNamespace(address=event.address, reason="timeout"))
+
+        pool = metrics.snapshot()["pool"]
+        self.assertEqual(pool["checked_out"], 1)
+        self.assertEqual(pool["connections_open"], 1)
+        self.assertEqual(pool["checkout_wait"]["count"], 1)
+        self.assertEqual(pool["checkout_failures"], {"timeout": 1})
+
+        metrics.connection_checked_in(event)
+        metrics.connection_closed(event)
+        pool = metrics.snapshot()["pool"]
+        self.assertEqual(pool["checked_out"], 0)
+        self.assertEqual(pool["connections_open"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
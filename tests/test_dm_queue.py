@@ -0,0 +1,94 @@
+import asyncio
+import sys
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from dm_queue import DMQueue
+
+
+class HTTPError(Exception):
+
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+
+
+class FakeUser:
+
+    def __init__(self, user_id, failures=(), delay=0.0):
+        self.id = user_id
+        self.failures = list(failures)
+        self.delay = delay
+        self.sent = []
+
+    async def send(self, embed):
+        await asyncio.sleep(self.delay)
+        if self.failures:
+            raise self.failures.pop(0)
+        self.sent.append(embed)
+
+
+def embed(text="warned"):
+    return SimpleNamespace(title="notice", description=text)
+
+
+class DMQueueTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.queue = DMQueue(workers=2, backoff_initial=0.01)
+        self.queue.start()
+
+    async def asyncTearDown(self):
+        await self.queue.close(timeout=1)
+
+    async def test_enqueue_returns_before_delivery(self):
+        user = FakeUser(1, delay=0.05)
+        future = self.queue.enqueue(user, embed())
+        self.assertFalse(future.done())
+        self.assertTrue(await future)
+        self.assertEqual(self.queue.stats()["delivered"], 1)
+
+    async def test_identical_notifications_are_deduplicated(self):
+        user = FakeUser(1, delay=0.02)
+        first = self.queue.enqueue(user, embed())
+        second = self.queue.enqueue(user, embed())
+        self.assertIs(first, second)
+        await first
+        # Recently delivered: still not sent twice
+        self.assertTrue(await self.queue.enqueue(user, embed()))
+        self.assertEqual(len(user.sent), 1)
+        self.assertEqual(self.queue.stats()["deduplicated"], 2)
+
+    async def test_transient_errors_retry_and_closed_dms_do_not(self):
+        flaky = FakeUser(1, failures=[HTTPError(500), HTTPError(502)])
+        closed = FakeUser(2, failures=[HTTPError(403)])
+
+        self.assertTrue(await self.queue.enqueue(flaky, embed()))
+        self.assertFalse(await self.queue.enqueue(closed, embed()))
+        stats = self.queue.stats()
+        self.assertEqual((stats["retried"], stats["failed"]), (2, 1))
+
+    async def test_deliver_times_out(self):
+        user = FakeUser(1, delay=1)
+        self.assertFalse(await self.queue.deliver(user, embed(), timeout=0.05))
+        self.assertEqual(self.queue.stats()["timeouts"], 1)
+
+    async def test_dms_failed_on_close_are_not_sent_after_restart(self):
+        queue = DMQueue(workers=1)
+        user = FakeUser(1)
+        future = queue.enqueue(user, embed())
+        # Closed before any worker picked it up
+        await queue.close(timeout=0)
+        self.assertFalse(await future)
+
+        queue.start()
+        await asyncio.sleep(0.05)
+        await queue.close(timeout=0)
+        self.assertEqual(user.sent, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from flood_detector import CHANNEL_FLOOD, DUPLICATE, USER_FLOOD, FloodConfig, FloodDetector
+
+
+class FloodDetectorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.detector = FloodDetector(FloodConfig(user_limit=4, user_window=5, channel_limit=6, channel_window=5,
+                                                  duplicate_limit=3, duplicate_window=30, max_tracked=100))
+
+    def send(self, user_id, content, now, channel_id=1):
+        return self.detector.check(1, channel_id, user_id, content, now)
+
+    def test_user_flood_within_window(self):
+        verdicts = [self.send(10, f"msg {i}", i * 0.5) for i in range(4)]
+        self.assertEqual(verdicts, [None, None, None, USER_FLOOD])
+        # The window starts over after a trigger
+        self.assertIsNone(self.send(10, "again", 2.0))
+
+    def test_slow_messages_are_fine(self):
+        self.assertEqual([self.send(10, f"msg {i}", i * 2.0) for i in range(10)], [None] * 10)
+
+    def test_duplicate_content_is_normalised(self):
+        verdicts = [self.send(10, text, i * 3.0) for i, text in enumerate(["Buy now", "buy   NOW", "BUY NOW"])]
+        self.assertEqual(verdicts, [None, None, DUPLICATE])
+        self.assertIsNone(self.send(11, "buy now", 10.0))
+
+    def test_channel_flood_lowers_the_user_threshold(self):
+        for i, user_id in enumerate([20, 21, 22, 23]):
+            self.assertIsNone(self.send(user_id, f"hi {i}", i * 0.1))
+        self.assertIsNone(self.send(10, "one", 0.5))
+        self.assertEqual(self.send(10, "two", 0.6), CHANNEL_FLOOD)
+
+    def test_tracking_tables_are_bounded(self):
+        for user_id in range(1000):
+            self.send(user_id, f"hello {user_id}", 0.0, channel_id=user_id)
+        stats = self.detector.stats()
+        self.assertEqual(stats["tracked_users"], 100)
+        self.assertEqual(stats["tracked_hashes"], 100)
+        self.assertEqual(stats["tracked_channels"], 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import asyncio
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from health import HealthChecks
+
+
+class Prober:
+    """Background-probe stand-in with a controllable result and call count"""
+
+    def __init__(self, ok: bool = True, checked_at: float = 1000.0, delay: float = 0.0):
+        self.ok = ok
+        self.checked_at = checked_at
+        self.delay = delay
+        self.refreshes = 0
+
+    def status(self) -> dict:
+        return {"ok": self.ok, "checked_at": self.checked_at}
+
+    async def refresh(self):
+        self.refreshes += 1
+        await asyncio.sleep(self.delay)
+        self.ok = True
+        self.checked_at = 2000.0
+
+
+class ReadinessTest(unittest.TestCase):
+
+    def test_ready_when_required_dependencies_are_fresh_and_ok(self):
+        checks = HealthChecks()
+        checks.register("mongodb", Prober().status, max_age=45)
+        checks.register("bot", Prober(ok=False).status, required=False)
+
+        readiness = checks.readiness(now=1010.0)
+        self.assertTrue(readiness["ready"])
+        mongodb = readiness["dependencies"]["mongodb"]
+        self.assertEqual(mongodb["age_seconds"], 10.0)
+        self.assertFalse(mongodb["stale"])
+        self.assertEqual(mongodb["checked_at"], "1970-01-01T00:16:40")
+        self.assertFalse(readiness["dependencies"]["bot"]["ok"])
+
+    def test_stale_or_failing_required_dependency_is_not_ready(self):
+        checks = HealthChecks()
+        checks.register("mongodb", Prober().status, max_age=45)
+        self.assertFalse(checks.readiness(now=1100.0)["ready"])
+        self.assertTrue(checks.readiness(now=1100.0)["dependencies"]["mongodb"]["stale"])
+
+        checks.register("mongodb", Prober(ok=False).status, max_age=45)
+        self.assertFalse(checks.readiness(now=1001.0)["ready"])
+
+    def test_never_checked_dependency_is_stale(self):
+        checks = HealthChecks()
+        checks.register("mongodb", Prober(checked_at=None).status, max_age=45)
+        readiness = checks.readiness(now=1000.0)
+        self.assertFalse(readiness["ready"])
+        self.assertIsNone(readiness["dependencies"]["mongodb"]["age_seconds"])
+
+
+class DeepCheckTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_concurrent_deep_checks_share_one_round(self):
+        prober = Prober(ok=False, delay=0.05)
+        checks = HealthChecks(min_deep_interval=60)
+        checks.register("mongodb", prober.status, refresh=prober.refresh)
+
+        results = await asyncio.gather(*(checks.deep_check() for _ in range(5)))
+        self.assertEqual(prober.refreshes, 1)
+        self.assertTrue(all(result["performed"] for result in results))
+        self.assertTrue(checks.readiness(now=2001.0)["ready"])
+
+    async def test_deep_checks_are_rate_limited(self):
+        prober = Prober()
+        checks = HealthChecks(min_deep_interval=60)
+        checks.register("mongodb", prober.status, refresh=prober.refresh)
+
+        await checks.deep_check()
+        limited = await checks.deep_check()
+        self.assertFalse(limited["performed"])
+        self.assertGreater(limited["retry_after_seconds"], 59)
+        self.assertEqual(prober.refreshes, 1)
+
+    async def test_a_failing_prober_does_not_break_the_others(self):
+        async def broken():
+            raise ConnectionError("down")
+
+        prober = Prober(ok=False)
+        checks = HealthChecks()
+        checks.register("broken", lambda: {"ok": False, "checked_at": None}, refresh=broken)
+        checks.register("mongodb", prober.status, refresh=prober.refresh)
+
+        self.assertTrue((await checks.deep_check())["performed"])
+        self.assertEqual(prober.refreshes, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,175 @@
+import asyncio
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from health_monitor import AlertThresholds, HealthMonitor, LatencyWindow, SeriesWriter, percentile, read_series
+
+
+class StubServer:
+    """Local aiohttp server with fast, slow and failing endpoints"""
+
+    def __init__(self):
+        self.failing = False
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.webhook_messages = []
+        self.runner = None
+        self.url = None
+
+    async def _track(self, delay: float, status: int = 200):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            self.in_flight -= 1
+        return web.json_response({"ok": status < 400}, status=status)
+
+    async def fast(self, request):
+        return await self._track(0.01)
+
+    async def slow(self, request):
+        return await self._track(0.1)
+
+    async def flaky(self, request):
+        return await self._track(0.01, 503 if self.failing else 200)
+
+    async def webhook(self, request):
+        self.webhook_messages.append((await request.json())["content"])
+        return web.Response(status=204)
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/fast", self.fast)
+        app.router.add_get("/slow", self.slow)
+        app.router.add_get("/flaky", self.flaky)
+        app.router.add_post("/webhook", self.webhook)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+
+class LatencyWindowTest(unittest.TestCase):
+
+    def test_percentiles_use_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.50), 50)
+        self.assertEqual(percentile(values, 0.95), 95)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertIsNone(percentile([], 0.5))
+
+    def test_old_samples_leave_the_window(self):
+        window = LatencyWindow(window_seconds=10)
+        window.add(0, 500, True)
+        window.add(5, 10, False)
+        window.add(12, 20, True)
+        stats = window.stats()
+        self.assertEqual(stats["count"], 2)
+        self.assertEqual(stats["errors"], 1)
+        self.assertEqual(stats["p99_ms"], 20)
+        self.assertEqual(stats["consecutive_failures"], 0)
+
+    def test_thresholds_need_enough_samples(self):
+        thresholds = AlertThresholds(p95_ms=100, error_rate=0.5, consecutive_failures=3, min_samples=4)
+        stats = {"count": 2, "errors": 2, "error_rate": 1.0, "p95_ms": 500, "consecutive_failures": 2}
+        self.assertEqual(thresholds.breaches(stats), [])
+        stats.update(count=4, consecutive_failures=3)
+        self.assertEqual(len(thresholds.breaches(stats)), 3)
+
+
+class HealthMonitorTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.server = StubServer()
+        await self.server.start()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    async def asyncTearDown(self):
+        await self.server.stop()
+
+    def monitor(self, endpoints, **kwargs):
+        return HealthMonitor([self.server.url], endpoints, interval=0.01, timeout=2, **kwargs)
+
+    async def test_endpoints_are_probed_concurrently(self):
+        monitor = self.monitor(["/slow", "/fast"] + [f"/slow?n={n}" for n in range(4)])
+        async with monitor.session() as session:
+            started = time.perf_counter()
+            stats = await monitor.check_round(session)
+            elapsed = time.perf_counter() - started
+
+        self.assertLess(elapsed, 0.3)
+        self.assertGreaterEqual(self.server.max_in_flight, 5)
+        self.assertGreaterEqual(stats[f"{self.server.url}/slow"]["p50_ms"], 100)
+        self.assertLess(stats[f"{self.server.url}/fast"]["p50_ms"], 100)
+
+    async def test_probes_never_queue_for_a_connection(self):
+        monitor = self.monitor([f"/slow?n={n}" for n in range(30)])
+        async with monitor.session() as session:
+            await monitor.check_round(session)
+
+        self.assertEqual(self.server.max_in_flight, 30)
+
+    async def test_alerts_fire_once_and_resolve(self):
+        thresholds = AlertThresholds(p95_ms=None, error_rate=None, consecutive_failures=2)
+        monitor = self.monitor(["/flaky"], thresholds=thresholds,
+                               alert_webhook=f"{self.server.url}/webhook")
+        flaky = f"{self.server.url}/flaky"
+        async with monitor.session() as session:
+            await monitor.check_round(session)
+            self.server.failing = True
+            for _ in range(3):
+                await monitor.check_round(session)
+            self.assertIn(flaky, monitor.alerts)
+            self.server.failing = False
+            stats = await monitor.check_round(session)
+
+        self.assertNotIn(flaky, monitor.alerts)
+        self.assertEqual(stats[flaky]["errors"], 3)
+        self.assertEqual(stats[flaky]["last_status"], 200)
+        self.assertEqual(len(self.server.webhook_messages), 2)
+        self.assertIn("unhealthy", self.server.webhook_messages[0])
+        self.assertIn("recovered", self.server.webhook_messages[1])
+
+    async def test_unreachable_target_counts_as_failure(self):
+        monitor = HealthMonitor(["http://127.0.0.1:1"], ["/livez"], timeout=1)
+        async with monitor.session() as session:
+            stats = await monitor.check_round(session)
+        self.assertEqual(stats["http://127.0.0.1:1/livez"]["errors"], 1)
+        self.assertIsNone(stats["http://127.0.0.1:1/livez"]["p50_ms"])
+
+    async def test_run_writes_one_series_line_per_round(self):
+        path = Path(self.tmp.name) / "series.jsonl"
+        monitor = self.monitor(["/fast", "/flaky"], series=SeriesWriter(path))
+        await monitor.run(rounds=3)
+
+        rows = read_series(path)
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[-1]["s"][f"{self.server.url}/fast"]["count"], 3)
+        self.assertEqual(rows[-1]["s"][f"{self.server.url}/flaky"]["last_status"], 200)
+
+    async def test_series_rotates_past_max_bytes(self):
+        path = Path(self.tmp.name) / "series.jsonl"
+        writer = SeriesWriter(path, max_bytes=200)
+        stats = {"http://example/livez": LatencyWindow().stats()}
+        for n in range(5):
+            writer.append(n, stats)
+        self.assertTrue(Path(f"{path}.1").exists())
+        self.assertLess(path.stat().st_size if path.exists() else 0, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
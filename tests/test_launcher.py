@@ -0,0 +1,71 @@
+import asyncio
+import subprocess
+import sys
+import time
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+BACKEND = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND))
+
+import launcher
+
+
+class LauncherTest(unittest.IsolatedAsyncioTestCase):
+
+    def test_phases_are_timed(self):
+        with launcher.startup_timings.phase("test_phase"):
+            time.sleep(0.01)
+        self.assertGreaterEqual(launcher.startup_timings.snapshot()["phases_ms"]["test_phase"], 10)
+
+    async def test_checks_run_concurrently_and_failures_are_recorded(self):
+        async def slow_ok():
+            await asyncio.sleep(0.1)
+            return {"user": "bot"}
+
+        async def slow_fail():
+            await asyncio.sleep(0.1)
+            raise ValueError("rejected")
+
+        started = time.perf_counter()
+        ok, failed = await asyncio.gather(launcher._timed_check("a", slow_ok), launcher._timed_check("b", slow_fail))
+        self.assertLess(time.perf_counter() - started, 0.19)
+        self.assertEqual((ok["ok"], ok["user"]), (True, "bot"))
+        self.assertEqual((failed["ok"], failed["error"]), (False, "rejected"))
+        self.assertIn("b", launcher.startup_timings.snapshot()["checks"])
+
+    def test_heavy_modules_are_not_imported_eagerly(self):
+        code = ("import sys, launcher; "
+                "print(','.join(m for m in ('discord', 'motor', 'psutil', 'uvicorn', 'server') if m in sys.modules))")
+        output = subprocess.run([sys.executable, "-c", code], cwd=BACKEND, capture_output=True, text=True, check=True)
+        self.assertEqual(output.stdout.strip(), "")
+
+
+class BotRecoveryTest(unittest.TestCase):
+
+    def test_retries_share_one_loop_and_mongo_client(self):
+        calls = []
+
+        async def run_discord_bot(close_client=True):
+            calls.append((asyncio.get_running_loop(), close_client))
+            if len(calls) == 1:
+                raise RuntimeError("gateway crashed")
+            launcher.app_shutdown.set()
+
+        client = mock.Mock()
+        modules = {"discord_bot": SimpleNamespace(run_discord_bot=run_discord_bot),
+                   "database": SimpleNamespace(client=client)}
+        self.addCleanup(launcher.app_shutdown.clear)
+        with mock.patch.dict(sys.modules, modules):
+            launcher.run_bot_with_recovery(max_retries=3, backoff=0.01)
+
+        self.assertEqual(len(calls), 2)
+        self.assertIs(calls[0][0], calls[1][0])
+        self.assertEqual([close for _, close in calls], [False, False])
+        client.close.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from log_tail import parse_cursor, read_since, tail_lines
+
+
+class LogTailTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        self.path = self.directory / "bot.log"
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, text, mode="a", path=None):
+        with open(path or self.path, mode, encoding="utf-8") as f:
+            f.write(text)
+
+    def test_tail_returns_last_lines_across_blocks(self):
+        self.write("".join(f"line {i}\n" for i in range(1000)), mode="w")
+
+        lines, cursor = tail_lines(self.path, 5, block_size=16)
+        self.assertEqual(lines, [f"line {i}" for i in range(995, 1000)])
+        self.assertEqual(parse_cursor(cursor)[1], self.path.stat().st_size)
+
+    def test_tail_of_short_file_and_partial_last_line(self):
+        self.write("a\nb\npartial", mode="w")
+
+        lines, cursor = tail_lines(self.path, 10)
+        self.assertEqual(lines, ["a", "b"])
+        self.assertEqual(parse_cursor(cursor)[1], 4)
+
+    def test_tail_of_empty_file(self):
+        self.write("", mode="w")
+        self.assertEqual(tail_lines(self.path, 10)[0], [])
+
+    def test_read_since_returns_only_new_complete_lines(self):
+        self.write("old\n", mode="w")
+        _, cursor = tail_lines(self.path, 10)
+
+        self.write("new 1\nnew 2\nhalf")
+        lines, cursor, rotated = read_since(self.path, cursor)
+        self.assertEqual(lines, ["new 1", "new 2"])
+        self.assertFalse(rotated)
+
+        self.write(" done\n")
+        lines, cursor, _ = read_since(self.path, cursor)
+        self.assertEqual(lines, ["half done"])
+        self.assertEqual(read_since(self.path, cursor)[0], [])
+
+    def test_read_since_follows_rotation(self):
+        self.write("first\n", mode="w")
+        _, cursor = tail_lines(self.path, 10)
+        self.write("before rotation\n")
+        os.replace(self.path, f"{self.path}.1")
+        self.write("after rotation\n", mode="w")
+
+        lines, cursor, rotated = read_since(self.path, cursor)
+        self.assertTrue(rotated)
+        self.assertEqual(lines, ["before rotation", "after rotation"])
+        self.assertEqual(read_since(self.path, cursor)[0], [])
+
+    def test_read_since_after_truncation_restarts_from_beginning(self):
+        self.write("x" * 100 + "\n", mode="w")
+        _, cursor = tail_lines(self.path, 1)
+        self.write("fresh\n", mode="w")
+
+        lines, _, rotated = read_since(self.path, cursor)
+        self.assertTrue(rotated)
+        self.assertEqual(lines, ["fresh"])
+
+    def test_read_since_pages_by_max_lines_without_skipping(self):
+        self.write("old\n", mode="w")
+        _, cursor = tail_lines(self.path, 10)
+        self.write("".join(f"line {i}\n" for i in range(7)))
+
+        pages = []
+        for _ in range(4):
+            lines, cursor, _ = read_since(self.path, cursor, max_lines=3)
+            pages.append(lines)
+        self.assertEqual(pages, [["line 0", "line 1", "line 2"], ["line 3", "line 4", "line 5"], ["line 6"], []])
+
+    def test_max_lines_spans_rotation(self):
+        self.write("first\n", mode="w")
+        _, cursor = tail_lines(self.path, 10)
+        self.write("old 1\nold 2\n")
+        os.replace(self.path, f"{self.path}.1")
+        self.write("new 1\nnew 2\n", mode="w")
+
+        lines, cursor, rotated = read_since(self.path, cursor, max_lines=3)
+        self.assertTrue(rotated)
+        self.assertEqual(lines, ["old 1", "old 2", "new 1"])
+        self.assertEqual(read_since(self.path, cursor, max_lines=3)[0], ["new 2"])
+
+    def test_malformed_cursor(self):
+        self.write("a\n", mode="w")
+        for cursor in ["abc", "1", "1--5"]:
+            with self.assertRaises(ValueError):
+                read_since(self.path, cursor)
+
+
+if __name__ == "__main__":
+    unittest.main()
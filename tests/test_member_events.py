@@ -0,0 +1,68 @@
+import sys
+import unittest
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from member_events import build_member_event, growth_report
+
+
+class FakeCursor:
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def to_list(self, length=None):
+        return self.rows
+
+
+class FakeCollection:
+    """Returns canned aggregation rows and remembers the pipeline"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.pipeline = None
+
+    def aggregate(self, pipeline):
+        self.pipeline = pipeline
+        return FakeCursor(self.rows)
+
+
+def row(day, event_type, count):
+    return {"_id": {"day": day, "type": event_type}, "count": count}
+
+
+class GrowthReportTest(unittest.IsolatedAsyncioTestCase):
+
+    def test_event_carries_its_day(self):
+        event = build_member_event(1, 10, "join", timestamp=datetime(2024, 5, 1, 13, 30))
+        self.assertEqual(event["day"], datetime(2024, 5, 1))
+
+    async def test_totals_churn_and_zero_filled_series(self):
+        collection = FakeCollection([
+            row(datetime(2024, 5, 1), "join", 5),
+            row(datetime(2024, 5, 1), "leave", 1),
+            row(datetime(2024, 5, 3), "leave", 3),
+        ])
+        report = await growth_report(collection, 1, days=3, member_count=101,
+                                     now=datetime(2024, 5, 3, 12))
+
+        self.assertEqual(collection.pipeline[0]["$match"],
+                         {"timestamp": {"$gte": datetime(2024, 4, 30, 12)}, "guild_id": 1})
+        self.assertEqual((report["joins"], report["leaves"], report["net_growth"]), (5, 4, 1))
+        self.assertEqual(report["members_at_start"], 100)
+        self.assertEqual(report["churn_rate"], 0.04)
+        self.assertEqual([d["day"] for d in report["daily_series"]],
+                         ["2024-04-30", "2024-05-01", "2024-05-02", "2024-05-03"])
+        self.assertEqual(report["daily_series"][1], {"day": "2024-05-01", "joins": 5, "leaves": 1, "net": 4})
+        self.assertEqual(report["daily_series"][2]["net"], 0)
+
+    async def test_churn_omitted_without_member_count(self):
+        report = await growth_report(FakeCollection([]), None, days=7, now=datetime(2024, 5, 3))
+        self.assertNotIn("churn_rate", report)
+        self.assertEqual(report["net_growth"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
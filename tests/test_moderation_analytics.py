@@ -0,0 +1,81 @@
+import sys
+import unittest
+from datetime import datetime
+from pathlib import Path
+
+from pymongo import DESCENDING
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from moderation_analytics import daily_summary, violations_report
+
+
+class FakeCursor:
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def to_list(self, length=None):
+        return self.rows
+
+
+class FakeCollection:
+    """Returns canned aggregation rows and remembers the pipeline"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.pipeline = None
+
+    def aggregate(self, pipeline):
+        self.pipeline = pipeline
+        return FakeCursor(self.rows)
+
+
+class ViolationsReportTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_one_faceted_pipeline_maps_to_report_fields(self):
+        collection = FakeCollection([{
+            "types": [{"_id": "warn", "count": 5}, {"_id": "ban", "count": 2}],
+            "violators": [{"_id": 10, "count": 4}, {"_id": 11, "count": 3}],
+        }])
+        report = await violations_report(collection, 1, top=2, since=datetime(2024, 5, 1))
+
+        match, facet = collection.pipeline
+        self.assertEqual(match, {"$match": {"guild_id": 1, "timestamp": {"$gte": datetime(2024, 5, 1)}}})
+        self.assertEqual(set(facet["$facet"]), {"types", "violators"})
+        self.assertEqual(facet["$facet"]["types"][0], {"$group": {"_id": "$action_type", "count": {"$sum": 1}}})
+        self.assertEqual(facet["$facet"]["violators"][0],
+                         {"$group": {"_id": "$target_user_id", "count": {"$sum": 1}}})
+        self.assertEqual(facet["$facet"]["violators"][-1], {"$limit": 2})
+
+        self.assertEqual(report, {
+            "guild_id": 1,
+            "total_violations": 7,
+            "violation_types": {"warn": 5, "ban": 2},
+            "top_violators": [{"user_id": 10, "count": 4}, {"user_id": 11, "count": 3}],
+        })
+
+    async def test_no_logs_and_no_guild_filter(self):
+        collection = FakeCollection([])
+        report = await violations_report(collection)
+
+        self.assertEqual(collection.pipeline[0], {"$match": {}})
+        self.assertEqual((report["total_violations"], report["violation_types"], report["top_violators"]), (0, {}, []))
+
+
+class DailySummaryTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_actions_since_the_day_are_grouped_by_type(self):
+        collection = FakeCollection([{"_id": "mute", "count": 3}, {"_id": "kick", "count": 1}])
+        summary = await daily_summary(collection, 1, datetime(2024, 5, 3))
+
+        self.assertEqual(collection.pipeline, [
+            {"$match": {"guild_id": 1, "timestamp": {"$gte": datetime(2024, 5, 3)}}},
+            {"$group": {"_id": "$action_type", "count": {"$sum": 1}}},
+            {"$sort": {"count": DESCENDING, "_id": 1}},
+        ])
+        self.assertEqual(summary, {"moderation_actions": {"mute": 3, "kick": 1}, "total_moderation_actions": 4})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import sys
+import unittest
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from pagination import after_cursor, decode_cursor, encode_cursor, to_json_line
+
+
+class CursorTest(unittest.TestCase):
+
+    def test_cursor_round_trip(self):
+        timestamp = datetime(2024, 5, 1, 12, 30, 15, 123000)
+        token = encode_cursor(timestamp, "abc-123")
+
+        self.assertNotIn("=", token)
+        self.assertEqual(decode_cursor(token), (timestamp, "abc-123"))
+
+    def test_invalid_cursor_raises_value_error(self):
+        for token in ["not-a-cursor", "", encode_cursor(datetime(2024, 1, 1), "x")[:-4]]:
+            with self.assertRaises(ValueError):
+                decode_cursor(token)
+
+    def test_after_cursor_without_cursor_keeps_query(self):
+        self.assertEqual(after_cursor({"guild_id": 1}, None), {"guild_id": 1})
+
+    def test_after_cursor_adds_keyset_condition(self):
+        timestamp = datetime(2024, 5, 1)
+        query = after_cursor({"guild_id": 1}, encode_cursor(timestamp, "b"))
+
+        self.assertEqual(query, {"$and": [
+            {"guild_id": 1},
+            {"$or": [
+                {"timestamp": {"$lt": timestamp}},
+                {"timestamp": timestamp, "id": {"$lt": "b"}}
+            ]}
+        ]})
+
+    def test_json_line_serializes_datetimes(self):
+        line = to_json_line({"id": "a", "timestamp": datetime(2024, 5, 1)})
+        self.assertEqual(line, '{"id": "a", "timestamp": "2024-05-01T00:00:00"}\n')
+
+
+if __name__ == "__main__":
+    unittest.main()
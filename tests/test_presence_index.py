@@ -0,0 +1,80 @@
+import asyncio
+import sys
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from presence_index import PresenceIndex
+
+GUILD = SimpleNamespace(id=1)
+
+
+def member(member_id, status="online", bot=False):
+    return SimpleNamespace(id=member_id, status=status, bot=bot, guild=GUILD)
+
+
+class PresenceIndexTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.members = [member(1), member(2, "idle"), member(3, "offline"), member(4, bot=True)]
+        GUILD.members = self.members
+        self.index = PresenceIndex(yield_every=2)
+        await self.index.rebuild(GUILD)
+
+    def test_rebuild_counts(self):
+        snapshot = self.index.get(1).snapshot()
+        self.assertEqual(snapshot["total"], 4)
+        self.assertEqual(snapshot["bots"], 1)
+        self.assertEqual(snapshot["status"]["online"], 2)
+        self.assertEqual(snapshot["human_status"]["online"], 1)
+        self.assertEqual(self.index.online_humans(1), [1])
+
+    def test_events_update_counters_incrementally(self):
+        self.index.member_joined(member(5))
+        self.index.presence_changed(member(2, "online"))
+        self.index.presence_changed(member(1, "invisible"))
+        self.index.member_left(member(4, bot=True))
+
+        presence = self.index.get(1)
+        self.assertEqual(presence.total, 4)
+        self.assertEqual(presence.bots, 0)
+        self.assertEqual(presence.human_status_counts,
+                         {"online": 2, "idle": 0, "dnd": 0, "offline": 2})
+        self.assertEqual(self.index.online_humans(1), [5, 2])
+
+    async def test_drift_check_replaces_stale_counters(self):
+        self.assertFalse(await self.index.check_drift(GUILD))
+
+        # A missed presence event
+        self.members[2].status = "dnd"
+        self.assertTrue(await self.index.check_drift(GUILD))
+        self.assertEqual(self.index.drift_corrections, 1)
+        self.assertEqual(self.index.get(1).status_counts["dnd"], 1)
+
+    async def test_events_during_a_drift_check_are_not_lost(self):
+        check = asyncio.create_task(self.index.check_drift(GUILD))
+        # Let the build take its member snapshot and yield
+        await asyncio.sleep(0)
+        self.index.member_joined(member(5))
+        self.index.member_left(member(4, bot=True))
+        await check
+
+        presence = self.index.get(1)
+        self.assertIn(5, presence.members)
+        self.assertNotIn(4, presence.members)
+        self.assertEqual(self.index.drift_corrections, 0)
+        self.assertEqual(self.index._journals, {})
+
+    async def test_stop_drift_checks_cancels_the_task(self):
+        self.index.drift_check_interval = 30
+        self.index.start_drift_checks(SimpleNamespace(guilds=[GUILD]))
+        task = self.index._drift_task
+        self.index.stop_drift_checks()
+        await asyncio.gather(task, return_exceptions=True)
+        self.assertTrue(task.cancelled())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from db_metrics import Histogram
+from prometheus import Exposition, format_labels, merge_expositions
+
+
+class ExpositionTest(unittest.TestCase):
+
+    def test_histogram_buckets_are_cumulative_in_seconds(self):
+        histogram = Histogram()
+        for ms in (0.5, 3, 3, 7000):
+            histogram.observe(ms)
+        exposition = Exposition()
+        exposition.histogram("op_seconds", "Op latency", histogram, {"op": "find"})
+        lines = exposition.render().splitlines()
+
+        self.assertEqual(lines[:2], ["# HELP op_seconds Op latency", "# TYPE op_seconds histogram"])
+        self.assertIn('op_seconds_bucket{op="find",le="0.001"} 1', lines)
+        self.assertIn('op_seconds_bucket{op="find",le="0.005"} 3', lines)
+        self.assertIn('op_seconds_bucket{op="find",le="5"} 3', lines)
+        self.assertIn('op_seconds_bucket{op="find",le="+Inf"} 4', lines)
+        self.assertIn('op_seconds_count{op="find"} 4', lines)
+        self.assertIn('op_seconds_sum{op="find"} 7.0065', lines)
+
+    def test_samples_are_grouped_by_family(self):
+        exposition = Exposition({"instance": "a"})
+        exposition.gauge("up", "Up", 1, {"part": "api"})
+        exposition.counter("requests_total", "Requests", 5)
+        exposition.gauge("up", "Up", 0, {"part": "bot"})
+        text = exposition.render()
+
+        self.assertEqual(text.count("# TYPE up gauge"), 1)
+        self.assertLess(text.index('up{instance="a",part="bot"} 0'), text.index("# TYPE requests_total"))
+
+    def test_labels_are_escaped(self):
+        self.assertEqual(format_labels({"name": 'say "hi"\n'}), '{name="say \\"hi\\"\\n"}')
+
+    def test_merge_keeps_one_header_per_family(self):
+        first = Exposition({"cluster": "0"})
+        first.counter("events_total", "Events", 3)
+        second = Exposition({"cluster": "1"})
+        second.counter("events_total", "Events", 4)
+        second.gauge("lag_seconds", "Lag", 0.25)
+
+        merged = merge_expositions([first.render(), second.render()])
+        self.assertEqual(merged.count("# TYPE events_total counter"), 1)
+        self.assertEqual(merged.splitlines()[:4], [
+            "# HELP events_total Events", "# TYPE events_total counter",
+            'events_total{cluster="0"} 3', 'events_total{cluster="1"} 4',
+        ])
+        self.assertIn('lag_seconds{cluster="1"} 0.25', merged)
+
+
+if __name__ == "__main__":
+    unittest.main()
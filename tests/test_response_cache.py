@@ -0,0 +1,135 @@
+import asyncio
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from response_cache import ResponseCache, bump_version
+
+
+class FakeVersions:
+    """In-memory stand-in for the cache_versions collection"""
+
+    def __init__(self):
+        self.documents = {}
+
+    async def find_one(self, query, projection=None):
+        return self.documents.get(query["_id"])
+
+    async def bulk_write(self, updates, ordered=True):
+        for update in updates:
+            document = self.documents.setdefault(update._filter["_id"], {"version": 0})
+            document["version"] += update._doc["$inc"]["version"]
+
+
+class ResponseCacheTest(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.calls = 0
+
+    async def compute(self, value="report", delay=0):
+        self.calls += 1
+        await asyncio.sleep(delay)
+        return {"value": value, "call": self.calls}
+
+    async def test_hit_after_miss(self):
+        cache = ResponseCache()
+        first = await cache.get_or_compute("reports_daily", {"guild_id": 1}, self.compute, ttl=60)
+        second = await cache.get_or_compute("reports_daily", {"guild_id": 1}, self.compute, ttl=60)
+
+        self.assertIs(first, second)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    async def test_params_are_part_of_the_key(self):
+        cache = ResponseCache()
+        await cache.get_or_compute("server_activity", {"guild_id": 1, "days": 7}, self.compute, ttl=60)
+        await cache.get_or_compute("server_activity", {"guild_id": 1, "days": 30}, self.compute, ttl=60)
+
+        self.assertEqual(self.calls, 2)
+
+    async def test_expired_entries_are_recomputed(self):
+        cache = ResponseCache()
+        await cache.get_or_compute("reports_daily", {"guild_id": 1}, self.compute, ttl=0)
+        await cache.get_or_compute("reports_daily", {"guild_id": 1}, self.compute, ttl=0)
+
+        self.assertEqual(self.calls, 2)
+
+    async def test_concurrent_misses_share_one_computation(self):
+        cache = ResponseCache()
+        results = await asyncio.gather(*[
+            cache.get_or_compute("reports_violations", {"guild_id": 1}, lambda: self.compute(delay=0.02), ttl=60)
+            for _ in range(5)
+        ])
+
+        self.assertEqual(self.calls, 1)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(cache.coalesced, 4)
+
+    async def test_errors_propagate_to_all_waiters_and_are_not_cached(self):
+        cache = ResponseCache()
+
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("db down")
+
+        results = await asyncio.gather(*[
+            cache.get_or_compute("reports_daily", {"guild_id": 1}, failing, ttl=60) for _ in range(3)
+        ], return_exceptions=True)
+
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    async def test_lru_eviction(self):
+        cache = ResponseCache(max_entries=2)
+        for guild_id in (1, 2):
+            await cache.get_or_compute("reports_daily", {"guild_id": guild_id}, self.compute, ttl=60)
+        # Touch guild 1 so guild 2 becomes least recently used
+        await cache.get_or_compute("reports_daily", {"guild_id": 1}, self.compute, ttl=60)
+        await cache.get_or_compute("reports_daily", {"guild_id": 3}, self.compute, ttl=60)
+
+        self.assertEqual(cache.evictions, 1)
+        calls = self.calls
+        await cache.get_or_compute("reports_daily", {"guild_id": 1}, self.compute, ttl=60)
+        self.assertEqual(self.calls, calls)
+
+    async def test_invalidate_guild_drops_guild_and_global_entries(self):
+        cache = ResponseCache()
+        for guild_id in (1, 2, None):
+            await cache.get_or_compute("reports_violations", {"guild_id": guild_id}, self.compute, ttl=60)
+
+        self.assertEqual(cache.invalidate_guild(1), 2)
+        self.assertEqual(cache.stats()["entries"], 1)
+
+    async def test_result_computed_across_invalidation_is_not_stored(self):
+        cache = ResponseCache()
+
+        async def slow():
+            await asyncio.sleep(0.02)
+            return {"stale": True}
+
+        task = asyncio.create_task(cache.get_or_compute("reports_daily", {"guild_id": 1}, slow, ttl=60))
+        await asyncio.sleep(0.005)
+        cache.invalidate_guild(1)
+        await task
+
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    async def test_version_bump_from_another_process_is_a_miss(self):
+        versions = FakeVersions()
+        cache = ResponseCache(versions=versions)
+        for guild_id in (1, 2, None):
+            await cache.get_or_compute("reports_violations", {"guild_id": guild_id}, self.compute, ttl=60)
+
+        # The bot process only shares the collection, not this cache object
+        await bump_version(versions, 1)
+        for guild_id in (1, 2, None):
+            await cache.get_or_compute("reports_violations", {"guild_id": guild_id}, self.compute, ttl=60)
+
+        self.assertEqual(self.calls, 5)
+        self.assertEqual(cache.hits, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import sys
+import unittest
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from violation_counters import EscalationPolicy, build_counter_updates, warn_count
+
+
+def action(action_type, user_id=10):
+    return {"action_type": action_type, "guild_id": 1, "target_user_id": user_id,
+            "timestamp": datetime(2024, 5, 1)}
+
+
+class CounterUpdatesTest(unittest.TestCase):
+
+    def test_only_violations_are_counted(self):
+        updates = build_counter_updates([action("warn"), action("unmute"), action("ban", 11), action("clear", 0)])
+        self.assertEqual([u._filter for u in updates],
+                         [{"guild_id": 1, "user_id": 10}, {"guild_id": 1, "user_id": 11}])
+        self.assertEqual(updates[1]._doc["$inc"], {"total": 1, "by_type.ban": 1})
+        self.assertTrue(all(u._upsert for u in updates))
+
+    def test_warn_count_handles_missing_counter(self):
+        self.assertEqual(warn_count(None), 0)
+        self.assertEqual(warn_count({"by_type": {"warn": 3, "mute": 1}}), 3)
+
+
+class EscalationPolicyTest(unittest.TestCase):
+
+    def test_parse_and_trigger_exactly_at_threshold(self):
+        policy = EscalationPolicy.parse("5:kick, 3:mute:30")
+        self.assertEqual([(s.warnings, s.action) for s in policy.steps], [(3, "mute"), (5, "kick")])
+        self.assertEqual(policy.step_for(3).minutes, 30)
+        self.assertIsNone(policy.step_for(4))
+        self.assertEqual(policy.step_for(5).action, "kick")
+
+    def test_invalid_spec_is_rejected(self):
+        with self.assertRaises(ValueError):
+            EscalationPolicy.parse("3:ban")
+        self.assertEqual(EscalationPolicy.parse("").steps, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
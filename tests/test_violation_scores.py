@@ -0,0 +1,45 @@
+import sys
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from violation_scores import ViolationScorer
+
+
+def action(action_type, user_id=10, timestamp=datetime(2024, 5, 1)):
+    return {"action_type": action_type, "guild_id": 1, "target_user_id": user_id, "timestamp": timestamp}
+
+
+class ViolationScorerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.scorer = ViolationScorer(half_life_days=10)
+
+    def test_score_halves_every_half_life(self):
+        start = datetime(2024, 5, 1)
+        self.assertAlmostEqual(self.scorer.decayed(8.0, start, start + timedelta(days=20)), 2.0)
+
+    def test_rank_key_round_trips_to_the_decayed_score(self):
+        at = datetime(2024, 5, 1)
+        key = self.scorer.rank_key(8.0, at)
+        later = at + timedelta(days=10)
+        self.assertAlmostEqual(self.scorer.current_score(key, later), self.scorer.decayed(8.0, at, later))
+
+    def test_rank_key_orders_by_current_score(self):
+        # An old ban decays below a fresh warning
+        old_ban = self.scorer.rank_key(8.0, datetime(2024, 1, 1))
+        new_warn = self.scorer.rank_key(1.0, datetime(2024, 5, 1))
+        self.assertGreater(new_warn, old_ban)
+
+    def test_updates_skip_unweighted_actions(self):
+        updates = self.scorer.build_updates([action("warn"), action("unmute"), action("ban", 11)])
+        self.assertEqual([u._filter["user_id"] for u in updates], [10, 11])
+        pipeline = updates[1]._doc
+        self.assertEqual(pipeline[0]["$set"]["score"]["$add"][1], 8.0)
+        self.assertTrue(all(u._upsert for u in updates))
+
+
+if __name__ == "__main__":
+    unittest.main()